@@ -0,0 +1,152 @@
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from bs4 import BeautifulSoup
+from checkpoint_io import (
+    COMPRESSION_SUFFIXES,
+    atomic_write,
+    check_compression,
+    find_output,
+    open_file,
+)
+
+
+class ArticleFetcher:
+    def __init__(self, auditor, workers=4, compression="gzip", save_every=1000):
+        self.auditor = auditor
+        self.workers = workers
+        self.compression = check_compression(compression) or "gzip"
+        self.save_every = save_every
+        self.blob_dir = os.path.join(auditor.output_dir, "bodies")
+
+        self.fetched = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def blob_path(self, digest):
+        extension = ".txt" + COMPRESSION_SUFFIXES[self.compression]
+        return os.path.join(self.blob_dir, digest[:2], digest + extension)
+
+    def find_body(self, digest):
+        # A body stored under any compression counts, so changing
+        # --compression does not fetch every body again.
+        return find_output(os.path.join(self.blob_dir, digest[:2]), digest + ".txt")
+
+    def has_body(self, article):
+        digest = article.get("body_sha256")
+        return bool(digest) and self.find_body(digest) is not None
+
+    def extract_main_text(self, html):
+        soup = BeautifulSoup(html, "html.parser")
+        for tag in soup(
+            ["script", "style", "nav", "header", "footer", "aside", "form"]
+        ):
+            tag.decompose()
+
+        # The article body is the container holding the most paragraph text.
+        best_text = ""
+        for container in soup.find_all(["article", "main", "section", "div"]):
+            paragraphs = [
+                p.get_text(" ", strip=True)
+                for p in container.find_all(["p", "h2", "h3", "li"], recursive=False)
+            ]
+            text = "\n\n".join(p for p in paragraphs if p)
+            if len(text) > len(best_text):
+                best_text = text
+
+        if not best_text and soup.body:
+            best_text = soup.body.get_text("\n", strip=True)
+        return best_text
+
+    def store_body(self, text):
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+
+        if self.find_body(digest) is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with atomic_write(path, "wb") as f:
+                f.write(data)
+
+        return digest
+
+    def load_body(self, digest):
+        with open_file(self.find_body(digest), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def fetch_body(self, article):
+        self.auditor.rate_limiter.wait()
+        response = self.auditor.fetch(article["url"], "article", timeout=30)
+        response.raise_for_status()
+        text = self.extract_main_text(response.content)
+        if not text:
+            raise ValueError("no article text found")
+        return self.store_body(text)
+
+    def fetch_all(self):
+        articles = self.auditor.articles
+        print(f"\nFetching article bodies ({len(articles):,} articles)...")
+        print(f"Workers: {self.workers}, compression: {self.compression}")
+        print("-" * 60)
+
+        start_time = time.time()
+        max_in_flight = self.workers * 2
+        in_flight = {}
+        last_saved = 0
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                # Articles are submitted lazily so only max_in_flight bodies
+                # are ever held in memory, whatever the corpus size.
+                for article in list(articles.values()):
+                    if self.has_body(article):
+                        self.skipped += 1
+                        continue
+
+                    if len(in_flight) >= max_in_flight:
+                        self.collect(in_flight, FIRST_COMPLETED)
+
+                    in_flight[executor.submit(self.fetch_body, article)] = article
+
+                    if self.fetched - last_saved >= self.save_every:
+                        self.auditor.request_checkpoint()
+                        last_saved = self.fetched
+
+                self.collect(in_flight, None)
+        finally:
+            self.auditor.finish_checkpoints()
+
+        elapsed = time.time() - start_time
+        print(f"\nBody fetching complete!")
+        print(
+            f"Fetched: {self.fetched}, Failed: {self.failed}, Skipped: {self.skipped}"
+        )
+        print(f"Time elapsed: {elapsed / 60:.1f} minutes")
+
+    def collect(self, in_flight, return_when):
+        if return_when:
+            done, _ = wait(in_flight, return_when=return_when)
+        else:
+            done = list(in_flight)
+
+        for future in done:
+            article = in_flight.pop(future)
+            try:
+                digest = future.result()
+                # The checkpoint thread copies articles under the same lock.
+                with self.auditor.articles_lock:
+                    article["body_sha256"] = digest
+                self.fetched += 1
+            except Exception as e:
+                self.failed += 1
+                self.auditor.metrics.inc(
+                    "errors_total", stage="fetch_body", type=type(e).__name__
+                )
+                print(f"Error fetching body for {article['url']}: {e}")
+
+            if (self.fetched + self.failed) % 100 == 0:
+                print(
+                    f"Progress: {self.fetched:,} fetched, {self.failed:,} failed, "
+                    f"{self.skipped:,} skipped"
+                )
@@ -0,0 +1,9 @@
+def extract_article_id(url):
+    try:
+        parts = url.split("/")
+        for i, part in enumerate(parts):
+            if part == "nuestro-blog" and i + 1 < len(parts):
+                return int(parts[i + 1])
+    except:
+        pass
+    return None
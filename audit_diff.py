@@ -0,0 +1,172 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from collections import Counter
+from datetime import datetime
+from article_ids import extract_article_id
+from audit_merger import iter_audit_columns
+from checkpoint_io import (
+    COMPACT_SEPARATORS,
+    COMPRESSION_SUFFIXES,
+    atomic_write,
+    check_compression,
+)
+
+SIDES = ("old", "new")
+
+
+class AuditDiff:
+    def __init__(self, partitions=32):
+        self.partitions = partitions
+        self.counts = Counter()
+        self.daily = {side: Counter() for side in SIDES}
+        self.removed_per_day = Counter()
+        self.added_per_day = Counter()
+
+    def key(self, url):
+        # Retitling changes the slug but not the numeric ID, so articles are
+        # matched by ID and only fall back to the URL when there is none.
+        article_id = extract_article_id(url)
+        return url if article_id is None else str(article_id)
+
+    def partition(self, side, audit_dir, work_dir):
+        # Partition files are internal, so plain tab-separated lines are used;
+        # they are several times faster to write than csv rows.
+        files = [
+            open(os.path.join(work_dir, f"{side}_{i:04d}.tsv"), "w", encoding="utf-8")
+            for i in range(self.partitions)
+        ]
+        daily = self.daily[side]
+        count = 0
+        try:
+            for url, title, date in iter_audit_columns(
+                audit_dir, ("url", "title", "date_parsed")
+            ):
+                if "\t" in title or "\n" in title:
+                    title = " ".join(title.split())
+                key = self.key(url)
+                index = zlib.crc32(key.encode("utf-8")) % self.partitions
+                files[index].write(f"{key}\t{url}\t{title}\t{date}\n")
+                daily[date] += 1
+                count += 1
+        finally:
+            for f in files:
+                f.close()
+        return count
+
+    def read_partition(self, side, work_dir, index):
+        path = os.path.join(work_dir, f"{side}_{index:04d}.tsv")
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield line[:-1].split("\t")
+        os.remove(path)
+
+    def compare_partition(self, work_dir, index, emit):
+        # Only the old side of one partition is held in memory; the new side
+        # is streamed against it.
+        old = {}
+        for key, url, title, date in self.read_partition("old", work_dir, index):
+            old[key] = (url, title, date)
+
+        for key, url, title, date in self.read_partition("new", work_dir, index):
+            previous = old.pop(key, None)
+            if previous is None:
+                self.added_per_day[date] += 1
+                emit("added", key, url=url, title=title, date=date)
+                continue
+
+            # A retitled article usually gets a new slug too; both changes
+            # are recorded so the old URL is not lost.
+            old_url, old_title, old_date = previous
+            if title != old_title:
+                emit("retitled", key, url=url, old_title=old_title, title=title)
+            if url != old_url:
+                emit("url_changed", key, old_url=old_url, url=url)
+            if date != old_date:
+                emit("redated", key, url=url, old_date=old_date, date=date)
+
+        for key, (url, title, date) in old.items():
+            self.removed_per_day[date] += 1
+            emit("removed", key, url=url, title=title, date=date)
+
+    def daily_changes(self):
+        old, new = self.daily["old"], self.daily["new"]
+        return {
+            date: {
+                "before": old[date],
+                "after": new[date],
+                "change": new[date] - old[date],
+                "removed": self.removed_per_day[date],
+                "added": self.added_per_day[date],
+            }
+            for date in sorted(set(old) | set(new))
+            if old[date] != new[date] or self.removed_per_day[date]
+        }
+
+    def diff(self, old_dir, new_dir, output_dir, compression="gzip"):
+        print(f"\nComparing {old_dir} -> {new_dir}")
+        print("-" * 60)
+        start_time = time.time()
+
+        os.makedirs(output_dir, exist_ok=True)
+        name = f"diff_{os.path.basename(os.path.normpath(old_dir))}"
+        suffix = COMPRESSION_SUFFIXES[check_compression(compression)]
+        changes_file = os.path.join(output_dir, f"{name}.jsonl{suffix}")
+        work_dir = tempfile.mkdtemp(prefix=".diff_", dir=output_dir)
+
+        try:
+            sizes = {
+                side: self.partition(side, audit_dir, work_dir)
+                for side, audit_dir in zip(SIDES, (old_dir, new_dir))
+            }
+
+            with atomic_write(changes_file) as out:
+
+                def emit(op, key, **fields):
+                    self.counts[op] += 1
+                    out.write(
+                        json.dumps(
+                            {"op": op, "key": key, **fields},
+                            separators=COMPACT_SEPARATORS,
+                            ensure_ascii=False,
+                        )
+                        + "\n"
+                    )
+
+                for index in range(self.partitions):
+                    self.compare_partition(work_dir, index, emit)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        summary = {
+            "generated_at": datetime.now().isoformat(),
+            "old": old_dir,
+            "new": new_dir,
+            "old_articles": sizes["old"],
+            "new_articles": sizes["new"],
+            "changes": {
+                op: self.counts[op]
+                for op in ("added", "removed", "retitled", "url_changed", "redated")
+            },
+            "changes_file": os.path.basename(changes_file),
+            "daily_changes": self.daily_changes(),
+        }
+        summary_file = os.path.join(output_dir, f"{name}.json")
+        with atomic_write(summary_file) as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+        elapsed = time.time() - start_time
+        print(
+            f"Added: {self.counts['added']:,}, removed: {self.counts['removed']:,}, "
+            f"retitled: {self.counts['retitled']:,}, "
+            f"URL changed: {self.counts['url_changed']:,}, "
+            f"redated: {self.counts['redated']:,}"
+        )
+        print(f"Days with changed counts: {len(summary['daily_changes']):,}")
+        print(f"Saved: {summary_file}")
+        print(f"Saved: {changes_file}")
+        print(f"Time elapsed: {elapsed:.1f} seconds")
+        return summary
@@ -0,0 +1,284 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from datetime import datetime
+from operator import itemgetter
+from checkpoint_io import (
+    COMPACT_SEPARATORS,
+    atomic_output,
+    atomic_write,
+    check_compression,
+    find_output,
+    load_json_generation,
+    open_file,
+    read_checkpoint_header,
+    write_generation,
+)
+from q2b_studio_auditor import ARTICLE_FIELDS
+
+OPTIONAL_FIELDS = ("archive_url", "body_sha256")
+CONFLICT_FIELDS = ("title", "date_parsed")
+
+
+def iter_audit_articles(audit_dir):
+    # articles.csv is read row by row; checkpoint.json is only parsed whole
+    # for old audits that never wrote a CSV.
+    csv_file = find_output(audit_dir, "articles.csv")
+    if csv_file:
+        with open_file(csv_file, "r", newline="") as f:
+            for row in csv.DictReader(f):
+                article = {k: v for k, v in row.items() if v not in (None, "")}
+                if "page_num" in article:
+                    article["page_num"] = int(article["page_num"])
+                yield article
+        return
+
+    data, _ = load_json_generation(audit_dir, "checkpoint.json")
+    if data is None:
+        raise FileNotFoundError(f"No articles.csv or checkpoint in {audit_dir}")
+    yield from data.get("articles", [])
+
+
+def iter_audit_columns(audit_dir, columns):
+    # Plain csv.reader tuples are several times cheaper than DictReader rows
+    # when only a few columns are needed.
+    csv_file = find_output(audit_dir, "articles.csv")
+    if csv_file is None:
+        for article in iter_audit_articles(audit_dir):
+            yield tuple(article.get(column, "") for column in columns)
+        return
+
+    with open_file(csv_file, "r", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        indexes = [header.index(column) for column in columns]
+        getter = itemgetter(*indexes)
+        for row in reader:
+            yield getter(row) if len(indexes) > 1 else (row[indexes[0]],)
+
+
+class AuditMerger:
+    def __init__(self, partitions=64, compression=None, max_conflict_examples=20):
+        self.partitions = partitions
+        self.compression = check_compression(compression)
+        self.max_conflict_examples = max_conflict_examples
+
+        self.sources = {}
+        self.conflicts = {field: 0 for field in CONFLICT_FIELDS}
+        self.conflict_examples = []
+        self.urls_in_multiple_sources = 0
+        self.cross_source_duplicates = 0
+
+    def source_name(self, audit_dir):
+        return os.path.basename(os.path.normpath(audit_dir))
+
+    def audit_sources(self, audit_dirs):
+        names = set()
+        for audit_dir in audit_dirs:
+            name = self.source_name(audit_dir)
+            if name in names:
+                name = audit_dir
+            names.add(name)
+            header = read_checkpoint_header(audit_dir) or {}
+            yield (
+                name,
+                audit_dir,
+                header.get("url_duplicates", 0),
+                iter_audit_articles(audit_dir),
+            )
+
+    def partition(self, sources, work_dir):
+        # Every URL hashes to exactly one partition, so each partition can be
+        # deduplicated on its own with only ~1/partitions of the data in memory.
+        files = [
+            open(os.path.join(work_dir, f"part_{i:04d}.jsonl"), "w", encoding="utf-8")
+            for i in range(self.partitions)
+        ]
+        try:
+            for order, (name, path, url_duplicates, articles) in enumerate(sources):
+                stats = self.sources[name] = {
+                    "path": path,
+                    "articles": 0,
+                    "unique": 0,
+                    "url_duplicates": url_duplicates,
+                }
+                print(f"Reading {path}...")
+
+                for article in articles:
+                    article["_order"] = order
+                    article["_source"] = name
+                    url_hash = zlib.crc32(article["url"].encode("utf-8"))
+                    index = url_hash % self.partitions
+                    files[index].write(
+                        json.dumps(
+                            article, separators=COMPACT_SEPARATORS, ensure_ascii=False
+                        )
+                        + "\n"
+                    )
+                    stats["articles"] += 1
+
+                print(f"  {stats['articles']:,} articles")
+        finally:
+            for f in files:
+                f.close()
+
+    def resolve(self, url, records):
+        records.sort(key=lambda r: r["_order"])
+        audits = {r["_source"] for r in records}
+
+        if len(audits) > 1:
+            self.urls_in_multiple_sources += 1
+        else:
+            self.sources[records[0]["_source"]]["unique"] += 1
+        self.cross_source_duplicates += len(records) - 1
+
+        for field in CONFLICT_FIELDS:
+            values = {r.get(field) for r in records}
+            if len(values) > 1:
+                self.conflicts[field] += 1
+                if len(self.conflict_examples) < self.max_conflict_examples:
+                    self.conflict_examples.append(
+                        {
+                            "url": url,
+                            "field": field,
+                            "values": {r["_source"]: r.get(field) for r in records},
+                        }
+                    )
+
+        # The earliest source with a parsed date wins; archive URLs and body
+        # hashes are taken from whichever source has them.
+        known = [r for r in records if r.get("date_parsed") != "UNKNOWN_DATE"]
+        merged = dict((known or records)[0])
+        for field in OPTIONAL_FIELDS:
+            values = [r[field] for r in records if r.get(field)]
+            if values and not merged.get(field):
+                merged[field] = values[0]
+
+        # Already-merged audits keep the provenance they were built from.
+        sources = dict.fromkeys(
+            source
+            for r in records
+            for source in (r.get("sources") or r["_source"]).split("|")
+        )
+        merged.pop("_order")
+        merged.pop("_source")
+        merged["sources"] = "|".join(sources)
+        return merged
+
+    def merge_partitions(self, work_dir, merged_file, csv_writer):
+        count = 0
+        with open(merged_file, "w", encoding="utf-8") as out:
+            for i in range(self.partitions):
+                part_file = os.path.join(work_dir, f"part_{i:04d}.jsonl")
+                by_url = {}
+                with open(part_file, "r", encoding="utf-8") as f:
+                    for line in f:
+                        record = json.loads(line)
+                        by_url.setdefault(record["url"], []).append(record)
+                os.remove(part_file)
+
+                for url, records in by_url.items():
+                    article = self.resolve(url, records)
+                    out.write(
+                        json.dumps(
+                            article, separators=COMPACT_SEPARATORS, ensure_ascii=False
+                        )
+                    )
+                    out.write("\n")
+                    csv_writer.writerow(article)
+                    count += 1
+        return count
+
+    def write_checkpoint(self, output_dir, merged_file, count, url_duplicates):
+        # The articles are already serialized, one per line, so the checkpoint
+        # is assembled by streaming them into the article list.
+        header = {
+            "timestamp": datetime.now().isoformat(),
+            "articles_count": count,
+            "url_duplicates": url_duplicates,
+        }
+
+        def write(f):
+            f.write(json.dumps(header, separators=COMPACT_SEPARATORS)[:-1])
+            f.write(',"articles":[')
+            with open(merged_file, "r", encoding="utf-8") as articles:
+                for i, line in enumerate(articles):
+                    if i:
+                        f.write(",")
+                    f.write(line.rstrip("\n"))
+            f.write("]}")
+
+        write_generation(
+            output_dir,
+            "checkpoint.json",
+            write,
+            compression=self.compression,
+            written_at=header["timestamp"],
+        )
+
+    def merge(self, audit_dirs, output_dir):
+        print(f"\nMerging {len(audit_dirs)} audits into: {output_dir}")
+        return self.merge_sources(self.audit_sources(audit_dirs), output_dir)
+
+    def merge_sources(self, sources, output_dir):
+        # sources yields (name, path, url_duplicates, articles) tuples; the
+        # article iterables are consumed one after the other.
+        print(f"Partitions: {self.partitions}")
+        print("-" * 60)
+
+        start_time = time.time()
+        os.makedirs(output_dir, exist_ok=True)
+        work_dir = tempfile.mkdtemp(prefix=".merge_", dir=output_dir)
+
+        try:
+            self.partition(sources, work_dir)
+
+            merged_file = os.path.join(work_dir, "merged.jsonl")
+            with atomic_output(
+                output_dir, "articles.csv", self.compression, newline=""
+            ) as f:
+                writer = csv.DictWriter(
+                    f, fieldnames=ARTICLE_FIELDS, extrasaction="ignore"
+                )
+                writer.writeheader()
+                count = self.merge_partitions(work_dir, merged_file, writer)
+
+            url_duplicates = self.cross_source_duplicates + sum(
+                s["url_duplicates"] for s in self.sources.values()
+            )
+            self.write_checkpoint(output_dir, merged_file, count, url_duplicates)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        summary = self.summary(count, url_duplicates)
+        summary_file = os.path.join(output_dir, "merge_report.json")
+        with atomic_write(summary_file) as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+        elapsed = time.time() - start_time
+        print(f"\nMerge complete: {count:,} unique articles")
+        print(
+            f"Cross-source duplicates: {self.cross_source_duplicates:,}, "
+            f"title conflicts: {self.conflicts['title']:,}, "
+            f"date conflicts: {self.conflicts['date_parsed']:,}"
+        )
+        print(f"Time elapsed: {elapsed:.1f} seconds")
+        return summary
+
+    def summary(self, count, url_duplicates):
+        return {
+            "generated_at": datetime.now().isoformat(),
+            "method": "hash_partitioned_merge",
+            "partitions": self.partitions,
+            "merged_articles": count,
+            "url_duplicates": url_duplicates,
+            "cross_source_duplicates": self.cross_source_duplicates,
+            "urls_in_multiple_sources": self.urls_in_multiple_sources,
+            "conflicts": self.conflicts,
+            "conflict_examples": self.conflict_examples,
+            "sources": self.sources,
+        }
@@ -0,0 +1,180 @@
+import argparse
+import contextlib
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from checkpoint_io import find_output
+from q2b_studio_auditor import Q2BStudioAuditor
+from wayback_archiver import WaybackArchiver
+from benchmarks.fake_site import WORDS
+
+DEFAULT_SCALES = [10_000, 100_000]
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+
+def synthetic_articles(count, articles_per_page=9, articles_per_day=5000, seed=47):
+    rng = random.Random(seed)
+    newest = date(2025, 12, 8)
+    for i in range(count):
+        article_id = count - i
+        title = " ".join(rng.choice(WORDS) for _ in range(8)).capitalize()
+        slug = "-".join(title.lower().split())
+        published = newest - timedelta(days=i // articles_per_day)
+        yield {
+            "url": f"https://www.q2bstudio.com/es/nuestro-blog/{article_id}/{slug}",
+            "title": title,
+            "date_raw": f"Lunes, {published.day} de diciembre de {published.year}",
+            "date_parsed": published.isoformat(),
+            "page_num": i // articles_per_page + 1,
+        }
+
+
+def measure(func, trace_memory):
+    gc.collect()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+
+        peak_mb = None
+        if trace_memory:
+            # A second, traced run: tracemalloc slows code down too much to
+            # share a run with the timing.
+            gc.collect()
+            tracemalloc.start()
+            func()
+            peak_mb = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+            tracemalloc.stop()
+
+    return {"seconds": round(seconds, 4), "peak_mb": peak_mb}
+
+
+def bench_scale(count, trace_memory, compression=None):
+    print(f"\nScale: {count:,} articles")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            auditor = Q2BStudioAuditor(
+                create_output_dir=False, compression=compression
+            )
+            auditor.output_dir = work_dir
+            for article in synthetic_articles(count):
+                auditor.add_article(article)
+
+        def load_checkpoint():
+            Q2BStudioAuditor(create_output_dir=False).load_checkpoint(work_dir)
+
+        def load_data():
+            WaybackArchiver(work_dir).load_data()
+
+        paths = {
+            "save_checkpoint": auditor.save_checkpoint,
+            "generate_report": auditor.generate_report,
+            "load_checkpoint": load_checkpoint,
+            "wayback_load_data": load_data,
+        }
+
+        results = {}
+        for name, func in paths.items():
+            results[name] = measure(func, trace_memory)
+            peak = results[name]["peak_mb"]
+            print(
+                f"  {name:<20}{results[name]['seconds']:>10.3f}s"
+                + (f"{peak:>10.1f} MB peak" if peak is not None else "")
+            )
+
+        results["checkpoint_size_mb"] = round(
+            os.path.getsize(find_output(work_dir, "checkpoint.json")) / (1024 * 1024),
+            1,
+        )
+    return results
+
+
+def compare(current, baseline, threshold):
+    regressions = []
+    for scale, paths in current["scales"].items():
+        base_paths = baseline.get("scales", {}).get(scale)
+        if not base_paths:
+            continue
+        for name, result in paths.items():
+            base = base_paths.get(name)
+            if not isinstance(result, dict) or not isinstance(base, dict):
+                continue
+            if base["seconds"] and result["seconds"] > base["seconds"] * (
+                1 + threshold
+            ):
+                regressions.append(
+                    f"{name} @ {int(scale):,}: {base['seconds']:.3f}s -> "
+                    f"{result['seconds']:.3f}s "
+                    f"(+{(result['seconds'] / base['seconds'] - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark checkpoint, report and load paths on synthetic corpora"
+    )
+    parser.add_argument(
+        "--scales",
+        default=",".join(str(s) for s in DEFAULT_SCALES),
+        help="Comma-separated corpus sizes, e.g. 10000,100000,1000000",
+    )
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument(
+        "--compression", choices=["none", "gzip", "zstd"], default="none"
+    )
+    parser.add_argument("--output", help="Results file (default: benchmarks/results)")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Flag slowdowns above this ratio (default: 0.2 = 20%%)",
+    )
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",") if s]
+    results = {
+        "generated_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "compression": args.compression,
+        "scales": {
+            str(count): bench_scale(count, not args.no_memory, args.compression)
+            for count in scales
+        },
+    }
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"checkpoint_{timestamp}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved: {output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions above {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions above {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
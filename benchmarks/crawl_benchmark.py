@@ -0,0 +1,179 @@
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.fake_site import FakeQ2BSite
+
+
+def available_parsers():
+    parsers = ["stream", "html.parser"]
+    if importlib.util.find_spec("lxml"):
+        parsers.append("lxml")
+    return parsers
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_one(base_url, workers, parser):
+    from q2b_studio_auditor import Q2BStudioAuditor
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        auditor = Q2BStudioAuditor(base_url=base_url, parser=parser, request_interval=0)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+
+        max_page = auditor.get_max_page_number()
+        # Last-page probes are timed on their own below, so pages/s is crawl
+        # throughput only.
+        auditor.scrape_all_pages(max_page, workers=workers, recheck_every=0)
+
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+
+        probe_start = time.perf_counter()
+        auditor.probe_last_page(max_page)
+        probe = time.perf_counter() - probe_start
+
+    pages = max_page or 0
+    articles = len(auditor.articles)
+    counters = auditor.metrics.snapshot()["counters"]
+    downloaded = counters.get('bytes_downloaded_total{endpoint="listing"}', 0)
+    probes = counters.get("last_page_probes_total", 0)
+    return {
+        "workers": workers,
+        "parser": parser,
+        "pages": pages,
+        "articles": articles,
+        "wall_seconds": round(wall, 3),
+        "cpu_seconds": round(cpu, 3),
+        "pages_per_second": round(pages / wall, 2) if wall else None,
+        "articles_per_second": round(articles / wall, 2) if wall else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "kb_per_page": round(downloaded / 1024 / (pages + 1 + probes), 1),
+        "probe_seconds": round(probe, 3),
+        "probe_requests": probes,
+    }
+
+
+def run_isolated(base_url, workers, parser):
+    # Each configuration runs in its own interpreter so peak RSS and CPU time
+    # are not polluted by earlier runs or by the fake server.
+    with tempfile.TemporaryDirectory() as work_dir:
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.crawl_benchmark",
+                "--run-one",
+                "--base-url",
+                base_url,
+                "--workers",
+                str(workers),
+                "--parser",
+                parser,
+            ],
+            cwd=work_dir,
+            env={**os.environ, "PYTHONPATH": REPO_ROOT},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the crawler against a local fake q2bstudio site"
+    )
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--padding-kb", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--parser", choices=["stream", "html.parser", "lxml"])
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--run-one", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_one(args.base_url, args.workers, args.parser)))
+        return
+
+    site = FakeQ2BSite(
+        pages=args.pages,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        padding_kb=args.padding_kb,
+    )
+    base_url = site.start()
+    print(f"Fake site: {base_url} ({args.pages:,} pages, latency {args.latency}s)")
+
+    parsers = [args.parser] if args.parser else available_parsers()
+    modes = [("serial", 1), ("concurrent", args.workers)]
+    results = []
+
+    try:
+        for parser_name in parsers:
+            for mode, workers in modes:
+                print(f"Running {mode} ({workers} workers) with {parser_name}...")
+                result = run_isolated(base_url, workers, parser_name)
+                result["mode"] = mode
+                results.append(result)
+    finally:
+        site.stop()
+
+    print("\n" + "-" * 96)
+    print(
+        f"{'mode':<12}{'parser':<13}{'pages/s':>10}{'articles/s':>12}"
+        f"{'wall s':>9}{'cpu s':>9}{'peak MB':>9}{'KB/page':>9}{'probe s':>9}"
+    )
+    for r in results:
+        print(
+            f"{r['mode']:<12}{r['parser']:<13}{r['pages_per_second']:>10}"
+            f"{r['articles_per_second']:>12}{r['wall_seconds']:>9}"
+            f"{r['cpu_seconds']:>9}{r['peak_rss_mb']:>9}{r['kb_per_page']:>9}"
+            f"{r['probe_seconds']:>9}"
+        )
+    print(f"Errors injected: {site.errors_injected:,}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "site": {
+                        "pages": args.pages,
+                        "latency": args.latency,
+                        "error_rate": args.error_rate,
+                        "padding_kb": args.padding_kb,
+                    },
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+        print(f"Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
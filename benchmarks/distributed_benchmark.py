@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.fake_site import FakeQ2BSite
+
+MAIN = os.path.join(REPO_ROOT, "main.py")
+
+
+def run_main(work_dir, *args, **kwargs):
+    return subprocess.run(
+        [sys.executable, MAIN, *args],
+        cwd=work_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+        **kwargs,
+    )
+
+
+def start_worker(work_dir, base_url, worker_id):
+    return subprocess.Popen(
+        [
+            sys.executable,
+            MAIN,
+            "dist-work",
+            "queue",
+            "--base-url",
+            base_url,
+            "--request-interval",
+            "0",
+            "--worker-id",
+            worker_id,
+        ],
+        cwd=work_dir,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a distributed crawl with several local worker processes "
+        "against a fake q2bstudio site and check the merged result"
+    )
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=10)
+    parser.add_argument("--lease-seconds", type=float, default=3)
+    parser.add_argument(
+        "--kill-after",
+        type=float,
+        default=1.0,
+        help="Kill one worker after this many seconds to exercise re-leasing "
+        "(0 to disable)",
+    )
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    site = FakeQ2BSite(pages=args.pages, latency=args.latency, padding_kb=5)
+    base_url = site.start()
+    expected = args.pages * site.articles_per_page
+    print(f"Fake site: {base_url} ({args.pages:,} pages, {expected:,} articles)")
+
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            run_main(
+                work_dir,
+                "dist-init",
+                "queue",
+                "--base-url",
+                base_url,
+                "--chunk-size",
+                str(args.chunk_size),
+                "--lease-seconds",
+                str(args.lease_seconds),
+            )
+
+            start = time.perf_counter()
+            workers = [
+                start_worker(work_dir, base_url, f"worker-{i}")
+                for i in range(1, args.workers + 1)
+            ]
+            killed = None
+            if args.kill_after and len(workers) > 1:
+                time.sleep(args.kill_after)
+                killed = workers[0]
+                killed.send_signal(signal.SIGKILL)
+                print("Killed worker-1; its chunk must be re-leased")
+            for worker in workers:
+                worker.wait()
+            crawl_seconds = time.perf_counter() - start
+
+            status = run_main(work_dir, "dist-status", "queue").stdout.strip()
+            run_main(
+                work_dir,
+                "dist-merge",
+                "queue",
+                "--output-dir",
+                "q2b_audit_merged",
+                "--no-report",
+            )
+            with open(
+                os.path.join(work_dir, "q2b_audit_merged", "merge_report.json"),
+                "r",
+                encoding="utf-8",
+            ) as f:
+                merge_report = json.load(f)
+    finally:
+        site.stop()
+
+    merged = merge_report["merged_articles"]
+    print(status)
+    print(f"Crawl time: {crawl_seconds:.1f}s with {args.workers} workers")
+    print(f"Merged articles: {merged:,} (expected {expected:,})")
+    for name, source in sorted(merge_report["sources"].items()):
+        print(f"  {name:<12}{source['articles']:>8,} articles")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "pages": args.pages,
+                    "workers": args.workers,
+                    "crawl_seconds": round(crawl_seconds, 3),
+                    "killed_worker": killed is not None,
+                    "merged_articles": merged,
+                    "expected_articles": expected,
+                    "sources": merge_report["sources"],
+                },
+                f,
+                indent=2,
+            )
+        print(f"Saved: {args.output}")
+
+    if merged != expected:
+        print("FAILED: merged article count does not match the site")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SPANISH_DAYS = [
+    "Lunes",
+    "Martes",
+    "Miércoles",
+    "Jueves",
+    "Viernes",
+    "Sábado",
+    "Domingo",
+]
+SPANISH_MONTHS = [
+    "enero",
+    "febrero",
+    "marzo",
+    "abril",
+    "mayo",
+    "junio",
+    "julio",
+    "agosto",
+    "septiembre",
+    "octubre",
+    "noviembre",
+    "diciembre",
+]
+WORDS = (
+    "cómo crear aplicación móvil inteligencia artificial desarrollo software "
+    "empresa nube datos seguridad python javascript guía completa mejores "
+    "prácticas automatización agentes ciberseguridad rendimiento"
+).split()
+
+
+class FakeQ2BSite:
+    def __init__(
+        self,
+        pages=200,
+        articles_per_page=9,
+        latency=0.0,
+        error_rate=0.0,
+        articles_per_day=5000,
+        padding_kb=40,
+        seed=47,
+        port=0,
+    ):
+        self.pages = pages
+        self.articles_per_page = articles_per_page
+        self.latency = latency
+        self.error_rate = error_rate
+        self.articles_per_day = articles_per_day
+        self.padding = "<!-- " + "x" * (padding_kb * 1024) + " -->"
+        self.seed = seed
+        self.port = port
+        self.newest_date = date(2025, 12, 8)
+        self.server = None
+        self.requests_served = 0
+        self.errors_injected = 0
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def article_html(self, article_id):
+        rng = random.Random(self.seed * 1000003 + article_id)
+        title = " ".join(rng.choice(WORDS) for _ in range(8)).capitalize()
+        slug = "-".join(title.lower().split())
+        total_articles = self.pages * self.articles_per_page
+        published = self.newest_date - timedelta(
+            days=(total_articles - article_id) // self.articles_per_day
+        )
+        date_str = (
+            f"{SPANISH_DAYS[published.weekday()]}, {published.day} de "
+            f"{SPANISH_MONTHS[published.month - 1]} de {published.year}"
+        )
+        return (
+            '<div class="col-md-4"><div class="item-new">'
+            f'<a href="/es/nuestro-blog/{article_id}/{slug}">'
+            '<div class="image"><img src="/img/placeholder.webp" alt=""></div>'
+            f'<div class="title">{title}</div></a>'
+            '<div class="tags"><div class="inner">'
+            f"Q2BSTUDIO | {date_str}</div></div>"
+            "</div></div>"
+        )
+
+    def pagination_html(self, page_num):
+        links = [
+            '<li class="page-item"><a class="page-link" '
+            'href="/blog-empresa-aplicaciones">1</a></li>'
+        ]
+        for n in sorted({page_num - 1, page_num, page_num + 1, self.pages}):
+            if 1 < n <= self.pages:
+                links.append(
+                    '<li class="page-item"><a class="page-link" '
+                    f'href="/blog-empresa-aplicaciones/page/{n}">{n}</a></li>'
+                )
+        return (
+            '<nav aria-label="Page navigation example"><ul class="pagination">'
+            + "".join(links)
+            + "</ul></nav>"
+        )
+
+    def page_html(self, page_num):
+        items = []
+        if 1 <= page_num <= self.pages:
+            total_articles = self.pages * self.articles_per_page
+            first_id = total_articles - (page_num - 1) * self.articles_per_page
+            items = [
+                self.article_html(first_id - i) for i in range(self.articles_per_page)
+            ]
+        return (
+            "<!DOCTYPE html><html><head><title>Blog</title>"
+            f"{self.padding}</head><body>"
+            '<header><nav class="navbar">Q2BSTUDIO</nav></header>'
+            '<div class="container"><div class="row">'
+            + "".join(items)
+            + "</div>"
+            + self.pagination_html(page_num)
+            + "</div>"
+            f"<footer>{self.padding}</footer></body></html>"
+        )
+
+    def handle(self, path):
+        with self.lock:
+            self.requests_served += 1
+            inject_error = self.rng.random() < self.error_rate
+            if inject_error:
+                self.errors_injected += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+        if inject_error:
+            return 500, "<html><body>Internal Server Error</body></html>"
+
+        if path.rstrip("/") == "/blog-empresa-aplicaciones":
+            return 200, self.page_html(1)
+        if path.startswith("/blog-empresa-aplicaciones/page/"):
+            try:
+                page_num = int(path.rsplit("/", 1)[-1])
+            except ValueError:
+                return 404, "<html><body>Not found</body></html>"
+            return 200, self.page_html(page_num)
+        return 404, "<html><body>Not found</body></html>"
+
+    def start(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status, html = site.handle(self.path)
+                body = html.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+
+            def handle_error(self, request, client_address):
+                # Streaming clients close the connection once they have what
+                # they need; that is expected, not an error.
+                if not isinstance(sys.exc_info()[1], ConnectionError):
+                    super().handle_error(request, client_address)
+
+        self.server = Server(("127.0.0.1", self.port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
@@ -0,0 +1,99 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["main", "q2b_studio_auditor", "q2b_data_visualizer", "wayback_archiver"]
+HEAVY_MODULES = ["matplotlib", "numpy", "bs4", "requests"]
+
+
+def python(*args, cwd=None):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=cwd or REPO_ROOT,
+        env={**os.environ, "PYTHONPATH": REPO_ROOT},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def import_seconds(module):
+    # -X importtime reports cumulative microseconds per imported module on
+    # stderr; the line for the module itself includes all of its imports.
+    result = python("-X", "importtime", "-c", f"import {module}")
+    for line in result.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1_000_000
+    return None
+
+
+def eagerly_imported(module):
+    check = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    output = python("-c", check).stdout.strip()
+    return [m for m in output.split(",") if m]
+
+
+def command_seconds(*args):
+    with tempfile.TemporaryDirectory() as work_dir:
+        start = time.perf_counter()
+        python(os.path.join(REPO_ROOT, "main.py"), *args, cwd=work_dir)
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check cold-start import cost against a time budget"
+    )
+    parser.add_argument(
+        "--import-budget",
+        type=float,
+        default=0.3,
+        help="Maximum cumulative import time per module in seconds",
+    )
+    parser.add_argument(
+        "--command-budget",
+        type=float,
+        default=1.0,
+        help="Maximum wall time of 'main.py list-checkpoints' in seconds",
+    )
+    args = parser.parse_args()
+
+    failures = []
+
+    for module in MODULES:
+        seconds = import_seconds(module)
+        heavy = eagerly_imported(module)
+        status = "OK"
+        if seconds is not None and seconds > args.import_budget:
+            status = "SLOW"
+            failures.append(f"import {module} took {seconds:.3f}s")
+        if heavy:
+            status = "EAGER"
+            failures.append(f"import {module} loads {', '.join(heavy)}")
+        print(f"{module:<22}{seconds or 0:>8.3f}s  {status}")
+
+    seconds = command_seconds("list-checkpoints")
+    status = "OK" if seconds <= args.command_budget else "SLOW"
+    if status == "SLOW":
+        failures.append(f"main.py list-checkpoints took {seconds:.3f}s")
+    print(f"{'list-checkpoints':<22}{seconds:>8.3f}s  {status}")
+
+    if failures:
+        print("\nStartup budget exceeded:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nStartup within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+COMPACT_SEPARATORS = (",", ":")
+TOPICS_FILE = "topics.json"
+
+
+def check_compression(compression):
+    if compression in (None, "none"):
+        return None
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown compression: {compression}")
+    if compression == "zstd" and zstandard is None:
+        print("Warning: zstandard not installed, falling back to gzip")
+        return "gzip"
+    return compression
+
+
+def compression_for(path):
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if suffix and path.endswith(suffix):
+            return compression
+    return None
+
+
+def open_file(path, mode="r", newline=None, encoding="utf-8", name=None):
+    # The compression is picked from the file name (or from name, for
+    # temporary files), so readers never need to know how a file was written.
+    compression = compression_for(name or path)
+    binary = "b" in mode
+    text_options = {} if binary else {"newline": newline, "encoding": encoding}
+
+    if compression == "gzip":
+        return gzip.open(
+            path, mode if binary else mode + "t", compresslevel=6, **text_options
+        )
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        return zstandard.open(
+            path, mode, cctx=zstandard.ZstdCompressor(level=10), **text_options
+        )
+    return open(path, mode, **text_options)
+
+
+def output_variants(filename):
+    return [filename + suffix for suffix in COMPRESSION_SUFFIXES.values()]
+
+
+def find_output(directory, filename):
+    paths = [
+        os.path.join(directory, variant)
+        for variant in output_variants(filename)
+        if os.path.exists(os.path.join(directory, variant))
+    ]
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+def remove_other_variants(directory, filename, keep):
+    for variant in output_variants(filename):
+        path = os.path.join(directory, variant)
+        if variant != keep and os.path.exists(path):
+            os.remove(path)
+
+
+def fsync_path(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_dir(path):
+    if os.name != "posix":
+        return
+    fsync_path(os.path.dirname(os.path.abspath(path)))
+
+
+@contextmanager
+def atomic_write(path, mode="w", newline=None, encoding="utf-8"):
+    # Write next to the target, fsync, then rename over it: readers only ever
+    # see the old file or the complete new one. The temporary name is unique
+    # per process and thread, so two threads writing the same file never
+    # share it; the last rename wins.
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open_file(
+            tmp_path, mode, newline=newline, encoding=encoding, name=path
+        ) as f:
+            yield f
+        fsync_path(tmp_path)
+        os.replace(tmp_path, path)
+        fsync_dir(path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def atomic_output(directory, filename, compression=None, newline=None):
+    # atomic_write plus the compression suffix; copies left behind by runs
+    # that used another compression are removed once the new file is in place.
+    target = filename + COMPRESSION_SUFFIXES[compression]
+    with atomic_write(os.path.join(directory, target), newline=newline) as f:
+        yield f
+    remove_other_variants(directory, filename, target)
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def previous_name(filename):
+    base, extension = os.path.splitext(filename)
+    return f"{base}.prev{extension}"
+
+
+def manifest_name(filename):
+    return f"{os.path.splitext(filename)[0]}_manifest.json"
+
+
+def read_manifest(directory, filename):
+    manifest_file = os.path.join(directory, manifest_name(filename))
+    if not os.path.exists(manifest_file):
+        return None
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json_generation(directory, filename, data, compression=None, **dump_kwargs):
+    return write_generation(
+        directory,
+        filename,
+        lambda f: json.dump(data, f, **dump_kwargs),
+        compression=compression,
+        written_at=data.get("timestamp"),
+    )
+
+
+def write_generation(directory, filename, write, compression=None, written_at=None):
+    target = filename + COMPRESSION_SUFFIXES[compression]
+    path = os.path.join(directory, target)
+    tmp_path = path + ".tmp"
+
+    try:
+        with open_file(tmp_path, "w", name=path) as f:
+            write(f)
+        fsync_path(tmp_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Hashing the finished file (still in the page cache) is far cheaper than
+    # hashing each of the many small chunks json.dump writes.
+    generation = {
+        "sha256": file_sha256(tmp_path),
+        "size": os.path.getsize(tmp_path),
+        "written_at": written_at,
+    }
+    manifest = read_manifest(directory, filename) or {}
+    previous = manifest.get("generations", [])[:1]
+
+    # The manifest is updated before the files are rotated, so a crash at any
+    # point leaves every file on disk either listed with its checksum or
+    # ignored as an unfinished write.
+    with atomic_write(os.path.join(directory, manifest_name(filename))) as f:
+        json.dump({"file": filename, "generations": [generation] + previous}, f)
+
+    current = find_output(directory, filename)
+    if current:
+        rotated = previous_name(filename) + COMPRESSION_SUFFIXES[
+            compression_for(current)
+        ]
+        os.replace(current, os.path.join(directory, rotated))
+        remove_other_variants(directory, previous_name(filename), rotated)
+    os.replace(tmp_path, path)
+    remove_other_variants(directory, filename, target)
+    fsync_dir(path)
+    return generation
+
+
+def load_json_generation(directory, filename):
+    manifest = read_manifest(directory, filename)
+    known_hashes = (
+        {g["sha256"] for g in manifest.get("generations", [])} if manifest else None
+    )
+
+    for name in (filename, previous_name(filename)):
+        path = find_output(directory, name)
+        if path is None:
+            continue
+        candidate = os.path.basename(path)
+
+        if known_hashes is not None and file_sha256(path) not in known_hashes:
+            print(f"Checksum mismatch for {candidate}, trying previous generation")
+            continue
+
+        try:
+            with open_file(path, "r") as f:
+                return json.load(f), candidate
+        except (OSError, EOFError, ValueError) as e:
+            print(f"Could not read {candidate}: {e}")
+
+    return None, None
+
+
+def read_checkpoint_header(checkpoint_dir):
+    # timestamp, articles_count and url_duplicates are written before the
+    # article list, so the first few bytes are enough; no need to parse an
+    # 80 MB file. A crash between rotating generations can leave only the
+    # previous one.
+    checkpoint_file = find_output(checkpoint_dir, "checkpoint.json") or find_output(
+        checkpoint_dir, previous_name("checkpoint.json")
+    )
+    if checkpoint_file is None:
+        return None
+
+    with open_file(checkpoint_file, "r") as f:
+        head = f.read(4096)
+
+    count = re.search(r'"articles_count":\s*(\d+)', head)
+    duplicates = re.search(r'"url_duplicates":\s*(\d+)', head)
+    timestamp = re.search(r'"timestamp":\s*"([^"]*)"', head)
+    return {
+        "articles_count": int(count.group(1)) if count else None,
+        "url_duplicates": int(duplicates.group(1)) if duplicates else 0,
+        "timestamp": timestamp.group(1) if timestamp else None,
+    }
+
+
+def load_topics(audit_dir):
+    # Written by topic_clusterer; read here so reports do not import numpy.
+    topics_file = os.path.join(audit_dir, TOPICS_FILE)
+    if not os.path.exists(topics_file):
+        return None
+    with open(topics_file, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,62 @@
+import threading
+
+
+class CheckpointWriter:
+    def __init__(self, save, name="checkpoint-writer"):
+        self.save = save
+        self.condition = threading.Condition()
+        self.pending = False
+        self.writing = False
+        self.closed = False
+        self.last_error = None
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self.thread.start()
+
+    def request(self):
+        # Requests made while one is already waiting collapse into it: the
+        # snapshot is taken when the write starts, so it is never stale.
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("checkpoint writer is closed")
+            coalesced = self.pending
+            self.pending = True
+            self.condition.notify_all()
+        return coalesced
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                self.pending = False
+                self.writing = True
+
+            try:
+                self.save()
+            except Exception as e:
+                self.last_error = e
+                print(f"Background checkpoint failed: {e}")
+            finally:
+                with self.condition:
+                    self.writing = False
+                    self.condition.notify_all()
+
+    def flush(self):
+        with self.condition:
+            while self.pending or self.writing:
+                self.condition.wait()
+
+    def close(self, drop_pending=False):
+        # drop_pending discards a request that has not started yet, for a
+        # caller about to save the same state itself; a write already in
+        # progress is always finished. Returns whether one was dropped.
+        with self.condition:
+            dropped = drop_pending and self.pending
+            if drop_pending:
+                self.pending = False
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        return dropped
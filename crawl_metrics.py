@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from checkpoint_io import atomic_write
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def escape_label(value):
+    # Prometheus text format: backslash, double quote and newline are escaped.
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0,
+            "max": round(self.max, 6),
+            "buckets": {
+                **{str(b): c for b, c in zip(self.buckets, self.counts)},
+                "+Inf": self.counts[-1],
+            },
+        }
+
+
+class CrawlMetrics:
+    def __init__(self, filename="crawl_metrics.json", flush_interval=30):
+        self.filename = filename
+        self.flush_interval = flush_interval
+        self.started_at = datetime.now().isoformat()
+        self.lock = threading.Lock()
+        # Flushes come from the crawl and the checkpoint threads; they are
+        # serialized on their own lock so counters never wait for the disk.
+        self.flush_lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.last_flush = time.monotonic()
+        self.server = None
+
+    def key(self, name, labels):
+        return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+    def inc(self, name, value=1, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def format_name(self, name, labels):
+        if not labels:
+            return name
+        return (
+            name
+            + "{"
+            + ",".join(f'{k}="{escape_label(v)}"' for k, v in labels)
+            + "}"
+        )
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "started_at": self.started_at,
+                "updated_at": datetime.now().isoformat(),
+                "counters": {
+                    self.format_name(name, labels): value
+                    for (name, labels), value in sorted(self.counters.items())
+                },
+                "histograms": {
+                    self.format_name(name, labels): histogram.to_dict()
+                    for (name, labels), histogram in sorted(self.histograms.items())
+                },
+            }
+
+    def flush(self, output_dir):
+        if not output_dir:
+            return
+        metrics_file = os.path.join(output_dir, self.filename)
+        with self.flush_lock:
+            with atomic_write(metrics_file) as f:
+                json.dump(self.snapshot(), f, indent=2)
+            self.last_flush = time.monotonic()
+
+    def maybe_flush(self, output_dir):
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush(output_dir)
+
+    def to_prometheus(self):
+        lines = []
+        with self.lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append(f"{self.format_name(name, labels)} {value}")
+
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                bounds = [str(b) for b in histogram.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, histogram.counts):
+                    cumulative += count
+                    bucket_name = self.format_name(
+                        name + "_bucket", labels + (("le", bound),)
+                    )
+                    lines.append(f"{bucket_name} {cumulative}")
+                lines.append(
+                    f"{self.format_name(name + '_sum', labels)} {histogram.sum}"
+                )
+                lines.append(
+                    f"{self.format_name(name + '_count', labels)} {histogram.count}"
+                )
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        print(f"Metrics endpoint: http://{host}:{port}/metrics")
+
+    def close(self, output_dir=None):
+        self.flush(output_dir)
+        if self.server:
+            self.server.shutdown()
+            self.server = None
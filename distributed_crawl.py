@@ -0,0 +1,324 @@
+import json
+import os
+import socket
+import sqlite3
+import time
+from datetime import datetime
+from audit_merger import AuditMerger
+from checkpoint_io import COMPACT_SEPARATORS, fsync_path
+
+QUEUE_FILE = "work_queue.db"
+SEGMENTS_DIR = "segments"
+
+
+class WorkQueue:
+    def __init__(self, work_dir, lease_seconds=300, max_attempts=3):
+        self.work_dir = work_dir
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.db_path = os.path.join(work_dir, QUEUE_FILE)
+        # Every claim runs in its own write transaction; the timeout lets
+        # many workers wait their turn for the database lock. The default
+        # rollback journal is kept because WAL does not work when workers on
+        # several hosts share the directory.
+        self.db = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                start_page INTEGER NOT NULL,
+                end_page INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                articles INTEGER,
+                empty_pages INTEGER,
+                segment TEXT,
+                completed_at TEXT
+            )
+            """
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)"
+        )
+
+    def close(self):
+        self.db.close()
+
+    def create(self, max_page, chunk_size=50, start_page=1, settings=None):
+        if self.db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]:
+            print(f"Work queue already exists in {self.work_dir}, keeping it")
+            return False
+
+        self.db.execute("BEGIN IMMEDIATE")
+        self.db.executemany(
+            "INSERT INTO chunks (start_page, end_page) VALUES (?, ?)",
+            [
+                (first, min(first + chunk_size - 1, max_page))
+                for first in range(start_page, max_page + 1, chunk_size)
+            ],
+        )
+        self.db.executemany(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value)) for key, value in (settings or {}).items()],
+        )
+        self.db.execute("COMMIT")
+        return True
+
+    def settings(self):
+        return {
+            key: json.loads(value)
+            for key, value in self.db.execute("SELECT key, value FROM settings")
+        }
+
+    def claim(self, worker):
+        now = time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            # Leases that ran out belong to workers that died or stalled; their
+            # chunks go back into circulation.
+            row = self.db.execute(
+                "SELECT id, start_page, end_page, status FROM chunks "
+                "WHERE status = 'pending' "
+                "OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row:
+                self.db.execute(
+                    "UPDATE chunks SET status = 'leased', worker = ?, "
+                    "lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                    (worker, now + self.lease_seconds, row[0]),
+                )
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+
+        if row is None:
+            return None
+        chunk_id, start_page, end_page, status = row
+        return {
+            "id": chunk_id,
+            "start_page": start_page,
+            "end_page": end_page,
+            "released": status == "leased",
+        }
+
+    def renew(self, chunk_id, worker):
+        cursor = self.db.execute(
+            "UPDATE chunks SET lease_expires = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (time.time() + self.lease_seconds, chunk_id, worker),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, chunk_id, worker, segment, articles, empty_pages):
+        cursor = self.db.execute(
+            "UPDATE chunks SET status = 'done', segment = ?, articles = ?, "
+            "empty_pages = ?, completed_at = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (
+                segment,
+                articles,
+                empty_pages,
+                datetime.now().isoformat(),
+                chunk_id,
+                worker,
+            ),
+        )
+        return cursor.rowcount == 1
+
+    def release(self, chunk_id, worker):
+        # A chunk with a page that could not be fetched goes back to pending
+        # for another attempt, or is marked failed after max_attempts, so
+        # the merge never silently misses its pages. Returns the new status,
+        # or None if the lease was already lost.
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = self.db.execute(
+                "UPDATE chunks SET status = CASE WHEN attempts >= ? "
+                "THEN 'failed' ELSE 'pending' END, lease_expires = NULL "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (self.max_attempts, chunk_id, worker),
+            )
+            row = self.db.execute(
+                "SELECT status FROM chunks WHERE id = ?", (chunk_id,)
+            ).fetchone()
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return row[0] if cursor.rowcount == 1 else None
+
+    def progress(self):
+        counts = {"pending": 0, "leased": 0, "expired": 0, "done": 0, "failed": 0}
+        now = time.time()
+        for status, lease_expires in self.db.execute(
+            "SELECT status, lease_expires FROM chunks"
+        ):
+            if status == "leased" and lease_expires < now:
+                status = "expired"
+            counts[status] += 1
+        counts["total"] = sum(counts.values())
+        counts["articles"] = self.db.execute(
+            "SELECT COALESCE(SUM(articles), 0) FROM chunks WHERE status = 'done'"
+        ).fetchone()[0]
+        counts["reclaimed"] = self.db.execute(
+            "SELECT COUNT(*) FROM chunks WHERE attempts > 1"
+        ).fetchone()[0]
+        return counts
+
+    def unfinished(self):
+        # Failed chunks are not retried any more, so they do not keep the
+        # workers waiting.
+        return self.db.execute(
+            "SELECT COUNT(*) FROM chunks WHERE status IN ('pending', 'leased')"
+        ).fetchone()[0]
+
+    def completed_segments(self):
+        return self.db.execute(
+            "SELECT worker, segment FROM chunks WHERE status = 'done' "
+            "ORDER BY worker, id"
+        ).fetchall()
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class CrawlWorker:
+    def __init__(self, auditor, queue, worker_id=None, poll_interval=5.0):
+        self.auditor = auditor
+        self.queue = queue
+        self.worker_id = worker_id or default_worker_id()
+        self.poll_interval = poll_interval
+        self.segments_dir = os.path.join(queue.work_dir, SEGMENTS_DIR)
+        os.makedirs(self.segments_dir, exist_ok=True)
+        self.auditor.metrics.filename = f"crawl_metrics.{self.worker_id}.json"
+
+        self.chunks_done = 0
+        self.chunks_lost = 0
+        self.pages_failed = 0
+        self.articles = 0
+
+    def run(self, max_chunks=None):
+        print(f"Worker {self.worker_id} started")
+        while max_chunks is None or self.chunks_done < max_chunks:
+            chunk = self.queue.claim(self.worker_id)
+            if chunk is None:
+                # Chunks still leased elsewhere may expire and need a new
+                # owner, so only stop once every chunk is done.
+                if not self.queue.unfinished():
+                    break
+                time.sleep(min(self.poll_interval, self.queue.lease_seconds))
+                continue
+            if chunk["released"]:
+                self.auditor.metrics.inc("chunks_reclaimed_total")
+            self.crawl_chunk(chunk)
+            self.auditor.metrics.flush(self.queue.work_dir)
+
+        print(
+            f"Worker {self.worker_id} finished: {self.chunks_done} chunks, "
+            f"{self.articles:,} articles, {self.chunks_lost} leases lost, "
+            f"{self.pages_failed} pages failed"
+        )
+
+    def crawl_chunk(self, chunk):
+        print(
+            f"[{self.worker_id}] chunk {chunk['id']}: "
+            f"pages {chunk['start_page']:,}-{chunk['end_page']:,}"
+        )
+        segment = f"chunk_{chunk['id']:06d}.{self.worker_id}.jsonl"
+        segment_path = os.path.join(self.segments_dir, segment)
+        tmp_path = segment_path + ".tmp"
+        articles = 0
+        empty_pages = 0
+        failed_page = None
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for page_num in range(chunk["start_page"], chunk["end_page"] + 1):
+                self.auditor.rate_limiter.wait()
+                try:
+                    articles_on_page = self.auditor.scrape_page(
+                        page_num, raise_errors=True
+                    )
+                except Exception:
+                    # Unlike an empty page, a failed fetch says nothing about
+                    # the page; the rest of the chunk is left to the retry.
+                    failed_page = page_num
+                    self.pages_failed += 1
+                    self.auditor.metrics.inc("pages_failed_total")
+                    break
+                if not articles_on_page:
+                    empty_pages += 1
+                for article in articles_on_page:
+                    f.write(
+                        json.dumps(
+                            article, separators=COMPACT_SEPARATORS, ensure_ascii=False
+                        )
+                        + "\n"
+                    )
+                articles += len(articles_on_page)
+                self.auditor.metrics.inc("pages_scraped_total")
+
+                # Renewing after every page keeps the lease alive for slow
+                # chunks and tells us early if another worker took it over.
+                if not self.queue.renew(chunk["id"], self.worker_id):
+                    break
+
+        if failed_page is not None:
+            os.remove(tmp_path)
+            status = self.queue.release(chunk["id"], self.worker_id)
+            print(
+                f"[{self.worker_id}] page {failed_page:,} failed, chunk "
+                f"{chunk['id']} {status or 'lost its lease'}"
+            )
+            self.auditor.metrics.inc("chunks_released_total", status=status or "lost")
+            return
+
+        fsync_path(tmp_path)
+        os.replace(tmp_path, segment_path)
+
+        if self.queue.complete(
+            chunk["id"], self.worker_id, segment, articles, empty_pages
+        ):
+            self.chunks_done += 1
+            self.articles += articles
+        else:
+            # The chunk was re-leased to someone else; this segment is never
+            # referenced by the queue and is ignored by the merge.
+            print(f"[{self.worker_id}] lost lease on chunk {chunk['id']}")
+            self.chunks_lost += 1
+            self.auditor.metrics.inc("chunk_leases_lost_total")
+            os.remove(segment_path)
+
+
+def iter_segment_articles(segments_dir, segments):
+    for segment in segments:
+        with open(os.path.join(segments_dir, segment), "r", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+
+def merge_segments(queue, output_dir, partitions=64, compression=None):
+    progress = queue.progress()
+    if progress["done"] < progress["total"]:
+        print(
+            f"Warning: only {progress['done']}/{progress['total']} chunks are done "
+            f"({progress['failed']} failed); merging what is there"
+        )
+
+    by_worker = {}
+    for worker, segment in queue.completed_segments():
+        by_worker.setdefault(worker, []).append(segment)
+
+    print(f"\nMerging segments from {len(by_worker)} workers into: {output_dir}")
+    segments_dir = os.path.join(queue.work_dir, SEGMENTS_DIR)
+    sources = (
+        (worker, segments_dir, 0, iter_segment_articles(segments_dir, segments))
+        for worker, segments in sorted(by_worker.items())
+    )
+    merger = AuditMerger(partitions=partitions, compression=compression)
+    return merger.merge_sources(sources, output_dir)
@@ -0,0 +1,169 @@
+import codecs
+from html.parser import HTMLParser
+
+PAGINATION_LABEL = "Page navigation example"
+STREAM_CHUNK_SIZE = 8 * 1024
+
+
+def has_class(attrs, name):
+    return name in (attrs.get("class") or "").split()
+
+
+class ListingParser(HTMLParser):
+    # Extracts the same fields as the BeautifulSoup path (link, title and tags
+    # line of every div.item-new, plus the pagination links) while the page
+    # is still arriving, and sets done once nothing more is needed.
+    def __init__(self, want_items=True):
+        super().__init__(convert_charrefs=True)
+        self.want_items = want_items
+        self.items = []
+        self.page_links = []
+        self.pagination_seen = False
+        self.done = False
+        # Set by the caller from the HTTP response being fed in.
+        self.status_code = None
+
+        self.item = None
+        self.item_depth = 0
+        self.capture = None
+        self.capture_depth = 0
+        self.in_tags = False
+        self.tags_depth = 0
+        self.in_pagination = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+
+        if tag == "nav" and attrs.get("aria-label") == PAGINATION_LABEL:
+            self.in_pagination = True
+        elif self.in_pagination and tag == "a" and has_class(attrs, "page-link"):
+            self.page_links.append(attrs.get("href") or "")
+
+        if tag != "div" and self.item is None:
+            return
+        if tag == "a" and "href" in attrs and self.item.get("href") is None:
+            self.item["href"] = attrs["href"]
+        if tag != "div":
+            return
+
+        if self.item is None:
+            if self.want_items and has_class(attrs, "item-new"):
+                self.item = {}
+                self.item_depth = 1
+            return
+
+        self.item_depth += 1
+        if self.capture is not None:
+            self.capture_depth += 1
+        elif has_class(attrs, "title") and "title" not in self.item:
+            self.start_capture("title")
+        elif self.in_tags and has_class(attrs, "inner") and "tags" not in self.item:
+            self.start_capture("tags")
+        elif has_class(attrs, "tags") and not self.in_tags and "tags" not in self.item:
+            self.in_tags = True
+            self.tags_depth = self.item_depth
+
+    def start_capture(self, field):
+        self.capture = field
+        self.capture_depth = 1
+        self.item[field] = ""
+
+    def handle_endtag(self, tag):
+        if tag == "nav" and self.in_pagination:
+            self.in_pagination = False
+            self.pagination_seen = True
+            # Article items come before the pagination nav, so nothing after
+            # it is needed (unless the items have not shown up yet).
+            if not self.want_items or self.items:
+                self.done = True
+            return
+
+        if tag != "div" or self.item is None:
+            return
+
+        if self.capture is not None:
+            self.capture_depth -= 1
+            if self.capture_depth == 0:
+                self.capture = None
+        if self.in_tags and self.item_depth == self.tags_depth:
+            self.in_tags = False
+
+        self.item_depth -= 1
+        if self.item_depth == 0:
+            self.items.append(self.item)
+            self.item = None
+            self.capture = None
+            self.in_tags = False
+
+    def handle_data(self, data):
+        if self.capture is not None:
+            self.item[self.capture] += data
+
+
+def stream_listing(response, parser, chunk_size=STREAM_CHUNK_SIZE):
+    # Returns (bytes_read, bytes_skipped), both counted on the wire (before
+    # any gzip decoding). bytes_skipped is 0 for a page read to the end, and
+    # None for a page closed early without a Content-Length (chunked), whose
+    # remaining size cannot be known.
+
+    # requests falls back to ISO-8859-1 for text/html without a charset;
+    # the site is UTF-8, which is also what BeautifulSoup would sniff.
+    charset = "charset=" in response.headers.get("Content-Type", "").lower()
+    decoder = codecs.getincrementaldecoder(
+        (response.encoding if charset else None) or "utf-8"
+    )(errors="replace")
+
+    received = 0
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            received += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            if parser.done:
+                break
+        else:
+            parser.feed(decoder.decode(b"", final=True))
+            parser.close()
+        # urllib3 does not count chunked bodies in tell(); those fall back to
+        # the (decoded) bytes received.
+        bytes_read = response.raw.tell() or received
+    finally:
+        # Closing a partly read response drops the connection instead of
+        # draining the rest of the body into the pool.
+        response.close()
+
+    if not parser.done:
+        return bytes_read, 0
+    content_length = response.headers.get("Content-Length")
+    if content_length is None or not content_length.isdigit():
+        return bytes_read, None
+    return bytes_read, max(int(content_length) - bytes_read, 0)
+
+
+def soup_items(soup):
+    # The BeautifulSoup equivalent of ListingParser.items.
+    items = []
+    for element in soup.find_all("div", class_="item-new"):
+        item = {}
+        link = element.find("a", href=True)
+        if link:
+            item["href"] = link["href"]
+        title = element.find("div", class_="title")
+        if title:
+            item["title"] = title.get_text()
+        tags = element.find("div", class_="tags")
+        inner = tags.find("div", class_="inner") if tags else None
+        if inner:
+            item["tags"] = inner.get_text()
+        items.append(item)
+    return items
+
+
+def max_page_from_links(hrefs):
+    max_page = 1
+    for href in hrefs:
+        if "/page/" in href:
+            try:
+                max_page = max(max_page, int(href.split("/page/")[-1]))
+            except ValueError:
+                continue
+    return max_page
@@ -1,9 +1,14 @@
-from q2b_data_visualizer import Q2BDataVisualizer
-from q2b_studio_auditor import Q2BStudioAuditor
-from wayback_archiver import WaybackArchiver
+import argparse
 import os
 import glob
+import sys
+import time
 from datetime import datetime
+from checkpoint_io import read_checkpoint_header
+from profiling import PROFILE_MODES, profiler
+
+# Heavy modules (requests, BeautifulSoup, matplotlib) are imported inside the
+# functions that need them so lightweight subcommands start instantly.
 
 
 def list_checkpoints():
@@ -11,6 +16,20 @@ def list_checkpoints():
     return [d for d in checkpoints if os.path.isdir(d)]
 
 
+def describe_checkpoint(checkpoint_dir):
+    try:
+        header = read_checkpoint_header(checkpoint_dir)
+    except OSError:
+        header = None
+
+    if not header or header["articles_count"] is None:
+        return checkpoint_dir
+    return (
+        f"{checkpoint_dir} - {header['articles_count']:,} articles - "
+        f"{header['timestamp'] or '?'}"
+    )
+
+
 def select_checkpoint():
     checkpoints = list_checkpoints()
     if not checkpoints:
@@ -20,20 +39,7 @@ def select_checkpoint():
     print("\nAvailable checkpoints:")
     print("0. Start fresh (new scraping)")
     for i, checkpoint in enumerate(checkpoints, 1):
-        try:
-            checkpoint_file = os.path.join(checkpoint, "checkpoint.json")
-            if os.path.exists(checkpoint_file):
-                import json
-
-                with open(checkpoint_file, "r") as f:
-                    data = json.load(f)
-                    count = data.get("articles_count", "?")
-                    timestamp = data.get("timestamp", "?")
-                print(f"{i}. {checkpoint} - {count:,} articles - {timestamp}")
-            else:
-                print(f"{i}. {checkpoint}")
-        except:
-            print(f"{i}. {checkpoint}")
+        print(f"{i}. {describe_checkpoint(checkpoint)}")
 
     while True:
         choice = input("\nSelect checkpoint number (0 for fresh start): ").strip()
@@ -56,14 +62,151 @@ def select_checkpoint():
             print("Please enter a valid number")
 
 
-def main():
+def create_auditor(args=None, create_output_dir=True):
+    from q2b_studio_auditor import Q2BStudioAuditor
+
+    if args is None:
+        return Q2BStudioAuditor(create_output_dir=create_output_dir)
+
+    output_dir = getattr(args, "output_dir", None)
+    auditor = Q2BStudioAuditor(
+        create_output_dir=create_output_dir and not output_dir,
+        metrics_port=args.metrics_port,
+        base_url=args.base_url,
+        parser=args.parser,
+        request_interval=args.request_interval,
+        compression=args.compression,
+        search_index=getattr(args, "search_index", False),
+        seen_audit=getattr(args, "since_audit", None),
+        history_db=getattr(args, "history_db", None),
+    )
+    if create_output_dir and output_dir:
+        auditor.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        print(f"Output directory: {output_dir}")
+    return auditor
+
+
+def visualize(output_dir, report):
+    from q2b_data_visualizer import Q2BDataVisualizer
+
+    visualizer = Q2BDataVisualizer(input_dir=output_dir)
+    visualizer.create_visualizations(report)
+
+
+def cluster_topics(audit_dir, num_topics=20, batch_size=10_000):
+    import json
+    from checkpoint_io import atomic_write
+    from topic_clusterer import TopicClusterer
+
+    topics = TopicClusterer(num_topics=num_topics, batch_size=batch_size).cluster(
+        audit_dir
+    )
+    report_file = os.path.join(audit_dir, "report.json")
+    if topics and os.path.exists(report_file):
+        with open(report_file, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        report["topics"] = topics
+        with atomic_write(report_file) as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return topics
+
+
+def visualize_saved(audit_dir):
+    # Re-plotting only needs the per-day counts, which the saved report (or
+    # daily_summary.csv, or one column of articles.csv) already has; the
+    # checkpoint is never loaded.
+    from saved_report import load_report
+
+    report, _ = load_report(audit_dir)
+    if report is None:
+        return False
+    visualize(audit_dir, report)
+    return True
+
+
+def fetch_bodies(auditor, workers=4):
+    from article_fetcher import ArticleFetcher
+
+    fetcher = ArticleFetcher(auditor, workers=workers)
+    fetcher.fetch_all()
+
+
+def match_sources(auditor, reference_corpus):
+    from source_matcher import SourceMatcher
+
+    if not os.path.exists(reference_corpus):
+        print(f"Reference corpus not found: {reference_corpus}")
+        return False
+
+    matcher = SourceMatcher()
+    matcher.load_reference(reference_corpus)
+    matcher.build_index()
+    matcher.write_matches(auditor.articles.values(), auditor.output_dir)
+    return True
+
+
+def archive(
+    output_dir,
+    sample_size=500,
+    metrics_port=None,
+    compression=None,
+    listing_pages=False,
+    since=None,
+    until=None,
+    ids=None,
+    page_shift=None,
+    base_url="https://www.q2bstudio.com",
+):
+    from wayback_archiver import WaybackArchiver
+
+    archiver = WaybackArchiver(
+        output_dir,
+        metrics_port=metrics_port,
+        compression=compression,
+        base_url=base_url,
+    )
+    if not archiver.load_data():
+        print("Aborted archiving due to data loading failure.")
+        return False
+
+    if listing_pages:
+        print(f"Archiving up to {sample_size} listing pages...")
+        archiver.archive_listing_pages(
+            max_pages=sample_size,
+            since=since,
+            until=until,
+            ids=ids,
+            page_shift=page_shift,
+        )
+    else:
+        print(f"Archiving a sample of {sample_size} articles...")
+        archiver.archive_sample(sample_size)
+    archiver.save_results()
+    print("Archiving complete.")
+    return True
+
+
+def interactive():
     print("=" * 60)
     print("Q2BSTUDIO PLAGIARISM AUDITOR")
     print("=" * 60)
 
     checkpoint_dir, visualize_only = select_checkpoint()
 
-    auditor = Q2BStudioAuditor(create_output_dir=(checkpoint_dir is None))
+    if checkpoint_dir and visualize_only:
+        print("\n" + "=" * 60)
+        print("VISUALIZATION MODE - Skipping scraping")
+        print("=" * 60)
+
+        if not visualize_saved(checkpoint_dir):
+            print("No articles found. Cannot visualize.")
+            return
+
+        print(f"\nALL DONE! Check folder: {checkpoint_dir}")
+        return
+
+    auditor = create_auditor(create_output_dir=(checkpoint_dir is None))
 
     start_page = 1
     max_page = None
@@ -71,24 +214,8 @@ def main():
     if checkpoint_dir:
         loaded = auditor.load_checkpoint(checkpoint_dir)
 
-        if visualize_only:
-            print("\n" + "=" * 60)
-            print("VISUALIZATION MODE - Skipping scraping")
-            print("=" * 60)
-
-            if not loaded:
-                print("Failed to load checkpoint. Cannot visualize.")
-                return
-
-            report = auditor.generate_report()
-            visualizer = Q2BDataVisualizer(input_dir=auditor.output_dir)
-            visualizer.create_visualizations(report)
-
-            print(f"\nALL DONE! Check folder: {auditor.output_dir}")
-            return
-
         if loaded:
-            max_page = auditor.get_max_page_number()
+            max_page = auditor.find_last_page()
             if not max_page:
                 print("Could not determine max page. Exiting.")
                 return
@@ -101,9 +228,9 @@ def main():
             auditor.output_dir = f"q2b_audit_{timestamp}"
             os.makedirs(auditor.output_dir, exist_ok=True)
             print(f"Output directory: {auditor.output_dir}")
-            max_page = auditor.get_max_page_number()
+            max_page = auditor.find_last_page()
     else:
-        max_page = auditor.get_max_page_number()
+        max_page = auditor.find_last_page()
 
     output_dir = auditor.output_dir
 
@@ -114,8 +241,7 @@ def main():
     if start_page > max_page:
         print(f"Already scraped all pages (up to {max_page:,}). Nothing to do!")
         report = auditor.generate_report()
-        visualizer = Q2BDataVisualizer(input_dir=output_dir)
-        visualizer.create_visualizations(report)
+        visualize(output_dir, report)
         print(f"\nALL DONE! Check folder: {output_dir}")
         return
 
@@ -128,33 +254,710 @@ def main():
         "Do you want to archive a sample of the articles to Wayback Machine? (yes/no): "
     )
 
+    confirm_bodies = input(
+        "Do you want to fetch and store the article bodies? (yes/no): "
+    )
+
+    reference_corpus = input(
+        "Reference corpus (CSV/JSONL of original titles) to match against, or leave empty to skip: "
+    ).strip()
+
     if confirm_scrape.lower() == "yes":
         auditor.scrape_all_pages(max_page, start_page=start_page, sample_every=1)
     else:
         print("Aborted scraping.")
         return
 
+    if confirm_bodies.lower() == "yes":
+        fetch_bodies(auditor)
+
     report = auditor.generate_report()
+    visualize(output_dir, report)
 
-    visualizer = Q2BDataVisualizer(input_dir=output_dir)
-    visualizer.create_visualizations(report)
+    if reference_corpus:
+        match_sources(auditor, reference_corpus)
 
     if confirm_archive.lower() == "yes":
-        archiver = WaybackArchiver(output_dir)
-        if not archiver.load_data():
-            print("Aborted archiving due to data loading failure.")
+        if not archive(output_dir):
             return
-
-        sample_size = 500
-        print(f"Archiving a sample of {sample_size} articles...")
-        archiver.archive_sample(sample_size)
-        archiver.save_results()
-        print("Archiving complete.")
     else:
         print("Skipping archiving.")
 
     print(f"\nALL DONE! Check folder: {output_dir}")
 
 
+def load_auditor(args):
+    auditor = create_auditor(args, create_output_dir=False)
+    if not auditor.load_checkpoint(args.checkpoint):
+        print(f"Failed to load checkpoint: {args.checkpoint}")
+        sys.exit(1)
+    return auditor
+
+
+def run_crawl(auditor, args, start_page):
+    max_page = args.end_page or auditor.find_last_page()
+    if not max_page:
+        print("Could not determine max page. Exiting.")
+        sys.exit(1)
+
+    if start_page > max_page:
+        print(f"Already scraped all pages (up to {max_page:,}). Nothing to do!")
+    else:
+        auditor.scrape_all_pages(
+            max_page,
+            start_page=start_page,
+            sample_every=args.sample_every,
+            workers=args.workers,
+            recheck_every=0 if args.end_page else args.recheck_every,
+            stop_after_seen_pages=args.stop_after_seen_pages,
+        )
+
+    if args.fetch_bodies:
+        fetch_bodies(auditor, workers=args.workers)
+
+    if args.topics:
+        cluster_topics(auditor.output_dir, num_topics=args.topics)
+
+    report = auditor.generate_report()
+    auditor.record_history(report)
+    if not args.no_visualize:
+        visualize(auditor.output_dir, report)
+
+    if args.match_corpus:
+        match_sources(auditor, args.match_corpus)
+
+    if args.archive:
+        archive(
+            auditor.output_dir,
+            args.archive,
+            args.metrics_port,
+            args.compression,
+            base_url=args.base_url,
+        )
+
+    print(f"\nALL DONE! Check folder: {auditor.output_dir}")
+
+
+def cmd_crawl(args):
+    auditor = create_auditor(args)
+    run_crawl(auditor, args, args.start_page)
+
+
+def cmd_resume(args):
+    auditor = load_auditor(args)
+    if args.start_page:
+        start_page = args.start_page
+    else:
+        max_page = args.end_page or auditor.find_last_page()
+        if not max_page:
+            print("Could not determine max page. Exiting.")
+            sys.exit(1)
+        start_page = auditor.calculate_resume_page(max_page, articles_per_page=9)
+    print(f"\nResuming from page {start_page:,}")
+    run_crawl(auditor, args, start_page)
+
+
+def cmd_report(args):
+    auditor = load_auditor(args)
+    report = auditor.generate_report()
+    auditor.save_report(report)
+    auditor.record_history(report)
+    print(f"Report saved in: {auditor.output_dir}")
+
+
+def cmd_visualize(args):
+    if not visualize_saved(args.checkpoint):
+        print(f"No articles found in: {args.checkpoint}")
+        sys.exit(1)
+    print(f"\nALL DONE! Check folder: {args.checkpoint}")
+
+
+def cmd_archive(args):
+    if not archive(
+        args.checkpoint,
+        args.sample_size,
+        args.metrics_port,
+        args.compression,
+        listing_pages=args.listing_pages,
+        since=args.since,
+        until=args.until,
+        ids=args.ids,
+        page_shift=args.page_shift,
+        base_url=args.base_url,
+    ):
+        sys.exit(1)
+
+
+def cmd_topics(args):
+    if not cluster_topics(args.checkpoint, args.num_topics, args.batch_size):
+        sys.exit(1)
+
+
+def cmd_fetch_bodies(args):
+    auditor = load_auditor(args)
+    fetch_bodies(auditor, workers=args.workers)
+
+
+def cmd_match(args):
+    auditor = load_auditor(args)
+    if not match_sources(auditor, args.corpus):
+        sys.exit(1)
+
+
+def merged_output_dir(args):
+    return args.output_dir or (
+        f"q2b_audit_merged_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+
+
+def finish_merge(args, output_dir):
+    if not args.no_report:
+        args.checkpoint = output_dir
+        auditor = load_auditor(args)
+        report = auditor.generate_report()
+        auditor.save_report(report)
+        auditor.record_history(report)
+        if not args.no_visualize:
+            visualize(output_dir, report)
+    print(f"\nALL DONE! Check folder: {output_dir}")
+
+
+def cmd_merge(args):
+    from audit_merger import AuditMerger
+
+    output_dir = merged_output_dir(args)
+    merger = AuditMerger(partitions=args.partitions, compression=args.compression)
+    merger.merge(args.checkpoints, output_dir)
+    finish_merge(args, output_dir)
+
+
+def cmd_dist_init(args):
+    from distributed_crawl import WorkQueue
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    max_page = args.end_page
+    if not max_page:
+        max_page = create_auditor(args, create_output_dir=False).find_last_page(
+            cache_dir=args.work_dir
+        )
+    if not max_page:
+        print("Could not determine max page. Exiting.")
+        sys.exit(1)
+
+    queue = WorkQueue(args.work_dir)
+    created = queue.create(
+        max_page,
+        chunk_size=args.chunk_size,
+        start_page=args.start_page,
+        settings={
+            "max_page": max_page,
+            "chunk_size": args.chunk_size,
+            "lease_seconds": args.lease_seconds,
+            "created_at": datetime.now().isoformat(),
+        },
+    )
+    if created:
+        progress = queue.progress()
+        print(
+            f"Work queue ready: {progress['total']} chunks of {args.chunk_size} "
+            f"pages ({args.start_page:,} to {max_page:,}) in {args.work_dir}"
+        )
+    queue.close()
+
+
+def run_worker(args, worker_id):
+    from distributed_crawl import CrawlWorker, WorkQueue
+
+    queue = WorkQueue(args.work_dir)
+    queue.lease_seconds = queue.settings().get("lease_seconds", queue.lease_seconds)
+    auditor = create_auditor(args, create_output_dir=False)
+    CrawlWorker(auditor, queue, worker_id).run(max_chunks=args.max_chunks)
+    queue.close()
+
+
+def cmd_dist_work(args):
+    from distributed_crawl import default_worker_id
+
+    worker_id = args.worker_id or default_worker_id()
+    if args.processes <= 1:
+        run_worker(args, worker_id)
+        return
+
+    import multiprocessing
+
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(args, f"{worker_id}-{i}"))
+        for i in range(1, args.processes + 1)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def cmd_dist_status(args):
+    from distributed_crawl import WorkQueue
+
+    queue = WorkQueue(args.work_dir)
+    progress = queue.progress()
+    queue.close()
+    print(
+        f"Chunks: {progress['done']}/{progress['total']} done, "
+        f"{progress['leased']} leased, {progress['expired']} expired, "
+        f"{progress['pending']} pending, {progress['failed']} failed "
+        f"({progress['reclaimed']} re-leased)"
+    )
+    print(f"Articles in finished chunks: {progress['articles']:,}")
+
+
+def cmd_dist_merge(args):
+    from distributed_crawl import WorkQueue, merge_segments
+
+    output_dir = merged_output_dir(args)
+    queue = WorkQueue(args.work_dir)
+    merge_segments(
+        queue, output_dir, partitions=args.partitions, compression=args.compression
+    )
+    queue.close()
+    finish_merge(args, output_dir)
+
+
+def cmd_diff(args):
+    from audit_diff import AuditDiff
+
+    AuditDiff(partitions=args.partitions).diff(
+        args.old,
+        args.new,
+        args.output_dir or args.new,
+        compression=args.compression,
+    )
+
+
+def cmd_search(args):
+    from title_search import open_search_index
+
+    index = open_search_index(args.checkpoint, rebuild=args.rebuild)
+    start = time.perf_counter()
+    matches = index.search(
+        args.query,
+        since=args.since,
+        until=args.until,
+        limit=args.limit,
+        match_all=args.all,
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    index.close()
+
+    for match in matches:
+        print(
+            f"{match['score']:>7.2f}  {match['date_parsed']}  "
+            f"p.{match['page_num'] or '?':<6} {match['title']}"
+        )
+        print(f"{'':>9}{match['url']}")
+    print(f"\n{len(matches)} matches in {elapsed_ms:.1f} ms")
+
+
+def cmd_history(args):
+    import csv
+    from report_history import ReportHistory
+
+    history = ReportHistory(args.db)
+    for audit_dir in args.import_audits or []:
+        if history.import_report(audit_dir):
+            print(f"Imported {audit_dir}")
+        else:
+            print(f"Already up to date: {audit_dir}")
+
+    if args.latest:
+        header = ["date", "count", "run_at", "audit"]
+        rows = history.latest_per_day(args.since, args.until)
+        for date, count, run_at, audit in rows:
+            print(f"{date}  {count:>8,}  {run_at[:19]}  {audit}")
+    else:
+        header = ["run_at", "audit", "date", "count"]
+        rows = history.counts_by_run(
+            args.since, args.until, args.audit, last_per_audit=not args.all_runs
+        )
+        runs = list(dict.fromkeys((run_at, audit) for run_at, audit, _, _ in rows))
+        table = {}
+        for run_at, audit, date, count in rows:
+            table.setdefault(date, {})[(run_at, audit)] = count
+        print(f"{'date':<12}" + "".join(f"{audit[-18:]:>20}" for _, audit in runs))
+        print(f"{'':<12}" + "".join(f"{run_at[:16]:>20}" for run_at, _ in runs))
+        for date in sorted(table):
+            counts = table[date]
+            cells = [f"{counts[run]:,}" if run in counts else "" for run in runs]
+            print(f"{date:<12}" + "".join(f"{cell:>20}" for cell in cells))
+    history.close()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+        print(f"Saved: {args.output}")
+
+
+def cmd_list_checkpoints(args):
+    checkpoints = list_checkpoints()
+    if not checkpoints:
+        print("No existing checkpoints found.")
+        return
+    for checkpoint in checkpoints:
+        print(describe_checkpoint(checkpoint))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Q2BSTUDIO plagiarism auditor. Run without a subcommand for "
+        "the interactive menu."
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--metrics-port", type=int, help="Serve Prometheus metrics on this port"
+    )
+    common.add_argument(
+        "--base-url",
+        default="https://www.q2bstudio.com",
+        help="Site to crawl (e.g. a local fake site for testing)",
+    )
+    common.add_argument(
+        "--request-interval",
+        type=float,
+        default=0.5,
+        help="Minimum seconds between requests (default: 0.5)",
+    )
+    common.add_argument(
+        "--parser",
+        choices=["stream", "html.parser", "lxml"],
+        default="stream",
+        help="Listing page parser; stream closes the connection once the "
+        "pagination has been read (default: stream)",
+    )
+    common.add_argument(
+        "--compression",
+        choices=["none", "gzip", "zstd"],
+        default="none",
+        help="Compress checkpoints and CSV exports (default: none)",
+    )
+    common.add_argument(
+        "--profile",
+        nargs="?",
+        const="sample",
+        choices=PROFILE_MODES,
+        help="Profile each stage and write <audit>/profile/<subcommand> (default "
+        "mode: sample; cprofile adds deterministic per-stage stats)",
+    )
+    common.add_argument(
+        "--profile-interval",
+        type=float,
+        default=0.005,
+        help="Seconds between profile samples (default: 0.005)",
+    )
+
+    history_options = argparse.ArgumentParser(add_help=False)
+    history_options.add_argument(
+        "--history-db",
+        metavar="PATH",
+        help="Append this run's daily counts to a history database (see the "
+        "history command)",
+    )
+
+    crawl_options = argparse.ArgumentParser(add_help=False)
+    crawl_options.add_argument("--start-page", type=int)
+    crawl_options.add_argument(
+        "--end-page", type=int, help="Last page to scrape (default: detected)"
+    )
+    crawl_options.add_argument("--sample-every", type=int, default=1)
+    crawl_options.add_argument("--workers", type=int, default=1)
+    crawl_options.add_argument(
+        "--recheck-every",
+        type=int,
+        default=1000,
+        metavar="PAGES",
+        help="Re-probe the last page every this many pages and extend the "
+        "crawl if the site grew (default: 1000, 0 to disable; ignored with "
+        "--end-page)",
+    )
+    crawl_options.add_argument("--fetch-bodies", action="store_true")
+    crawl_options.add_argument(
+        "--match-corpus", help="Reference corpus (CSV/JSONL) to match titles against"
+    )
+    crawl_options.add_argument(
+        "--archive",
+        type=int,
+        metavar="SAMPLE_SIZE",
+        help="Archive a sample of this many articles to the Wayback Machine",
+    )
+    crawl_options.add_argument(
+        "--search-index",
+        action="store_true",
+        help="Maintain a full-text title index (title_index.db) while crawling",
+    )
+    crawl_options.add_argument(
+        "--topics",
+        type=int,
+        metavar="N",
+        help="Cluster titles into N topics after crawling (see the topics command)",
+    )
+    crawl_options.add_argument(
+        "--stop-after-seen-pages",
+        type=int,
+        default=3,
+        metavar="PAGES",
+        help="With --since-audit, stop after this many pages in a row with "
+        "nothing new (default: 3)",
+    )
+    crawl_options.add_argument("--no-visualize", action="store_true")
+
+    crawl = subparsers.add_parser(
+        "crawl",
+        parents=[common, crawl_options, history_options],
+        help="Start a new crawl",
+    )
+    crawl.add_argument("--output-dir", help="Audit directory (default: timestamped)")
+    crawl.add_argument(
+        "--since-audit",
+        metavar="AUDIT_DIR",
+        help="Delta run: only collect articles not seen by this audit (or the "
+        "runs it was chained from)",
+    )
+    crawl.set_defaults(func=cmd_crawl, start_page=1)
+
+    resume = subparsers.add_parser(
+        "resume",
+        parents=[common, crawl_options, history_options],
+        help="Resume a crawl",
+    )
+    resume.add_argument("checkpoint", help="Audit directory to resume")
+    resume.set_defaults(func=cmd_resume)
+
+    report = subparsers.add_parser(
+        "report",
+        parents=[common, history_options],
+        help="Regenerate report.json and daily summary",
+    )
+    report.add_argument("checkpoint")
+    report.set_defaults(func=cmd_report)
+
+    visualize_cmd = subparsers.add_parser(
+        "visualize", parents=[common], help="Regenerate the graphs"
+    )
+    visualize_cmd.add_argument("checkpoint")
+    visualize_cmd.set_defaults(func=cmd_visualize)
+
+    archive_cmd = subparsers.add_parser(
+        "archive", parents=[common], help="Archive a sample to the Wayback Machine"
+    )
+    archive_cmd.add_argument("checkpoint")
+    archive_cmd.add_argument(
+        "--sample-size",
+        type=int,
+        default=500,
+        help="Articles to archive, or listing pages with --listing-pages",
+    )
+    archive_cmd.add_argument(
+        "--listing-pages",
+        action="store_true",
+        help="Archive listing pages (9 articles each) instead of articles",
+    )
+    archive_cmd.add_argument(
+        "--since", help="With --listing-pages, cover articles from this date"
+    )
+    archive_cmd.add_argument(
+        "--until", help="With --listing-pages, cover articles up to this date"
+    )
+    archive_cmd.add_argument(
+        "--ids",
+        type=int,
+        nargs="+",
+        help="With --listing-pages, cover these article IDs",
+    )
+    archive_cmd.add_argument(
+        "--page-shift",
+        type=int,
+        help="Pages published since the crawl (probed when omitted)",
+    )
+    archive_cmd.set_defaults(func=cmd_archive)
+
+    topics = subparsers.add_parser(
+        "topics",
+        parents=[common],
+        help="Cluster titles into topics and count them per day",
+    )
+    topics.add_argument("checkpoint")
+    topics.add_argument("--num-topics", type=int, default=20)
+    topics.add_argument(
+        "--batch-size", type=int, default=10_000, help="Titles per k-means batch"
+    )
+    topics.set_defaults(func=cmd_topics)
+
+    bodies = subparsers.add_parser(
+        "fetch-bodies", parents=[common], help="Fetch and store article bodies"
+    )
+    bodies.add_argument("checkpoint")
+    bodies.add_argument("--workers", type=int, default=4)
+    bodies.set_defaults(func=cmd_fetch_bodies)
+
+    match = subparsers.add_parser(
+        "match", parents=[common], help="Match titles against a reference corpus"
+    )
+    match.add_argument("checkpoint")
+    match.add_argument("corpus", help="Reference corpus (CSV/JSONL)")
+    match.set_defaults(func=cmd_match)
+
+    merge_options = argparse.ArgumentParser(add_help=False)
+    merge_options.add_argument("--output-dir", help="Merged audit directory")
+    merge_options.add_argument(
+        "--partitions",
+        type=int,
+        default=64,
+        help="Hash partitions; more partitions use less memory (default: 64)",
+    )
+    merge_options.add_argument("--no-report", action="store_true")
+    merge_options.add_argument("--no-visualize", action="store_true")
+
+    merge = subparsers.add_parser(
+        "merge",
+        parents=[common, merge_options, history_options],
+        help="Merge several audits into one",
+    )
+    merge.add_argument("checkpoints", nargs="+", help="Audit directories to merge")
+    merge.set_defaults(func=cmd_merge)
+
+    dist_init = subparsers.add_parser(
+        "dist-init", parents=[common], help="Split a crawl into a shared work queue"
+    )
+    dist_init.add_argument("work_dir", help="Directory shared by all workers")
+    dist_init.add_argument("--start-page", type=int, default=1)
+    dist_init.add_argument(
+        "--end-page", type=int, help="Last page to scrape (default: detected)"
+    )
+    dist_init.add_argument("--chunk-size", type=int, default=50)
+    dist_init.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=300,
+        help="Chunks not renewed within this time are handed to another worker",
+    )
+    dist_init.set_defaults(func=cmd_dist_init)
+
+    dist_work = subparsers.add_parser(
+        "dist-work", parents=[common], help="Claim and scrape chunks from a queue"
+    )
+    dist_work.add_argument("work_dir")
+    dist_work.add_argument("--worker-id", help="Default: hostname-pid")
+    dist_work.add_argument(
+        "--processes", type=int, default=1, help="Worker processes on this host"
+    )
+    dist_work.add_argument(
+        "--max-chunks", type=int, help="Stop after this many chunks per worker"
+    )
+    dist_work.set_defaults(func=cmd_dist_work)
+
+    dist_status = subparsers.add_parser(
+        "dist-status", help="Show work queue progress"
+    )
+    dist_status.add_argument("work_dir")
+    dist_status.set_defaults(func=cmd_dist_status)
+
+    dist_merge = subparsers.add_parser(
+        "dist-merge",
+        parents=[common, merge_options, history_options],
+        help="Merge worker segments into one audit",
+    )
+    dist_merge.add_argument("work_dir")
+    dist_merge.set_defaults(func=cmd_dist_merge)
+
+    diff = subparsers.add_parser(
+        "diff", help="Compare two audits: added, removed and retitled articles"
+    )
+    diff.add_argument("old", help="Earlier audit directory")
+    diff.add_argument("new", help="Later audit directory")
+    diff.add_argument(
+        "--output-dir", help="Where to write the diff (default: the later audit)"
+    )
+    diff.add_argument("--partitions", type=int, default=32)
+    diff.add_argument(
+        "--compression",
+        choices=["none", "gzip", "zstd"],
+        default="gzip",
+        help="Compression of the change list (default: gzip)",
+    )
+    diff.set_defaults(func=cmd_diff)
+
+    search = subparsers.add_parser(
+        "search", help="Full-text search over the titles of an audit"
+    )
+    search.add_argument("checkpoint", help="Audit directory")
+    search.add_argument("query", help="Words or a whole title to look for")
+    search.add_argument("--since", help="Earliest date_parsed (YYYY-MM-DD)")
+    search.add_argument("--until", help="Latest date_parsed (YYYY-MM-DD)")
+    search.add_argument("--limit", type=int, default=20)
+    search.add_argument(
+        "--all", action="store_true", help="Only match titles containing every word"
+    )
+    search.add_argument(
+        "--rebuild", action="store_true", help="Rebuild the index from articles.csv"
+    )
+    search.set_defaults(func=cmd_search)
+
+    history = subparsers.add_parser(
+        "history", help="Daily counts as seen by every recorded run"
+    )
+    history.add_argument(
+        "--db",
+        default="report_history.db",
+        help="History database written by --history-db (default: "
+        "report_history.db)",
+    )
+    history.add_argument("--since", help="First date (YYYY-MM-DD)")
+    history.add_argument("--until", help="Last date (YYYY-MM-DD)")
+    history.add_argument("--audit", help="Only runs of this audit directory")
+    history.add_argument(
+        "--latest",
+        action="store_true",
+        help="Latest known count per day instead of one column per run",
+    )
+    history.add_argument(
+        "--all-runs",
+        action="store_true",
+        help="Show every recorded run, not just the last one of each audit",
+    )
+    history.add_argument(
+        "--import",
+        dest="import_audits",
+        nargs="+",
+        metavar="AUDIT_DIR",
+        help="Record the report.json of existing audits first",
+    )
+    history.add_argument("--output", help="Also write the rows to this CSV file")
+    history.set_defaults(func=cmd_history)
+
+    list_cmd = subparsers.add_parser(
+        "list-checkpoints", help="List audit directories"
+    )
+    list_cmd.set_defaults(func=cmd_list_checkpoints)
+
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    if not args.command:
+        interactive()
+        return
+    if getattr(args, "profile", None):
+        profiler.start(
+            args.profile, interval=args.profile_interval, name=args.command
+        )
+    try:
+        args.func(args)
+    finally:
+        profiler.stop()
+
+
 if __name__ == "__main__":
     main()
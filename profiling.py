@@ -0,0 +1,235 @@
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+
+PROFILE_DIR = "profile"
+PROFILE_MODES = ("sample", "cprofile")
+MAIN_STAGE = "main"
+NO_STAGE = nullcontext()
+
+
+def frame_label(code):
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def write_collapsed(path, stacks):
+    # One "root;...;leaf count" line per stack, the input format of
+    # flamegraph.pl, speedscope and inferno.
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in sorted(stacks.items()):
+            f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    # Process-wide and off by default. Code marks its stages with
+    # profiler.stage(name), which is a shared no-op context until start().
+    #   sample    a background thread records the stack of every thread that
+    #             is inside a stage (and of the main thread) every interval
+    #             seconds; it samples wall time, so waiting on the network
+    #             shows up as socket frames
+    #   cprofile  the same samples plus one deterministic cProfile per stage.
+    #             cProfile follows one thread at a time, so with several
+    #             workers the other threads are only sampled
+    def __init__(self):
+        self.mode = None
+        self.interval = 0.005
+        self.output_dir = None
+        self.name = None
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.sampler = None
+        self.started_at = None
+        self.main_thread = None
+        self.stages = {}
+        self.samples = Counter()
+        self.labels = {}
+        self.profiles = {}
+        self.profile_owner = None
+        self.profile_stack = []
+
+    @property
+    def enabled(self):
+        return self.mode is not None
+
+    def start(self, mode="sample", interval=0.005, name=None):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.mode = mode
+        self.name = name
+        self.interval = interval
+        self.started_at = time.time()
+        self.main_thread = threading.get_ident()
+        self.stopped.clear()
+        self.sampler = threading.Thread(
+            target=self.sample_loop, name="profiler", daemon=True
+        )
+        self.sampler.start()
+
+    def set_output_dir(self, directory):
+        if self.mode is not None and directory:
+            self.output_dir = directory
+
+    def stage(self, name):
+        if self.mode is None:
+            return NO_STAGE
+        return self.staged(name)
+
+    def profiled(self, name):
+        # Decorator form of stage() for methods that are a stage as a whole.
+        def decorate(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+    @contextmanager
+    def staged(self, name):
+        ident = threading.get_ident()
+        with self.lock:
+            stack = self.stages.setdefault(ident, [])
+            stack.append(name)
+            profiled = self.mode == "cprofile" and self.enter_profile(ident, name)
+        try:
+            yield
+        finally:
+            with self.lock:
+                if profiled:
+                    self.exit_profile()
+                stack.pop()
+                if not stack:
+                    del self.stages[ident]
+
+    def enter_profile(self, ident, name):
+        # Nested stages pause the outer stage's profile, so every call is
+        # charged to the innermost stage only.
+        import cProfile
+
+        if self.profile_owner not in (None, ident) or name in self.profile_stack:
+            return False
+        if self.profile_stack:
+            self.profiles[self.profile_stack[-1]].disable()
+        self.profile_owner = ident
+        self.profile_stack.append(name)
+        self.profiles.setdefault(name, cProfile.Profile()).enable()
+        return True
+
+    def exit_profile(self):
+        self.profiles[self.profile_stack.pop()].disable()
+        if self.profile_stack:
+            self.profiles[self.profile_stack[-1]].enable()
+        else:
+            self.profile_owner = None
+
+    def sample_loop(self):
+        while not self.stopped.wait(self.interval):
+            frames = sys._current_frames()
+            with self.lock:
+                staged = {ident: tuple(stack) for ident, stack in self.stages.items()}
+                staged.setdefault(self.main_thread, (MAIN_STAGE,))
+                for ident, stages in staged.items():
+                    frame = frames.get(ident)
+                    codes = []
+                    while frame is not None:
+                        codes.append(frame.f_code)
+                        frame = frame.f_back
+                    if codes:
+                        self.samples[stages, tuple(codes)] += 1
+            del frames
+
+    def label(self, code):
+        label = self.labels.get(code)
+        if label is None:
+            label = self.labels[code] = frame_label(code)
+        return label
+
+    def save(self, directory=None):
+        # Writes into <audit>/profile/<name>, name being the subcommand:
+        #   stacks.collapsed   every sample, rooted at its stage path
+        #   <stage>.collapsed  the samples of one (innermost) stage
+        #   <stage>.prof       cProfile stats, for pstats or snakeviz
+        #   summary.txt        time per stage and its hottest frames
+        directory = directory or self.output_dir or "."
+        profile_dir = os.path.join(directory, PROFILE_DIR, self.name or "")
+        os.makedirs(profile_dir, exist_ok=True)
+
+        with self.lock:
+            samples = list(self.samples.items())
+        collapsed = Counter()
+        per_stage = defaultdict(Counter)
+        leaves = defaultdict(Counter)
+        for (stages, codes), count in samples:
+            # The profiler's own stage wrappers are left out of the stacks.
+            frames = [
+                self.label(code)
+                for code in reversed(codes)
+                if code.co_filename != __file__
+            ]
+            collapsed[";".join(stages + tuple(frames))] += count
+            per_stage[stages[-1]][";".join(frames)] += count
+            leaves[stages[-1]][frames[-1]] += count
+
+        write_collapsed(os.path.join(profile_dir, "stacks.collapsed"), collapsed)
+        for stage, stacks in per_stage.items():
+            write_collapsed(os.path.join(profile_dir, f"{stage}.collapsed"), stacks)
+
+        stage_stats = self.save_profiles(profile_dir)
+
+        totals = {stage: sum(stacks.values()) for stage, stacks in per_stage.items()}
+        total = sum(totals.values()) or 1
+        with open(os.path.join(profile_dir, "summary.txt"), "w", encoding="utf-8") as f:
+            f.write(
+                f"Profile mode: {self.mode}, one sample every "
+                f"{self.interval * 1000:.0f} ms per thread, "
+                f"{time.time() - self.started_at:.1f} s wall time\n\n"
+            )
+            f.write(f"{'stage':<28}{'samples':>10}{'~seconds':>10}{'share':>8}\n")
+            for stage, count in sorted(totals.items(), key=lambda item: -item[1]):
+                f.write(
+                    f"{stage:<28}{count:>10,}{count * self.interval:>10.1f}"
+                    f"{count / total:>8.1%}\n"
+                )
+            for stage, count in sorted(totals.items(), key=lambda item: -item[1]):
+                f.write(f"\n[{stage}] hottest frames (self samples)\n")
+                for frame, hits in leaves[stage].most_common(10):
+                    f.write(f"  {hits / count:>6.1%}  {frame}\n")
+                if stage in stage_stats:
+                    f.write(f"\n[{stage}] cProfile, top functions by own time\n")
+                    stage_stats[stage].stream = f
+                    stage_stats[stage].sort_stats("tottime").print_stats(15)
+
+        print(f"Profile saved in: {profile_dir}")
+        return profile_dir
+
+    def save_profiles(self, profile_dir):
+        # A profile that is running right now is left for the next save.
+        import pstats
+
+        stage_stats = {}
+        with self.lock:
+            for stage, profile in self.profiles.items():
+                if stage in self.profile_stack:
+                    continue
+                stats = pstats.Stats(profile)
+                stats.dump_stats(os.path.join(profile_dir, f"{stage}.prof"))
+                stage_stats[stage] = stats
+        return stage_stats
+
+    def stop(self):
+        if self.mode is None:
+            return
+        self.stopped.set()
+        self.sampler.join()
+        self.save()
+        self.mode = None
+
+
+profiler = Profiler()
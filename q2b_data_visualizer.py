@@ -1,14 +1,41 @@
 import os
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from datetime import datetime as dt, timedelta
+from datetime import datetime as dt
+from profiling import profiler
+from regime_detector import RegimeDetector
+from rollup_cube import RollupCube
+
+
+def load_pyplot():
+    # matplotlib (and its font cache) is loaded on the first plot only. The
+    # graphs are only ever saved to files, so the non-interactive Agg backend
+    # is enough.
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
 
 
 class Q2BDataVisualizer:
     def __init__(self, input_dir):
         self.input_dir = input_dir
+        self.rollup_report = None
+        self.rollup_cube = None
+
+    def rollups(self, report):
+        # One cube per report, shared by every plot that summarizes a window.
+        if self.rollup_report is not report:
+            self.rollup_cube = RollupCube(
+                report["daily_statistics"]["articles_per_day"]
+            )
+            self.rollup_report = report
+        return self.rollup_cube
 
     def create_visualizations(self, report):
+        profiler.set_output_dir(self.input_dir)
+        with profiler.stage("load_pyplot"):
+            plt = load_pyplot()
         print("\nCreating visualizations...")
 
         graphs_dir = os.path.join(self.input_dir, "graphs")
@@ -20,10 +47,14 @@ class Q2BDataVisualizer:
         self.plot_daily_articles(report, graphs_dir, colors)
         self.plot_daily_timeline(report, graphs_dir, colors)
         self.plot_stats_summary(report, graphs_dir, colors)
+        if report.get("topics"):
+            self.plot_topic_mix(report, graphs_dir)
 
         print(f"Graphs saved in: {graphs_dir}")
 
+    @profiler.profiled("plot_daily_articles")
     def plot_daily_articles(self, report, output_dir, colors):
+        plt = load_pyplot()
         daily_data = report["daily_statistics"]["articles_per_day"]
 
         if not daily_data:
@@ -39,15 +70,25 @@ class Q2BDataVisualizer:
 
         valid_dates = [d for d in dates if d != earliest and d != latest]
 
-        regime_change_idx = None
-        regime_change_date = None
-        threshold = 4000
+        regimes = report.get("regimes")
+        if regimes is None:
+            regimes = RegimeDetector().detect(
+                {d: daily_data[d] for d in valid_dates if d != "UNKNOWN_DATE"}
+            )
+        segments = regimes["segments"] if len(regimes["segments"]) > 1 else []
 
-        for i, date in enumerate(valid_dates):
-            if daily_data[date] >= threshold:
-                regime_change_date = date
-                regime_change_idx = dates.index(date)
-                break
+        regime_change_date = regimes["main_change_date"]
+        regime_change_idx = None
+        main_change = None
+        if regime_change_date in dates:
+            regime_change_idx = dates.index(regime_change_date)
+            main_change = next(
+                cp
+                for cp in regimes["change_points"]
+                if cp["date"] == regime_change_date
+            )
+        else:
+            regime_change_date = None
 
         peak_date = max(daily_data, key=daily_data.get)
         peak_count = daily_data[peak_date]
@@ -57,21 +98,10 @@ class Q2BDataVisualizer:
         phase2_avg = None
         percentage_increase = None
 
-        if regime_change_date:
-            phase1_dates = [d for d in valid_dates if d < regime_change_date]
-            if phase1_dates:
-                phase1_avg = sum(daily_data[d] for d in phase1_dates) / len(
-                    phase1_dates
-                )
-
-            phase2_dates = [d for d in valid_dates if d >= regime_change_date]
-            if phase2_dates:
-                phase2_avg = sum(daily_data[d] for d in phase2_dates) / len(
-                    phase2_dates
-                )
-
-            if phase1_avg and phase2_avg and phase1_avg > 0:
-                percentage_increase = ((phase2_avg - phase1_avg) / phase1_avg) * 100
+        if main_change:
+            phase1_avg = main_change["before_mean"]
+            phase2_avg = main_change["after_mean"]
+            percentage_increase = main_change["change_pct"]
 
         bar_colors = []
         for date in dates:
@@ -147,39 +177,43 @@ class Q2BDataVisualizer:
             zorder=5,
         )
 
-        if phase1_avg and phase2_avg:
-            ax.hlines(
-                y=phase1_avg,
-                xmin=-0.5,
-                xmax=regime_change_idx - 0.5,
-                color="blue",
-                linestyle="--",
-                linewidth=2,
-                label=f"Phase 1 avg: {phase1_avg:,.0f} articles/day",
-                alpha=0.7,
-            )
+        if segments:
+            for i, segment in enumerate(segments):
+                if segment["start"] not in dates or segment["end"] not in dates:
+                    continue
+                ax.hlines(
+                    y=segment["mean"],
+                    xmin=dates.index(segment["start"]) - 0.5,
+                    xmax=dates.index(segment["end"]) + 0.5,
+                    color="blue" if i % 2 == 0 else "green",
+                    linestyle="--",
+                    linewidth=2,
+                    label=f"Regime {i + 1} avg: {segment['mean']:,.0f} articles/day ({segment['start']} → {segment['end']})",
+                    alpha=0.7,
+                )
 
-            ax.hlines(
-                y=phase2_avg,
-                xmin=regime_change_idx - 0.5,
-                xmax=len(dates) - 0.5,
-                color="green",
-                linestyle="--",
-                linewidth=2,
-                label=f"Phase 2 avg: {phase2_avg:,.0f} articles/day",
-                alpha=0.7,
-            )
+            for change_point in regimes["change_points"]:
+                if change_point is main_change or change_point["date"] not in dates:
+                    continue
+                ax.axvline(
+                    x=dates.index(change_point["date"]),
+                    color="red",
+                    linestyle=":",
+                    linewidth=1.5,
+                    alpha=0.4,
+                )
 
-            ax.axvline(
-                x=regime_change_idx,
-                color="red",
-                linestyle="-",
-                linewidth=3,
-                alpha=0.6,
-                label=f"Regime change: {regime_change_date}",
-            )
+            if main_change:
+                ax.axvline(
+                    x=regime_change_idx,
+                    color="red",
+                    linestyle="-",
+                    linewidth=3,
+                    alpha=0.6,
+                    label=f"Regime change: {regime_change_date} ({main_change['confidence']:.1%} confidence)",
+                )
 
-            if percentage_increase:
+            if percentage_increase and regime_change_idx is not None:
                 annotation_y = max(counts) * 0.70
                 ax.annotate(
                     f"📈 Scaling up: {phase1_avg:,.0f} → {phase2_avg:,.0f} articles/day\n(+{percentage_increase:.0f}%)",
@@ -250,7 +284,7 @@ class Q2BDataVisualizer:
 
         title_text = f'Q2BSTUDIO: Daily Article Production\n"Industrial-Scale Automated Content Generation"\nData Period: {date_range}{label_info}'
         if regime_change_date:
-            title_text += f"\nRegime Change: {regime_change_date} (First day ≥ {threshold:,} articles) | Peak: {peak_date} ({peak_count:,} articles)"
+            title_text += f"\nRegime Change: {regime_change_date} (Largest shift of {len(segments)} detected regimes) | Peak: {peak_date} ({peak_count:,} articles)"
         else:
             title_text += f"\nPeak: {peak_date} ({peak_count:,} articles)"
 
@@ -295,7 +329,11 @@ class Q2BDataVisualizer:
 
         print("Created: 1_daily_articles.png")
 
+    @profiler.profiled("plot_daily_timeline")
     def plot_daily_timeline(self, report, output_dir, colors):
+        import matplotlib.dates as mdates
+
+        plt = load_pyplot()
         daily_data = report["daily_statistics"]["articles_per_day"]
 
         if not daily_data:
@@ -397,41 +435,19 @@ class Q2BDataVisualizer:
 
         print("Created: 2_timeline.png")
 
+    @profiler.profiled("plot_stats_summary")
     def plot_stats_summary(self, report, output_dir, colors):
+        plt = load_pyplot()
 
-        daily_data = report["daily_statistics"]["articles_per_day"]
-        valid_data = {k: v for k, v in daily_data.items() if k != "UNKNOWN_DATE"}
-
-        last_4_weeks_data = {}
-        last_4_weeks_total = 0
-        last_4_weeks_peak = 0
-
-        if valid_data:
-            try:
-                latest_date_str = max(valid_data.keys())
-                latest_date = dt.strptime(latest_date_str, "%Y-%m-%d")
-                four_weeks_ago = latest_date - timedelta(days=28)
-
-                for date_str, count in valid_data.items():
-                    date_obj = dt.strptime(date_str, "%Y-%m-%d")
-                    if date_obj >= four_weeks_ago:
-                        last_4_weeks_data[date_str] = count
-                        last_4_weeks_total += count
-                        if count > last_4_weeks_peak:
-                            last_4_weeks_peak = count
-            except:
-                last_4_weeks_data = valid_data
-                last_4_weeks_total = sum(valid_data.values())
-                last_4_weeks_peak = max(valid_data.values()) if valid_data else 0
-
-        num_days = len(last_4_weeks_data)
-        last_4_weeks_avg = last_4_weeks_total / num_days if num_days > 0 else 0
-
-        if last_4_weeks_data:
-            earliest_4w = min(last_4_weeks_data.keys())
-            latest_4w = max(last_4_weeks_data.keys())
-            date_range_4w = f"{earliest_4w} to {latest_4w}"
+        last_4_weeks = self.rollups(report).trailing(28)
+
+        if last_4_weeks:
+            last_4_weeks_total = last_4_weeks["total"]
+            last_4_weeks_avg = last_4_weeks["mean"]
+            last_4_weeks_peak = last_4_weeks["peak"]
+            date_range_4w = f"{last_4_weeks['start']} to {last_4_weeks['end']}"
         else:
+            last_4_weeks_total = last_4_weeks_avg = last_4_weeks_peak = 0
             date_range_4w = "No data"
 
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
@@ -579,3 +595,83 @@ class Q2BDataVisualizer:
         plt.close()
 
         print("Created: 3_stats_summary.png")
+
+    @profiler.profiled("plot_topic_mix")
+    def plot_topic_mix(self, report, output_dir, top=8):
+        import matplotlib.dates as mdates
+
+        plt = load_pyplot()
+        topics = report["topics"]
+        per_day = {
+            date: counts
+            for date, counts in topics["per_day"].items()
+            if date != "UNKNOWN_DATE" and sum(counts)
+        }
+        if not per_day:
+            print("No dated topic counts. Skipping 4_topic_mix.png")
+            return
+
+        valid_dates_str = sorted(per_day)
+        dates = [dt.strptime(d, "%Y-%m-%d") for d in valid_dates_str]
+        clusters = sorted(topics["clusters"], key=lambda c: c["size"], reverse=True)
+        shown = clusters[:top]
+
+        shares = []
+        for cluster in shown:
+            shares.append(
+                [
+                    per_day[d][cluster["id"]] / sum(per_day[d]) * 100
+                    for d in valid_dates_str
+                ]
+            )
+        labels = [", ".join(cluster["terms"][:3]) for cluster in shown]
+        if len(clusters) > top:
+            shares.append([100 - sum(day) for day in zip(*shares)])
+            labels.append(f"Other ({len(clusters) - top} topics)")
+
+        _, ax = plt.subplots(figsize=(14, 8))
+        palette = plt.get_cmap("tab10").colors
+        ax.stackplot(
+            dates,
+            shares,
+            labels=labels,
+            colors=[palette[i % len(palette)] for i in range(len(shares))],
+            alpha=0.85,
+        )
+
+        num_days = (dates[-1] - dates[0]).days
+        if num_days > 365 * 2:
+            ax.xaxis.set_major_locator(mdates.YearLocator())
+            ax.xaxis.set_major_formatter(mdates.DateFormatter("%Y"))
+        elif num_days > 90:
+            ax.xaxis.set_major_locator(mdates.MonthLocator())
+            ax.xaxis.set_major_formatter(mdates.DateFormatter("%b %Y"))
+        else:
+            ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+            ax.xaxis.set_major_formatter(mdates.DateFormatter("%b %d"))
+
+        if num_days:
+            ax.set_xlim(dates[0], dates[-1])
+        ax.set_ylim(0, 100)
+        ax.set_xlabel("Date", fontsize=14, fontweight="bold")
+        ax.set_ylabel("Share of Articles (%)", fontsize=14, fontweight="bold")
+        ax.set_title(
+            f"Topic Mix per Day: {topics['articles_clustered']:,} titles in "
+            f"{topics['num_topics']} topics\n{valid_dates_str[0]} to "
+            f"{valid_dates_str[-1]}",
+            fontsize=14,
+            fontweight="bold",
+            pad=20,
+        )
+        ax.legend(
+            fontsize=10, loc="upper left", bbox_to_anchor=(1.01, 1), frameon=True
+        )
+        plt.xticks(rotation=45, ha="right")
+
+        plt.tight_layout()
+        plt.savefig(
+            os.path.join(output_dir, "4_topic_mix.png"), dpi=300, bbox_inches="tight"
+        )
+        plt.close()
+
+        print("Created: 4_topic_mix.png")
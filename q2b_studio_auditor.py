@@ -1,38 +1,158 @@
 import time
-import requests
-from bs4 import BeautifulSoup
 import csv
-from datetime import datetime
+from datetime import date, datetime
 import json
 import os
+import sqlite3
+import threading
 from collections import defaultdict
-import locale
-
-try:
-    locale.setlocale(locale.LC_TIME, "es_ES.UTF-8")
-except:
-    try:
-        locale.setlocale(locale.LC_TIME, "Spanish_Spain.1252")
-    except:
-        print("Warning: Could not set Spanish locale")
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from article_ids import extract_article_id
+from checkpoint_io import (
+    COMPACT_SEPARATORS,
+    atomic_output,
+    atomic_write,
+    check_compression,
+    load_json_generation,
+    load_topics,
+    write_json_generation,
+)
+from checkpoint_writer import CheckpointWriter
+from crawl_metrics import CrawlMetrics
+from profiling import profiler
+from rate_limiter import RateLimiter
+from regime_detector import RegimeDetector
+from rollup_cube import RollupCube
+from title_deduplicator import (
+    FINGERPRINTS_FILE,
+    TitleDeduplicator,
+    append_fingerprints,
+)
+
+SPANISH_MONTHS = {
+    "enero": 1,
+    "febrero": 2,
+    "marzo": 3,
+    "abril": 4,
+    "mayo": 5,
+    "junio": 6,
+    "julio": 7,
+    "agosto": 8,
+    "septiembre": 9,
+    "setiembre": 9,
+    "octubre": 10,
+    "noviembre": 11,
+    "diciembre": 12,
+}
+
+ARTICLES_PER_PAGE_BUCKETS = (0, 1, 3, 5, 7, 8, 9, 12)
+BYTES_SAVED_BUCKETS = (0, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+LAST_PAGE_CACHE = "last_page_cache.json"
+LAST_PAGE_CACHE_MAX_AGE = 3600
+LAST_PAGE_RECHECK_EVERY = 1000
+LAST_PAGE_MAX_DOUBLINGS = 20
+
+ARTICLE_FIELDS = [
+    "url",
+    "title",
+    "date_raw",
+    "date_parsed",
+    "page_num",
+    "archive_url",
+    "body_sha256",
+    "sources",
+]
+
+
+def report_date_key(date_parsed):
+    return date_parsed if date_parsed != "UNKNOWN_DATE" else "9999-12-31"
+
+
+def daily_report(daily_stats):
+    # The report fields that depend only on the per-day counts, so a report
+    # can also be rebuilt from daily_summary.csv or a streaming count.
+    known_date_articles_per_day = {
+        date: count for date, count in daily_stats.items() if date != "UNKNOWN_DATE"
+    }
+    num_known_dates = len(known_date_articles_per_day)
+
+    average_per_day = (
+        sum(known_date_articles_per_day.values()) / num_known_dates
+        if num_known_dates > 0
+        else 0
+    )
+    max_per_day = (
+        max(known_date_articles_per_day.values()) if num_known_dates > 0 else 0
+    )
+    min_per_day = (
+        min(known_date_articles_per_day.values()) if num_known_dates > 0 else 0
+    )
+
+    complete_days = sorted(known_date_articles_per_day.keys())[1:-1]
+    regimes = RegimeDetector().detect(
+        {date: known_date_articles_per_day[date] for date in complete_days}
+    )
+
+    return {
+        "date_range": {
+            "earliest": min(daily_stats, key=report_date_key, default=None),
+            "latest": max(daily_stats, key=report_date_key, default=None),
+        },
+        "daily_statistics": {
+            "dates": num_known_dates,
+            "articles_per_day": dict(sorted(daily_stats.items())),
+            "average_per_day": average_per_day,
+            "max_per_day": max_per_day,
+            "min_per_day": min_per_day,
+        },
+        "regimes": regimes,
+        "rollups": RollupCube(known_date_articles_per_day).summary(),
+    }
 
 
 class Q2BStudioAuditor:
-    def __init__(self, create_output_dir=True):
-        self.base_url = "https://www.q2bstudio.com"
+    def __init__(
+        self,
+        create_output_dir=True,
+        metrics_port=None,
+        base_url="https://www.q2bstudio.com",
+        parser="stream",
+        request_interval=0.5,
+        compression=None,
+        search_index=False,
+        seen_audit=None,
+        history_db=None,
+    ):
+        self.base_url = base_url
+        self.compression = check_compression(compression)
+        self.parser = parser
         self.blog_url = f"{self.base_url}/blog-empresa-aplicaciones"
-        self.session = requests.Session()
-        self.session.headers.update(
-            {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
-                "Referer": "https://www.google.com/",
-                "DNT": "1",
-            }
-        )
+        self._session = None
+        self._session_lock = threading.Lock()
+        self.rate_limiter = RateLimiter(min_interval=request_interval)
+        self.metrics = CrawlMetrics(filename="crawl_metrics.json")
+        if metrics_port:
+            self.metrics.serve(metrics_port)
         self.articles = {}
+        self.articles_lock = threading.Lock()
         self.articles_by_date = defaultdict(list)
+        self.title_index = TitleDeduplicator()
+        self.url_duplicates = 0
+        self.checkpoint_writer = None
+        self.max_page = None
+        self.build_search_index = search_index
+        self.search_index = None
+        # seen_audit turns on delta mode: articles already in that audit's
+        # seen set are counted but not collected again.
+        self.seen_audit = seen_audit
+        self.seen_set = None
+        self.seen_set_backfill = False
+        self.new_seen_urls = []
+        self.already_seen = 0
+        # Where record_history() appends each run; None leaves it off.
+        self.history_db = history_db
 
         if create_output_dir:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -42,38 +162,261 @@ class Q2BStudioAuditor:
         else:
             self.output_dir = None
 
+    @property
+    def session(self):
+        # requests is only imported once something is actually fetched.
+        with self._session_lock:
+            if self._session is None:
+                import requests
+
+                self._session = requests.Session()
+                self._session.headers.update(
+                    {
+                        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+                        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+                        "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
+                        "Referer": "https://www.google.com/",
+                        "DNT": "1",
+                    }
+                )
+            return self._session
+
+    def fetch(self, url, endpoint, timeout=15):
+        with profiler.stage("fetch"), self.metrics.timer(
+            "request_seconds", endpoint=endpoint
+        ):
+            response = self.session.get(url, timeout=timeout)
+        self.metrics.inc(
+            "requests_total", endpoint=endpoint, status=response.status_code
+        )
+        self.metrics.inc(
+            "bytes_downloaded_total", len(response.content), endpoint=endpoint
+        )
+        return response
+
+    def fetch_listing(self, url, want_items=True, timeout=15):
+        # Listing pages are streamed through an incremental parser and the
+        # connection is closed as soon as the pagination nav has been read,
+        # so the footer and everything after it is never downloaded.
+        from listing_parser import ListingParser, stream_listing
+
+        # Streamed pages are parsed while they download, so in this mode the
+        # parser's frames show up under the fetch stage of a profile.
+        listing = ListingParser(want_items=want_items)
+        with profiler.stage("fetch"), self.metrics.timer(
+            "request_seconds", endpoint="listing"
+        ):
+            response = self.session.get(url, timeout=timeout, stream=True)
+            listing.status_code = response.status_code
+            self.metrics.inc(
+                "requests_total", endpoint="listing", status=response.status_code
+            )
+            bytes_read, bytes_saved = stream_listing(response, listing)
+
+        self.metrics.inc("bytes_downloaded_total", bytes_read, endpoint="listing")
+        if listing.done:
+            self.metrics.inc("early_closes_total", endpoint="listing")
+        if bytes_saved is None:
+            # Closed early on a chunked response: the bytes skipped are not
+            # known, so the page is counted here rather than as 0 saved.
+            self.metrics.inc("bytes_saved_unknown_total", endpoint="listing")
+        else:
+            self.metrics.inc("bytes_saved_total", bytes_saved, endpoint="listing")
+            self.metrics.observe(
+                "bytes_saved_per_page", bytes_saved, buckets=BYTES_SAVED_BUCKETS
+            )
+        return listing
+
     def get_max_page_number(self):
+        from listing_parser import PAGINATION_LABEL, max_page_from_links
+
         print("\nGetting maximum page number...")
 
         try:
-            response = self.session.get(self.blog_url, timeout=15)
-            soup = BeautifulSoup(response.content, "html.parser")
+            if self.parser == "stream":
+                listing = self.fetch_listing(self.blog_url, want_items=False)
+                page_links = listing.page_links if listing.pagination_seen else None
+            else:
+                from bs4 import BeautifulSoup
+
+                response = self.fetch(self.blog_url, "listing")
+                soup = BeautifulSoup(response.content, self.parser)
+                pagination = soup.find("nav", {"aria-label": PAGINATION_LABEL})
+                page_links = (
+                    [
+                        link.get("href", "")
+                        for link in pagination.find_all("a", class_="page-link")
+                    ]
+                    if pagination
+                    else None
+                )
 
-            pagination = soup.find("nav", {"aria-label": "Page navigation example"})
-            if not pagination:
+            if page_links is None:
                 print("Could not find pagination")
                 return None
 
-            page_links = pagination.find_all("a", class_="page-link")
-
-            max_page = 1
-            for link in page_links:
-                href = link.get("href", "")
-                if "/page/" in href:
-                    try:
-                        page_num = int(href.split("/page/")[-1])
-                        if page_num > max_page:
-                            max_page = page_num
-                    except:
-                        continue
-
+            max_page = max_page_from_links(page_links)
             print(f"Maximum page number: {max_page:,}")
             return max_page
 
         except Exception as e:
             print(f"Error getting max page: {e}")
+            self.metrics.inc(
+                "errors_total", stage="get_max_page_number", type=type(e).__name__
+            )
             return None
 
+    def listing_items(self, url):
+        # Returns the raw items and when parsing started; streamed pages are
+        # parsed while they download, so only the field cleanup is left.
+        # Server errors raise, so an error page is never mistaken for a page
+        # past the end of the blog.
+        if self.parser == "stream":
+            listing = self.fetch_listing(url)
+            if listing.status_code >= 500:
+                raise RuntimeError(f"HTTP {listing.status_code} for {url}")
+            return listing.items, time.perf_counter()
+
+        from bs4 import BeautifulSoup
+        from listing_parser import soup_items
+
+        response = self.fetch(url, "listing")
+        if response.status_code >= 500:
+            raise RuntimeError(f"HTTP {response.status_code} for {url}")
+        parse_start = time.perf_counter()
+        with profiler.stage("parse"):
+            items = soup_items(BeautifulSoup(response.content, self.parser))
+        return items, parse_start
+
+    def page_url(self, page_num):
+        return f"{self.blog_url}/page/{page_num}" if page_num > 1 else self.blog_url
+
+    def page_article_urls(self, page_num, attempts=3):
+        # The article URLs listed on a page; empty past the end of the blog.
+        for attempt in range(attempts):
+            self.rate_limiter.wait()
+            self.metrics.inc("last_page_probes_total")
+            try:
+                items, _ = self.listing_items(self.page_url(page_num))
+                return frozenset(item["href"] for item in items if item.get("href"))
+            except Exception:
+                if attempt == attempts - 1:
+                    raise
+
+    def probe_last_page(self, known_page, max_doublings=LAST_PAGE_MAX_DOUBLINGS):
+        # Pages are newest first and only the last one is partly filled, so
+        # "has articles" flips exactly once. Gallop past the known page with
+        # doubling steps until one is empty, then binary search the boundary:
+        # O(log N) requests however far the site has grown.
+        # A site that clamps out-of-range page numbers (serving or redirecting
+        # to the last page) never returns an empty page. Two gallop probes
+        # listing the same articles give that away; from then on a page
+        # listing them counts as past the end, and the answer is the first
+        # such page rather than the last page before it.
+        clamped = None
+        urls = self.page_article_urls(known_page)
+        if known_page > 1 and not urls:
+            low, high = 1, known_page
+        else:
+            # previous is the page probed before low; 0 stands for "none".
+            previous, low, step = 0, known_page, 1
+            high = low + step
+            for _ in range(max_doublings):
+                high_urls = self.page_article_urls(high)
+                if high_urls and high_urls == urls:
+                    clamped = urls
+                    low, high = previous, low
+                    break
+                if not high_urls:
+                    break
+                previous, low, urls = low, high, high_urls
+                step *= 2
+                high = low + step
+            else:
+                raise RuntimeError(
+                    f"No end found {max_doublings} doublings past page {known_page}"
+                )
+
+        while high - low > 1:
+            middle = (low + high) // 2
+            middle_urls = self.page_article_urls(middle)
+            if middle_urls and middle_urls != clamped:
+                low = middle
+            else:
+                high = middle
+        if clamped is not None:
+            self.metrics.inc("last_page_clamped_total")
+            return high
+        return low
+
+    def read_last_page_cache(self, cache_dir):
+        cache_file = os.path.join(cache_dir, LAST_PAGE_CACHE)
+        if not os.path.exists(cache_file):
+            return None
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            checked_at = datetime.fromisoformat(cache["checked_at"])
+        except (OSError, ValueError, KeyError):
+            return None
+        cache["age_seconds"] = (datetime.now() - checked_at).total_seconds()
+        return cache
+
+    def write_last_page_cache(self, cache_dir, last_page, advertised=None):
+        cache = {"last_page": last_page, "checked_at": datetime.now().isoformat()}
+        if advertised:
+            cache["advertised_max_page"] = advertised
+        with atomic_write(os.path.join(cache_dir, LAST_PAGE_CACHE)) as f:
+            json.dump(cache, f, indent=2)
+
+    def find_last_page(self, cache_dir=None, max_age=LAST_PAGE_CACHE_MAX_AGE):
+        # The pagination widget only advertises what the first page links
+        # to, which can lag behind the real last page; it is used as the
+        # starting point for the probe.
+        cache_dir = cache_dir or self.output_dir
+        cache = self.read_last_page_cache(cache_dir) if cache_dir else None
+        if cache and cache["age_seconds"] < max_age:
+            print(
+                f"Last page: {cache['last_page']:,} "
+                f"(cached {cache['age_seconds'] / 60:.0f} min ago)"
+            )
+            return cache["last_page"]
+
+        advertised = self.get_max_page_number()
+        if not advertised:
+            return None
+
+        try:
+            last_page = self.probe_last_page(advertised)
+        except Exception as e:
+            print(f"Error probing last page, using advertised maximum: {e}")
+            self.metrics.inc(
+                "errors_total", stage="probe_last_page", type=type(e).__name__
+            )
+            return advertised
+
+        if last_page != advertised:
+            print(f"Probed last page: {last_page:,} (advertised {advertised:,})")
+        if cache_dir:
+            self.write_last_page_cache(cache_dir, last_page, advertised)
+        return last_page
+
+    def recheck_last_page(self, known_page):
+        try:
+            last_page = self.probe_last_page(known_page)
+        except Exception as e:
+            print(f"Error re-checking last page: {e}")
+            self.metrics.inc(
+                "errors_total", stage="probe_last_page", type=type(e).__name__
+            )
+            return known_page
+
+        if self.output_dir:
+            self.write_last_page_cache(self.output_dir, last_page)
+        if last_page > known_page:
+            print(f"\nLast page moved from {known_page:,} to {last_page:,}")
+        return max(last_page, known_page)
+
     def parse_spanish_date(self, date_str: str):
         try:
             date_parts = date_str.split(",", 1)
@@ -82,230 +425,511 @@ class Q2BStudioAuditor:
             else:
                 clean_date = date_str.strip()
 
-            date_obj = datetime.strptime(clean_date, "%d de %B de %Y")
-            return date_obj.strftime("%Y-%m-%d")
+            # Month names are mapped directly instead of relying on a Spanish
+            # LC_TIME locale, which is process-global and often not installed.
+            day, month_name, year = clean_date.lower().split(" de ")
+            date_obj = date(int(year), SPANISH_MONTHS[month_name.strip()], int(day))
+            return date_obj.isoformat()
         except Exception as e:
             print(f"Could not parse date '{date_str}': {e}")
             return "UNKNOWN_DATE"
 
-    def scrape_page(self, page_num):
-        url = f"{self.blog_url}/page/{page_num}" if page_num > 1 else self.blog_url
-        articles_on_page = []
-
+    def parse_item(self, item, page_num):
         try:
-            response = self.session.get(url, timeout=15)
-            soup = BeautifulSoup(response.content, "html.parser")
-            article_items = soup.find_all("div", class_="item-new")
-
-            for item in article_items:
-                try:
-                    link_elem = item.find("a", href=True)
-                    if not link_elem:
-                        continue
-
-                    article_url = self.base_url + link_elem["href"]
-                    title_elem = item.find("div", class_="title")
-                    title = title_elem.get_text().strip() if title_elem else "N/A"
-                    tags_elem = item.find("div", class_="tags")
-                    date_str = "N/A"
-                    if tags_elem:
-                        inner = tags_elem.find("div", class_="inner")
-                        if inner:
-                            text = inner.get_text().strip()
-                            if "|" in text:
-                                date_str = text.split("|")[1].strip()
-
-                    parsed_date = self.parse_spanish_date(date_str)
-
-                    article_data = {
-                        "url": article_url,
-                        "title": title,
-                        "date_raw": date_str,
-                        "date_parsed": parsed_date,
-                        "page_num": page_num,
-                    }
+            if not item.get("href"):
+                return None
 
-                    articles_on_page.append(article_data)
+            article_url = self.base_url + item["href"]
+            title = item["title"].strip() if "title" in item else "N/A"
+            date_str = "N/A"
+            text = item.get("tags", "").strip()
+            if "|" in text:
+                date_str = text.split("|")[1].strip()
+
+            parsed_date = self.parse_spanish_date(date_str)
+
+            return {
+                "url": article_url,
+                "title": title,
+                "date_raw": date_str,
+                "date_parsed": parsed_date,
+                "page_num": page_num,
+            }
+
+        except Exception as e:
+            print(f"Error parsing article: {e}")
+            self.metrics.inc(
+                "errors_total", stage="parse_article", type=type(e).__name__
+            )
+            return None
 
-                except Exception as e:
-                    print(f"Error parsing article: {e}")
-                    continue
+    def scrape_page(self, page_num, raise_errors=False):
+        # Errors are logged and give an empty page unless raise_errors is set,
+        # for callers that must tell a failed fetch from a page with nothing.
+        articles_on_page = []
 
+        try:
+            items, parse_start = self.listing_items(self.page_url(page_num))
+
+            with profiler.stage("parse"):
+                for item in items:
+                    article_data = self.parse_item(item, page_num)
+                    if article_data is not None:
+                        articles_on_page.append(article_data)
+
+            self.metrics.observe("parse_seconds", time.perf_counter() - parse_start)
+            self.metrics.observe(
+                "articles_per_page",
+                len(articles_on_page),
+                buckets=ARTICLES_PER_PAGE_BUCKETS,
+            )
             return articles_on_page
 
         except Exception as e:
             print(f"Error scraping page {page_num}: {e}")
+            self.metrics.inc("errors_total", stage="scrape_page", type=type(e).__name__)
+            if raise_errors:
+                raise
             return []
 
-    def scrape_all_pages(self, max_page, start_page=1, sample_every=1):
+    def scrape_all_pages(
+        self,
+        max_page,
+        start_page=1,
+        sample_every=1,
+        workers=1,
+        recheck_every=LAST_PAGE_RECHECK_EVERY,
+        stop_after_seen_pages=3,
+    ):
         print(f"\nStarting scraping...")
         print(f"Pages to scrape: {start_page} to {max_page}")
         print(f"Sampling: every {sample_every} page(s)")
+        print(f"Workers: {workers}")
+        if recheck_every:
+            print(f"Re-checking the last page every {recheck_every:,} pages")
+        if self.seen_audit:
+            print(f"Delta mode: skipping articles already seen in {self.seen_audit}")
         print("-" * 60)
 
-        total_pages = ((max_page - start_page) // sample_every) + 1
+        self.max_page = max_page
+        page_numbers = self.iter_page_numbers(start_page, sample_every, recheck_every)
         scraped = 0
+        seen_pages = 0
 
-        for page_num in range(start_page, max_page + 1, sample_every):
-            scraped += 1
-            print(f"\n[{scraped}/{total_pages}] - Scraping page {page_num:,}...")
-
-            articles_on_page = self.scrape_page(page_num)
-
-            if articles_on_page:
-                print(f"Found {len(articles_on_page)} articles")
-                for article in articles_on_page:
-                    self.articles[article["url"]] = article
-            else:
-                print(f"No articles found")
-
-            time.sleep(0.5)
-
-            if scraped % 100 == 0:
-                print(
-                    f"\nProgress: {scraped}/{total_pages} pages scraped, "
-                    f"{len(self.articles):,} articles collected"
-                )
-                self.save_checkpoint()
+        try:
+            for page_num, articles_on_page in self.iter_scraped_pages(
+                page_numbers, workers
+            ):
+                scraped += 1
+                total_pages = ((self.max_page - start_page) // sample_every) + 1
+                print(f"\n[{scraped}/{total_pages}] - Scraped page {page_num:,}")
+
+                if articles_on_page:
+                    print(f"Found {len(articles_on_page)} articles")
+                    already_seen = self.already_seen
+                    for article in articles_on_page:
+                        self.add_article(article)
+                    if self.already_seen - already_seen == len(articles_on_page):
+                        seen_pages += 1
+                    else:
+                        seen_pages = 0
+                else:
+                    print(f"No articles found")
+
+                self.metrics.inc("pages_scraped_total")
+                self.metrics.maybe_flush(self.output_dir)
+
+                if scraped % 100 == 0:
+                    print(
+                        f"\nProgress: {scraped}/{total_pages} pages scraped, "
+                        f"{len(self.articles):,} articles collected"
+                    )
+                    self.request_checkpoint()
+
+                # Pages are newest first: once several pages in a row hold
+                # nothing new, the rest of the site was seen by earlier runs.
+                if self.seen_audit and seen_pages >= stop_after_seen_pages:
+                    print(
+                        f"\n{seen_pages} pages in a row already seen, "
+                        f"stopping delta crawl"
+                    )
+                    break
+        finally:
+            # Also runs on Ctrl+C, so whatever was scraped since the last
+            # background write still reaches disk.
+            self.finish_checkpoints()
 
         print(f"\nScraping complete!")
         print(f"Total articles collected: {len(self.articles):,}")
+        if self.seen_audit:
+            print(
+                f"Already seen: {self.already_seen:,} "
+                f"(Bloom filter false positives: {self.seen_set.false_positives:,})"
+            )
 
         self.rebuild_articles_by_date()
+        self.metrics.flush(self.output_dir)
+
+    def iter_page_numbers(self, start_page, sample_every=1, recheck_every=0):
+        # The site keeps publishing during a crawl, pushing older articles
+        # onto new pages at the end. The last page is re-probed every
+        # recheck_every pages and once more on reaching it, and the range is
+        # extended as long as it keeps growing. The generator runs on the
+        # calling thread, so self.max_page needs no lock.
+        page_num = start_page
+        since_check = 0
+        while True:
+            if recheck_every and (
+                since_check >= recheck_every or page_num > self.max_page
+            ):
+                since_check = 0
+                known_page = self.max_page
+                self.max_page = self.recheck_last_page(known_page)
+                if page_num > known_page and self.max_page == known_page:
+                    return
+            if page_num > self.max_page:
+                return
+            yield page_num
+            page_num += sample_every
+            since_check += 1
+
+    def rate_limited_scrape(self, page_num):
+        self.rate_limiter.wait()
+        return self.scrape_page(page_num)
+
+    def iter_scraped_pages(self, page_numbers, workers=1):
+        if workers <= 1:
+            for page_num in page_numbers:
+                yield page_num, self.rate_limited_scrape(page_num)
+            return
+
+        # Pages are fetched on a thread pool but results are yielded (and
+        # merged into self.articles) on the calling thread only. At most
+        # workers * 2 pages are in flight at once.
+        pages = iter(page_numbers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            in_flight = {}
+            for page_num in pages:
+                in_flight[executor.submit(self.rate_limited_scrape, page_num)] = (
+                    page_num
+                )
+                if len(in_flight) >= workers * 2:
+                    break
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page_num = in_flight.pop(future)
+                    yield page_num, future.result()
+
+                    next_page = next(pages, None)
+                    if next_page is not None:
+                        future = executor.submit(self.rate_limited_scrape, next_page)
+                        in_flight[future] = next_page
+
+    def add_article(self, article):
+        if self.seen_audit and self.is_seen(article["url"]):
+            self.already_seen += 1
+            self.metrics.inc("already_seen_total")
+            return
+
+        with self.articles_lock:
+            duplicate = article["url"] in self.articles
+            if duplicate:
+                self.url_duplicates += 1
+            else:
+                self.title_index.add(article["url"], article["title"])
+                self.new_seen_urls.append(article["url"])
+            self.articles[article["url"]] = article
+
+        if duplicate:
+            self.metrics.inc("url_duplicates_total")
+        if self.build_search_index:
+            self.index_for_search(article)
+
+    def index_for_search(self, article):
+        if self.search_index is None:
+            from title_search import TitleSearchIndex
+
+            self.search_index = TitleSearchIndex(self.output_dir)
+            # A resumed crawl starts with articles the index may not have.
+            if self.search_index.count() < len(self.articles) - 1:
+                for existing in list(self.articles.values()):
+                    self.search_index.add(
+                        existing["url"],
+                        existing["title"],
+                        existing["date_parsed"],
+                        existing["page_num"],
+                    )
+        self.search_index.add(
+            article["url"],
+            article["title"],
+            article["date_parsed"],
+            article["page_num"],
+        )
 
-        self.save_checkpoint()
+    def get_seen_set(self):
+        from seen_set import SeenSet, open_seen_set
+
+        with self.articles_lock:
+            if self.seen_set is None and self.seen_audit:
+                self.seen_set = open_seen_set(self.seen_audit)
+            elif self.seen_set is None:
+                self.seen_set = SeenSet(self.output_dir)
+                self.seen_set_backfill = True
+            return self.seen_set
+
+    def is_seen(self, url):
+        from seen_set import article_key
+
+        return self.get_seen_set().contains(article_key(url))
+
+    def update_seen_set(self, articles):
+        # An audit's seen set covers everything seen so far, including the
+        # history a delta run started from, so daily runs can be chained.
+        from seen_set import article_key
+
+        seen_set = self.get_seen_set()
+        with self.articles_lock:
+            urls, self.new_seen_urls = self.new_seen_urls, []
+            if self.seen_set_backfill:
+                # A resumed audit may hold articles from before the seen set.
+                self.seen_set_backfill = False
+                urls = [article["url"] for article in articles]
+        seen_set.update(article_key(url) for url in urls)
+        seen_set.save(self.output_dir)
+
+    def snapshot_articles(self):
+        # Copies are taken under the lock so a checkpoint is a consistent view
+        # even while other threads keep inserting or updating articles.
+        with self.articles_lock:
+            articles = [dict(article) for article in self.articles.values()]
+            return articles, self.url_duplicates
+
+    def sync_title_index(self, articles):
+        # After a checkpoint is loaded the index is rebuilt from the snapshot,
+        # off the lock so the crawl keeps adding articles meanwhile. Saved
+        # fingerprints are replayed rather than recomputed; articles that
+        # came in during the rebuild are added under the lock at the end.
+        with self.articles_lock:
+            if self.title_index.indexed >= len(articles):
+                return
+        print("Building title near-duplicate index...")
+        index = TitleDeduplicator(capacity=len(articles))
+        replayed = 0
+        if self.output_dir:
+            path = os.path.join(self.output_dir, FINGERPRINTS_FILE)
+            replayed = index.replay(path, articles)
+        for article in articles[replayed:]:
+            index.add(article["url"], article["title"])
+        with self.articles_lock:
+            for article in islice(self.articles.values(), len(articles), None):
+                index.add(article["url"], article["title"])
+            self.title_index = index
+        print(
+            f"Title index: {replayed:,} articles replayed, "
+            f"{len(articles) - replayed:,} hashed"
+        )
+
+    def save_title_index(self):
+        # Only an index that covers every article, in order, matches the file.
+        with self.articles_lock:
+            if self.title_index.indexed != len(self.articles):
+                return
+            start, records = self.title_index.take_records()
+            record_size = self.title_index.record_size
+        path = os.path.join(self.output_dir, FINGERPRINTS_FILE)
+        append_fingerprints(path, start, records, record_size)
 
     def rebuild_articles_by_date(self):
         self.articles_by_date = defaultdict(list)
         for article in self.articles.values():
             self.articles_by_date[article["date_parsed"]].append(article)
 
-    def save_checkpoint(self):
-        print(f"Saving checkpoint ({len(self.articles):,} articles)...")
+    def request_checkpoint(self):
+        # Checkpoints are written on a background thread so the crawl keeps
+        # going while JSON, CSV and the report are serialized.
+        if self.checkpoint_writer is None:
+            self.checkpoint_writer = CheckpointWriter(self.save_checkpoint)
+        if self.checkpoint_writer.request():
+            self.metrics.inc("checkpoints_coalesced_total")
+
+    def finish_checkpoints(self):
+        # The final save below snapshots the latest state, so a background
+        # write still waiting to start would only write it twice.
+        if self.checkpoint_writer is not None:
+            if self.checkpoint_writer.close(drop_pending=True):
+                self.metrics.inc("checkpoints_coalesced_total")
+            self.checkpoint_writer = None
+        self.save_checkpoint()
+        if self.search_index is not None:
+            self.search_index.close()
+            self.search_index = None
 
-        checkpoint_file = os.path.join(self.output_dir, "checkpoint.json")
-        with open(checkpoint_file, "w", encoding="utf-8") as f:
-            json.dump(
+    @profiler.profiled("checkpoint")
+    def save_checkpoint(self):
+        if self.search_index is not None:
+            with self.metrics.timer("checkpoint_write_seconds", file="title_index.db"):
+                self.search_index.flush()
+        articles, url_duplicates = self.snapshot_articles()
+        print(f"Saving checkpoint ({len(articles):,} articles)...")
+        checkpoint_start = time.perf_counter()
+
+        with self.metrics.timer("checkpoint_write_seconds", file="checkpoint.json"):
+            write_json_generation(
+                self.output_dir,
+                "checkpoint.json",
                 {
                     "timestamp": datetime.now().isoformat(),
-                    "articles_count": len(self.articles),
-                    "articles": list(self.articles.values()),
+                    "articles_count": len(articles),
+                    "url_duplicates": url_duplicates,
+                    # Marks a delta audit, which only holds the new articles.
+                    "since_audit": self.seen_audit,
+                    "articles": articles,
                 },
-                f,
-                indent=2,
+                compression=self.compression,
+                separators=COMPACT_SEPARATORS,
                 ensure_ascii=False,
             )
 
-        csv_file = os.path.join(self.output_dir, "articles.csv")
-        with open(csv_file, "w", newline="", encoding="utf-8") as f:
-            fieldnames = [
-                "url",
-                "title",
-                "date_raw",
-                "date_parsed",
-                "page_num",
-                "archive_url",
-            ]
-            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
-            writer.writeheader()
-            writer.writerows(self.articles.values())
-
-        report = self.generate_report()
-        report_file = os.path.join(self.output_dir, "report.json")
-        with open(report_file, "w", encoding="utf-8") as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        with self.metrics.timer("checkpoint_write_seconds", file="articles.csv"):
+            with atomic_output(
+                self.output_dir, "articles.csv", self.compression, newline=""
+            ) as f:
+                writer = csv.DictWriter(
+                    f, fieldnames=ARTICLE_FIELDS, extrasaction="ignore"
+                )
+                writer.writeheader()
+                writer.writerows(articles)
 
-        daily_file = os.path.join(self.output_dir, "daily_summary.csv")
-        with open(daily_file, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["Date", "Article Count"])
-            for date in sorted(report["daily_statistics"]["articles_per_day"].keys()):
-                count = report["daily_statistics"]["articles_per_day"][date]
-                writer.writerow([date, count])
+        with self.metrics.timer("checkpoint_write_seconds", file="seen_ids.bin"):
+            self.update_seen_set(articles)
 
+        with self.metrics.timer("report_seconds"):
+            report = self.generate_report(articles, url_duplicates)
+        self.save_report(report)
+
+        self.metrics.observe(
+            "checkpoint_total_seconds", time.perf_counter() - checkpoint_start
+        )
+        self.metrics.flush(self.output_dir)
         print("Checkpoint saved: CSV, JSON, Report, Daily summary")
 
-    def generate_report(self):
-        print("\nGenerating report...")
-        all_unique_articles = list(self.articles.values())
+    def record_history(self, report):
+        # Called once per crawl or report run, not per checkpoint. A delta
+        # audit only counts the articles that were new to it, which would
+        # read as a drop for every day it shares with earlier runs.
+        if not self.history_db:
+            return
+        if self.seen_audit:
+            print(
+                "Delta audit: not recorded in the report history (its counts "
+                f"only cover articles new since {self.seen_audit})"
+            )
+            return
+        from report_history import ReportHistory
 
-        sorted_articles = sorted(
-            all_unique_articles,
-            key=lambda x: (
-                x["date_parsed"] if x["date_parsed"] != "UNKNOWN_DATE" else "9999-12-31"
-            ),
-        )
+        try:
+            history = ReportHistory(self.history_db)
+            try:
+                audit = os.path.basename(os.path.normpath(self.output_dir))
+                history.record(audit, report)
+            finally:
+                history.close()
+        except sqlite3.Error as e:
+            print(f"Could not update report history: {e}")
+            self.metrics.inc(
+                "errors_total", stage="report_history", type=type(e).__name__
+            )
+
+    @profiler.profiled("report")
+    def save_report(self, report):
+        profiler.set_output_dir(self.output_dir)
+        report_file = os.path.join(self.output_dir, "report.json")
+        with self.metrics.timer("checkpoint_write_seconds", file="report.json"):
+            with atomic_write(report_file) as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+
+        daily_file = os.path.join(self.output_dir, "daily_summary.csv")
+        with self.metrics.timer("checkpoint_write_seconds", file="daily_summary.csv"):
+            with atomic_write(daily_file, newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["Date", "Article Count"])
+                articles_per_day = report["daily_statistics"]["articles_per_day"]
+                for date in sorted(articles_per_day.keys()):
+                    writer.writerow([date, articles_per_day[date]])
+
+        with self.metrics.timer("checkpoint_write_seconds", file=FINGERPRINTS_FILE):
+            self.save_title_index()
+
+    @profiler.profiled("report")
+    def generate_report(self, articles=None, url_duplicates=None):
+        print("\nGenerating report...")
+        if articles is None:
+            articles, url_duplicates = self.snapshot_articles()
+        all_unique_articles = articles
 
         daily_stats = defaultdict(int)
 
         for article in all_unique_articles:
             daily_stats[article["date_parsed"]] += 1
 
-        known_date_articles_per_day = {
-            date: count for date, count in daily_stats.items() if date != "UNKNOWN_DATE"
-        }
-
         total_unique_articles = len(all_unique_articles)
-        num_known_dates = len(known_date_articles_per_day)
 
-        average_per_day = (
-            sum(known_date_articles_per_day.values()) / num_known_dates
-            if num_known_dates > 0
-            else 0
-        )
-        max_per_day = (
-            max(known_date_articles_per_day.values()) if num_known_dates > 0 else 0
-        )
-        min_per_day = (
-            min(known_date_articles_per_day.values()) if num_known_dates > 0 else 0
-        )
+        self.sync_title_index(articles)
+        with self.articles_lock:
+            near_duplicate_titles = self.title_index.summary()
+        initial_article_count = total_unique_articles + url_duplicates
 
         report = {
             "generated_at": datetime.now().isoformat(),
             "total_articles": total_unique_articles,
-            "date_range": {
-                "earliest": (
-                    sorted_articles[0]["date_parsed"] if sorted_articles else None
-                ),
-                "latest": (
-                    sorted_articles[-1]["date_parsed"] if sorted_articles else None
-                ),
-            },
-            "daily_statistics": {
-                "dates": num_known_dates,
-                "articles_per_day": dict(sorted(daily_stats.items())),
-                "average_per_day": average_per_day,
-                "max_per_day": max_per_day,
-                "min_per_day": min_per_day,
-            },
+            **daily_report(daily_stats),
             "cleaning_summary": {
-                "initial_article_count": total_unique_articles,
+                "initial_article_count": initial_article_count,
                 "final_article_count": total_unique_articles,
-                "duplicates_removed": 0,
-                "deduplication_rate": "0.00%",
+                "duplicates_removed": url_duplicates,
+                "deduplication_rate": (
+                    f"{url_duplicates / initial_article_count * 100:.2f}%"
+                    if initial_article_count
+                    else "0.00%"
+                ),
+                "near_duplicate_titles": near_duplicate_titles,
             },
         }
 
+        # Topic clustering is a separate pass (main.py topics); its latest
+        # result is carried into every report written afterwards.
+        if self.output_dir:
+            topics = load_topics(self.output_dir)
+            if topics:
+                report["topics"] = topics
+
         return report
 
+    @profiler.profiled("load")
     def load_checkpoint(self, checkpoint_dir):
         print(f"\nLoading checkpoint from: {checkpoint_dir}")
 
-        checkpoint_file = os.path.join(checkpoint_dir, "checkpoint.json")
-        if not os.path.exists(checkpoint_file):
-            print(f"No checkpoint.json found in {checkpoint_dir}")
-            return False
-
         try:
-            with open(checkpoint_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data, checkpoint_file = load_json_generation(
+                checkpoint_dir, "checkpoint.json"
+            )
+            if data is None:
+                print(f"No valid checkpoint found in {checkpoint_dir}")
+                return False
+            if checkpoint_file.startswith("checkpoint.prev"):
+                print(f"Recovered previous checkpoint generation: {checkpoint_file}")
 
             for article in data.get("articles", []):
                 self.articles[article["url"]] = article
+            self.url_duplicates = data.get("url_duplicates", 0)
+            self.seen_audit = self.seen_audit or data.get("since_audit")
 
             self.rebuild_articles_by_date()
 
             self.output_dir = checkpoint_dir
+            profiler.set_output_dir(checkpoint_dir)
 
             print(f"Loaded {len(self.articles):,} articles from checkpoint")
 
@@ -321,14 +945,7 @@ class Q2BStudioAuditor:
             return False
 
     def extract_article_id(self, url):
-        try:
-            parts = url.split("/")
-            for i, part in enumerate(parts):
-                if part == "nuestro-blog" and i + 1 < len(parts):
-                    return int(parts[i + 1])
-        except:
-            pass
-        return None
+        return extract_article_id(url)
 
     def get_min_article_id(self):
         min_id = float("inf")
@@ -0,0 +1,18 @@
+import threading
+import time
+
+
+class RateLimiter:
+    def __init__(self, min_interval=0.5):
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.min_interval
+
+        if delay > 0:
+            time.sleep(delay)
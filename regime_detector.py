@@ -0,0 +1,149 @@
+import math
+
+
+class RegimeDetector:
+    def __init__(self, min_segment_days=3, max_segments=6, penalty_factor=2.0):
+        self.min_segment_days = min_segment_days
+        self.max_segments = max_segments
+        self.penalty_factor = penalty_factor
+
+    def detect(self, articles_per_day):
+        dates = sorted(articles_per_day.keys())
+        values = [articles_per_day[d] for d in dates]
+        n = len(values)
+
+        if n < 2 * self.min_segment_days:
+            return self.build_result(dates, values, [0, n] if n else [])
+
+        prefix = [0.0] * (n + 1)
+        prefix_sq = [0.0] * (n + 1)
+        for i, value in enumerate(values):
+            prefix[i + 1] = prefix[i] + value
+            prefix_sq[i + 1] = prefix_sq[i] + value * value
+
+        sigma = self.estimate_noise(values)
+        penalty = self.penalty_factor * max(sigma, 1.0) ** 2 * math.log(n)
+
+        boundaries = [0, n]
+        candidates = {(0, n): self.best_split(prefix, prefix_sq, 0, n)}
+
+        # Binary segmentation: always split the segment with the largest cost
+        # reduction. Each new segment is scanned once via prefix sums.
+        while len(boundaries) - 1 < self.max_segments:
+            best = None
+            for segment, split in candidates.items():
+                if split and (best is None or split[1] > best[1][1]):
+                    best = (segment, split)
+
+            if not best or best[1][1] <= penalty:
+                break
+
+            (start, end), (split_idx, _) = best
+            del candidates[(start, end)]
+            for segment in ((start, split_idx), (split_idx, end)):
+                candidates[segment] = self.best_split(prefix, prefix_sq, *segment)
+            boundaries.append(split_idx)
+            boundaries.sort()
+
+        return self.build_result(dates, values, boundaries)
+
+    def segment_cost(self, prefix, prefix_sq, start, end):
+        length = end - start
+        if length <= 0:
+            return 0.0
+        total = prefix[end] - prefix[start]
+        return (prefix_sq[end] - prefix_sq[start]) - total * total / length
+
+    def best_split(self, prefix, prefix_sq, start, end):
+        min_len = self.min_segment_days
+        if end - start < 2 * min_len:
+            return None
+
+        full_cost = self.segment_cost(prefix, prefix_sq, start, end)
+        best_idx = None
+        best_gain = 0.0
+
+        for split_idx in range(start + min_len, end - min_len + 1):
+            gain = (
+                full_cost
+                - self.segment_cost(prefix, prefix_sq, start, split_idx)
+                - self.segment_cost(prefix, prefix_sq, split_idx, end)
+            )
+            if gain > best_gain:
+                best_gain = gain
+                best_idx = split_idx
+
+        if best_idx is None:
+            return None
+        return best_idx, best_gain
+
+    def estimate_noise(self, values):
+        diffs = sorted(abs(b - a) for a, b in zip(values, values[1:]))
+        if not diffs:
+            return 0.0
+        mid = len(diffs) // 2
+        median = diffs[mid] if len(diffs) % 2 else (diffs[mid - 1] + diffs[mid]) / 2
+        return median / (0.6745 * math.sqrt(2))
+
+    def build_result(self, dates, values, boundaries):
+        segments = []
+        for start, end in zip(boundaries, boundaries[1:]):
+            seg_values = values[start:end]
+            mean = sum(seg_values) / len(seg_values)
+            variance = (
+                sum((v - mean) ** 2 for v in seg_values) / (len(seg_values) - 1)
+                if len(seg_values) > 1
+                else 0.0
+            )
+            segments.append(
+                {
+                    "start": dates[start],
+                    "end": dates[end - 1],
+                    "days": len(seg_values),
+                    "total": sum(seg_values),
+                    "mean": mean,
+                    "std": math.sqrt(variance),
+                }
+            )
+
+        change_points = []
+        for before, after in zip(segments, segments[1:]):
+            change_pct = (
+                (after["mean"] - before["mean"]) / before["mean"] * 100
+                if before["mean"] > 0
+                else None
+            )
+            change_points.append(
+                {
+                    "date": after["start"],
+                    "before_mean": before["mean"],
+                    "after_mean": after["mean"],
+                    "change_pct": change_pct,
+                    "confidence": self.change_confidence(before, after),
+                }
+            )
+
+        main_change = max(
+            (cp for cp in change_points if cp["after_mean"] > cp["before_mean"]),
+            key=lambda cp: cp["after_mean"] - cp["before_mean"],
+            default=None,
+        )
+
+        return {
+            "method": "binary_segmentation",
+            "days_analyzed": len(values),
+            "segments": segments,
+            "change_points": change_points,
+            "main_change_date": main_change["date"] if main_change else None,
+        }
+
+    def change_confidence(self, before, after):
+        # Welch's t statistic with a normal approximation of the p-value.
+        std_err = math.sqrt(
+            before["std"] ** 2 / before["days"] + after["std"] ** 2 / after["days"]
+        )
+        diff = abs(after["mean"] - before["mean"])
+        if std_err == 0:
+            return 1.0 if diff > 0 else 0.0
+        p_value = math.erfc(diff / std_err / math.sqrt(2))
+        return round(1 - p_value, 4)
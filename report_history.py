@@ -0,0 +1,111 @@
+import json
+import os
+import sqlite3
+
+HISTORY_FILE = "report_history.db"
+
+
+class ReportHistory:
+    def __init__(self, db_path=HISTORY_FILE):
+        self.db_path = db_path
+        self.db = sqlite3.connect(db_path, timeout=30)
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                run_at TEXT NOT NULL,
+                audit TEXT NOT NULL,
+                total_articles INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS runs_audit ON runs (audit, run_at);
+            CREATE TABLE IF NOT EXISTS daily_counts (
+                date TEXT NOT NULL,
+                run_id INTEGER NOT NULL REFERENCES runs (id),
+                count INTEGER NOT NULL,
+                PRIMARY KEY (date, run_id)
+            ) WITHOUT ROWID;
+            """
+        )
+
+    def close(self):
+        self.db.close()
+
+    def last_counts(self, audit):
+        row = self.db.execute(
+            "SELECT id FROM runs WHERE audit = ? ORDER BY run_at DESC LIMIT 1",
+            (audit,),
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(
+            self.db.execute(
+                "SELECT date, count FROM daily_counts WHERE run_id = ?", (row[0],)
+            )
+        )
+
+    def record(self, audit, report):
+        # Append-only: a run is only stored when its counts differ from the
+        # audit's previous run, so re-running a report on an audit that saw
+        # nothing new costs nothing.
+        counts = report["daily_statistics"]["articles_per_day"]
+        if counts == self.last_counts(audit):
+            return False
+
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO runs (run_at, audit, total_articles) VALUES (?, ?, ?)",
+                (report["generated_at"], audit, report["total_articles"]),
+            )
+            self.db.executemany(
+                "INSERT INTO daily_counts (date, run_id, count) VALUES (?, ?, ?)",
+                [(date, cursor.lastrowid, count) for date, count in counts.items()],
+            )
+        return True
+
+    def import_report(self, audit_dir):
+        with open(os.path.join(audit_dir, "report.json"), "r", encoding="utf-8") as f:
+            report = json.load(f)
+        return self.record(os.path.basename(os.path.normpath(audit_dir)), report)
+
+    def window(self, since=None, until=None):
+        clauses, params = [], []
+        if since:
+            clauses.append("d.date >= ?")
+            params.append(since)
+        if until:
+            clauses.append("d.date <= ?")
+            params.append(until)
+        return (" AND " + " AND ".join(clauses) if clauses else ""), params
+
+    def counts_by_run(self, since=None, until=None, audit=None, last_per_audit=False):
+        # (run_at, audit, date, count) rows for every run that saw a day in
+        # the window, e.g. "August as seen by each run".
+        where, params = self.window(since, until)
+        if audit:
+            where += " AND r.audit = ?"
+            params.append(audit)
+        if last_per_audit:
+            where += (
+                " AND r.run_at = (SELECT MAX(run_at) FROM runs WHERE audit = r.audit)"
+            )
+        return self.db.execute(
+            "SELECT r.run_at, r.audit, d.date, d.count "
+            "FROM daily_counts d JOIN runs r ON r.id = d.run_id "
+            f"WHERE 1 = 1{where} ORDER BY r.run_at, d.date",
+            params,
+        ).fetchall()
+
+    def latest_per_day(self, since=None, until=None):
+        # (date, count, run_at, audit) from the most recent run that saw
+        # each day.
+        where, params = self.window(since, until)
+        return self.db.execute(
+            "SELECT date, count, run_at, audit FROM ("
+            "  SELECT d.date, d.count, r.run_at, r.audit, ROW_NUMBER() OVER ("
+            "    PARTITION BY d.date ORDER BY r.run_at DESC"
+            "  ) AS position "
+            "  FROM daily_counts d JOIN runs r ON r.id = d.run_id "
+            f"  WHERE 1 = 1{where}"
+            ") WHERE position = 1 ORDER BY date",
+            params,
+        ).fetchall()
@@ -0,0 +1,139 @@
+from datetime import date, timedelta
+
+
+def parse_day(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RollupCube:
+    # Built once from articles_per_day over the dense calendar between the
+    # first and last dated day (days without a count hold 0):
+    #   prefix       cumulative article counts
+    #   prefix_days  cumulative number of days that have a count, so means
+    #                are over days with data, as the report has always used
+    #   sparse       sparse table of argmax indices, levels of 2^j days
+    # Total, mean and peak of any window are then O(1): two prefix lookups
+    # and two overlapping sparse-table blocks.
+    def __init__(self, articles_per_day):
+        days = {}
+        for value, count in articles_per_day.items():
+            day = parse_day(value)
+            if day is not None:
+                days[day] = days.get(day, 0) + count
+
+        self.start = min(days) if days else None
+        self.end = max(days) if days else None
+        length = (self.end - self.start).days + 1 if days else 0
+
+        self.counts = [0] * length
+        present = [0] * length
+        for day, count in days.items():
+            index = (day - self.start).days
+            self.counts[index] = count
+            present[index] = 1
+
+        self.prefix = [0] * (length + 1)
+        self.prefix_days = [0] * (length + 1)
+        for i in range(length):
+            self.prefix[i + 1] = self.prefix[i] + self.counts[i]
+            self.prefix_days[i + 1] = self.prefix_days[i] + present[i]
+
+        counts = self.counts
+        self.sparse = [list(range(length))]
+        span = 1
+        while span * 2 <= length:
+            previous = self.sparse[-1]
+            self.sparse.append(
+                [
+                    a if counts[a] >= counts[b] else b
+                    for a, b in zip(previous, previous[span:])
+                ]
+            )
+            span *= 2
+
+    def __len__(self):
+        return len(self.counts)
+
+    def peak_index(self, first, last):
+        level = (last - first + 1).bit_length() - 1
+        a = self.sparse[level][first]
+        b = self.sparse[level][last - (1 << level) + 1]
+        return a if self.counts[a] >= self.counts[b] else b
+
+    def window(self, since=None, until=None):
+        # since/until are dates or ISO strings, inclusive, clipped to the
+        # data; None if the window holds no day of it.
+        if not self.counts:
+            return None
+        since = parse_day(since) if isinstance(since, str) else since
+        until = parse_day(until) if isinstance(until, str) else until
+        first = max((since - self.start).days, 0) if since else 0
+        last = len(self.counts) - 1
+        if until:
+            last = min((until - self.start).days, last)
+        if first > last:
+            return None
+
+        total = self.prefix[last + 1] - self.prefix[first]
+        days = self.prefix_days[last + 1] - self.prefix_days[first]
+        peak = self.peak_index(first, last)
+        return {
+            "start": (self.start + timedelta(days=first)).isoformat(),
+            "end": (self.start + timedelta(days=last)).isoformat(),
+            "days": days,
+            "total": total,
+            "mean": total / days if days else 0,
+            "peak": self.counts[peak],
+            "peak_date": (self.start + timedelta(days=peak)).isoformat(),
+        }
+
+    def trailing(self, days):
+        # The window from `days` days before the latest day up to it, both
+        # ends included (so trailing(28) spans 29 calendar days, as the
+        # "last 4 weeks" summary always has).
+        if not self.counts:
+            return None
+        return self.window(self.end - timedelta(days=days), self.end)
+
+    def periods(self, period):
+        # Window summaries per calendar period: "daily", "weekly" (ISO
+        # weeks, keyed by their Monday) or "monthly".
+        if period not in ("daily", "weekly", "monthly"):
+            raise ValueError(f"Unknown rollup period: {period}")
+        if not self.counts:
+            return []
+
+        first = self.start
+        if period == "weekly":
+            first -= timedelta(days=first.weekday())
+        elif period == "monthly":
+            first = first.replace(day=1)
+
+        rollups = []
+        while first <= self.end:
+            if period == "daily":
+                following = first + timedelta(days=1)
+            elif period == "weekly":
+                following = first + timedelta(days=7)
+            else:
+                following = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+            summary = self.window(first, following - timedelta(days=1))
+            if summary and summary["days"]:
+                summary["period"] = first.isoformat()
+                rollups.append(summary)
+            first = following
+        return rollups
+
+    def summary(self, trailing_days=(7, 28, 90)):
+        # The part that goes into report.json: weekly and monthly rollups and
+        # a few trailing windows (daily rollups are articles_per_day itself).
+        return {
+            "weekly": self.periods("weekly"),
+            "monthly": self.periods("monthly"),
+            "trailing": {
+                f"last_{days}_days": self.trailing(days) for days in trailing_days
+            },
+        }
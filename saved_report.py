@@ -0,0 +1,116 @@
+import csv
+import json
+import os
+import time
+from collections import Counter
+from datetime import datetime
+from checkpoint_io import (
+    find_output,
+    load_topics,
+    open_file,
+    previous_name,
+    read_checkpoint_header,
+)
+from q2b_studio_auditor import daily_report
+
+
+def data_mtime(audit_dir):
+    # When the article data last changed: the newest checkpoint generation
+    # or CSV export.
+    paths = [
+        find_output(audit_dir, name)
+        for name in (
+            "checkpoint.json",
+            previous_name("checkpoint.json"),
+            "articles.csv",
+        )
+    ]
+    return max((os.path.getmtime(path) for path in paths if path), default=None)
+
+
+def is_current(path, audit_dir):
+    # save_checkpoint writes report.json and daily_summary.csv after the
+    # checkpoint and CSV, so a current summary is never older than them.
+    if not os.path.exists(path):
+        return False
+    changed = data_mtime(audit_dir)
+    return changed is None or os.path.getmtime(path) >= changed
+
+
+def read_daily_summary(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        return {date: int(count) for date, count in reader}
+
+
+def count_articles_per_day(csv_file):
+    with open_file(csv_file, "r", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if "date_parsed" not in header:
+            return Counter()
+        index = header.index("date_parsed")
+        return Counter(row[index] for row in reader if len(row) > index)
+
+
+def report_from_counts(audit_dir, daily_stats):
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "total_articles": sum(daily_stats.values()),
+        **daily_report(daily_stats),
+    }
+    topics = load_topics(audit_dir)
+    if topics:
+        report["topics"] = topics
+    return report
+
+
+def load_report(audit_dir):
+    # The report needed to plot an audit, from the cheapest source that is
+    # up to date, without ever loading the checkpoint:
+    #   report.json        as saved
+    #   daily_summary.csv  per-day counts, the rest of the fields recomputed
+    #   articles.csv       per-day counts streamed from the date column
+    # Returns (report, source), source being the file actually read, or
+    # (None, None) when none of them is there: an audit with only a
+    # checkpoint has to go through `report` first.
+    start_time = time.time()
+    report_file = os.path.join(audit_dir, "report.json")
+    header = read_checkpoint_header(audit_dir) or {}
+
+    report, source = None, None
+    if is_current(report_file, audit_dir):
+        with open(report_file, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        expected = header.get("articles_count")
+        if expected is None or report.get("total_articles") == expected:
+            source = "report.json"
+        else:
+            report = None
+
+    summary_file = os.path.join(audit_dir, "daily_summary.csv")
+    if report is None and is_current(summary_file, audit_dir):
+        daily_stats = read_daily_summary(summary_file)
+        if header.get("articles_count") in (None, sum(daily_stats.values())):
+            report = report_from_counts(audit_dir, daily_stats)
+            source = "daily_summary.csv"
+
+    if report is None:
+        csv_file = find_output(audit_dir, "articles.csv")
+        if csv_file is None:
+            if header:
+                print(
+                    f"{audit_dir} has a checkpoint but no current report.json, "
+                    "daily_summary.csv or articles.csv; run "
+                    f"`python main.py report {audit_dir}` first"
+                )
+            return None, None
+        report = report_from_counts(audit_dir, count_articles_per_day(csv_file))
+        source = os.path.basename(csv_file)
+
+    print(
+        f"Loaded report for {audit_dir} from {source} "
+        f"({report['total_articles']:,} articles, {time.time() - start_time:.2f} s)"
+    )
+    return report, source
@@ -0,0 +1,241 @@
+import hashlib
+import heapq
+import math
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from article_ids import extract_article_id
+from checkpoint_io import atomic_write
+
+KEYS_FILE = "seen_ids.bin"
+BLOOM_FILE = "seen_ids.bloom"
+BLOOM_MAGIC = b"Q2BBLOOM"
+BLOOM_HEADER = struct.Struct("<8sQQQQ")
+URL_KEY_FLAG = 1 << 63
+
+
+def article_key(url):
+    # Numeric article IDs are used as they are; the rare URL without one is
+    # hashed into the upper half of the key space so the two never collide.
+    article_id = extract_article_id(url)
+    if article_id is not None:
+        return article_id
+    digest = hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") | URL_KEY_FLAG
+
+
+def bloom_size(capacity, error_rate):
+    num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    num_bits = (num_bits + 7) // 8 * 8
+    num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+    return num_bits, num_hashes
+
+
+def map_file(path):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class SeenSet:
+    # Two files per audit directory:
+    #   seen_ids.bin    every seen key as a sorted little-endian uint64 array
+    #   seen_ids.bloom  a Bloom filter over the same keys
+    # Both are memory-mapped, so a lookup only pages in the few bytes it
+    # touches. The Bloom filter answers "not seen" in O(1); a possible hit is
+    # confirmed by binary search in the exact key array, so a false positive
+    # never hides a new article.
+    def __init__(self, directory, error_rate=0.001, min_capacity=100_000):
+        self.directory = directory
+        self.error_rate = error_rate
+        self.min_capacity = min_capacity
+        self.lock = threading.Lock()
+        # Held for a whole save, so the mapped files it reads stay open while
+        # lookups go on under self.lock.
+        self.save_lock = threading.Lock()
+        self.pending = set()
+        self.false_positives = 0
+        self.keys_map = None
+        self.bloom_map = None
+        self.open_files()
+
+    def open_files(self):
+        self.keys_map = map_file(os.path.join(self.directory, KEYS_FILE))
+        self.keys = (
+            memoryview(self.keys_map).cast("Q") if self.keys_map else array("Q")
+        )
+        self.bloom_map = map_file(os.path.join(self.directory, BLOOM_FILE))
+        self.num_bits = self.num_hashes = self.capacity = 0
+        self.bits = b""
+        if self.bloom_map:
+            magic, num_bits, num_hashes, capacity, _ = BLOOM_HEADER.unpack_from(
+                self.bloom_map
+            )
+            if magic != BLOOM_MAGIC:
+                raise ValueError(f"Not a seen-set Bloom filter: {BLOOM_FILE}")
+            self.num_bits = num_bits
+            self.num_hashes = num_hashes
+            self.capacity = capacity
+            self.bits = memoryview(self.bloom_map)[BLOOM_HEADER.size :]
+
+    def close_files(self):
+        # Views have to be released before the maps can close (and, on
+        # Windows, before the files can be replaced).
+        if isinstance(self.keys, memoryview):
+            self.keys.release()
+        if isinstance(self.bits, memoryview):
+            self.bits.release()
+        self.keys = array("Q")
+        self.bits = b""
+        for mapped in (self.keys_map, self.bloom_map):
+            if mapped is not None:
+                mapped.close()
+        self.keys_map = self.bloom_map = None
+
+    def close(self):
+        with self.save_lock, self.lock:
+            self.close_files()
+
+    def __len__(self):
+        return len(self.keys) + len(self.pending)
+
+    def positions(self, key, num_bits, num_hashes):
+        # Double hashing: two 64-bit halves of one digest give all k probes.
+        digest = hashlib.blake2b(key.to_bytes(8, "little"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % num_bits for i in range(num_hashes)]
+
+    def might_contain(self, key):
+        if not self.num_bits:
+            return len(self.keys) > 0
+        bits = self.bits
+        for position in self.positions(key, self.num_bits, self.num_hashes):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def contains_saved(self, key):
+        index = bisect_left(self.keys, key)
+        return index < len(self.keys) and self.keys[index] == key
+
+    def contains(self, key):
+        with self.lock:
+            if key in self.pending:
+                return True
+            if not self.might_contain(key):
+                return False
+            if self.contains_saved(key):
+                return True
+            self.false_positives += 1
+            return False
+
+    def add(self, key):
+        with self.lock:
+            self.pending.add(key)
+
+    def update(self, keys):
+        with self.lock:
+            self.pending.update(keys)
+
+    def merged_keys(self, new_keys):
+        previous = None
+        for key in heapq.merge(self.keys, new_keys):
+            if key != previous:
+                yield key
+                previous = key
+
+    def save(self, directory=None, chunk_size=65536):
+        # The key array is rewritten as a streaming merge of the old array and
+        # the new keys. The Bloom filter only has bits set when it still has
+        # room; once it is full it is rebuilt from the exact keys at twice the
+        # size, so its false-positive rate never drifts upwards.
+        # Both are built from a snapshot of the pending keys without holding
+        # self.lock; only swapping the files in takes it, so contains() on
+        # the crawl thread does not wait for a rebuild.
+        directory = directory or self.directory
+        with self.save_lock:
+            with self.lock:
+                snapshot = set(self.pending)
+            new_keys = sorted(k for k in snapshot if not self.contains_saved(k))
+            if not new_keys and directory == self.directory:
+                with self.lock:
+                    self.pending -= snapshot
+                return 0
+
+            keys_file = os.path.join(directory, KEYS_FILE)
+            bloom_file = os.path.join(directory, BLOOM_FILE)
+            count = 0
+            with atomic_write(keys_file + ".new", "wb") as f:
+                chunk = array("Q")
+                for key in self.merged_keys(new_keys):
+                    chunk.append(key)
+                    if len(chunk) >= chunk_size:
+                        f.write(chunk.tobytes())
+                        count += len(chunk)
+                        del chunk[:]
+                f.write(chunk.tobytes())
+                count += len(chunk)
+
+            if count <= self.capacity:
+                bits = bytearray(self.bits)
+                num_bits, num_hashes, capacity = (
+                    self.num_bits,
+                    self.num_hashes,
+                    self.capacity,
+                )
+                added = new_keys
+            else:
+                capacity = max(self.min_capacity, count * 2)
+                num_bits, num_hashes = bloom_size(capacity, self.error_rate)
+                bits = bytearray(num_bits // 8)
+                # Rebuild from the freshly written, complete key array.
+                with open(keys_file + ".new", "rb") as f:
+                    added = array("Q")
+                    added.frombytes(f.read())
+            for key in added:
+                for position in self.positions(key, num_bits, num_hashes):
+                    bits[position >> 3] |= 1 << (position & 7)
+            del added
+
+            with atomic_write(bloom_file + ".new", "wb") as f:
+                f.write(
+                    BLOOM_HEADER.pack(
+                        BLOOM_MAGIC, num_bits, num_hashes, capacity, count
+                    )
+                )
+                f.write(bits)
+            del bits
+
+            with self.lock:
+                self.close_files()
+                os.replace(bloom_file + ".new", bloom_file)
+                os.replace(keys_file + ".new", keys_file)
+                self.directory = directory
+                # Keys added during the save stay pending for the next one.
+                self.pending -= snapshot
+                self.open_files()
+            return len(new_keys)
+
+
+def open_seen_set(audit_dir):
+    # Audits written before the seen set existed get one built from their
+    # articles.csv (or checkpoint) the first time they are used.
+    seen = SeenSet(audit_dir)
+    if len(seen) == 0 and os.path.exists(audit_dir):
+        from audit_merger import iter_audit_columns
+
+        try:
+            seen.update(
+                article_key(url) for (url,) in iter_audit_columns(audit_dir, ("url",))
+            )
+        except FileNotFoundError:
+            return seen
+        if len(seen):
+            print(f"Building seen set for {audit_dir} ({len(seen):,} articles)...")
+            seen.save()
+    return seen
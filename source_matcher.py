@@ -0,0 +1,272 @@
+import csv
+import json
+import os
+import time
+from array import array
+import numpy as np
+from checkpoint_io import open_file
+from title_deduplicator import normalize_title
+
+
+class SourceMatcher:
+    def __init__(
+        self,
+        top_k=5,
+        min_score=0.3,
+        stem_length=6,
+        max_df_ratio=0.02,
+        min_df_cap=10,
+        batch_size=10000,
+        max_pairs=4_000_000,
+    ):
+        self.top_k = top_k
+        self.min_score = min_score
+        self.stem_length = stem_length
+        self.max_df_ratio = max_df_ratio
+        self.min_df_cap = min_df_cap
+        self.batch_size = batch_size
+        self.max_pairs = max_pairs
+
+        self.reference_titles = []
+        self.reference_urls = []
+        self.term_ids = {}
+
+    def tokenize(self, title):
+        # Prefix truncation is a cheap, language-agnostic stemmer: "aplicaciones"
+        # and "aplicacion" share the same term.
+        return {
+            word[: self.stem_length]
+            for word in normalize_title(title).split()
+            if len(word) > 2 or word.isdigit()
+        }
+
+    def load_reference(self, path):
+        print(f"Loading reference corpus from: {path}")
+
+        with open_file(path, "r") as f:
+            if path.endswith((".jsonl", ".jsonl.gz", ".jsonl.zst")):
+                rows = (json.loads(line) for line in f if line.strip())
+            else:
+                rows = csv.DictReader(f)
+
+            for row in rows:
+                title = row.get("title")
+                if title:
+                    self.reference_titles.append(title)
+                    self.reference_urls.append(row.get("url", ""))
+
+        print(f"Loaded {len(self.reference_titles):,} reference articles")
+        return len(self.reference_titles)
+
+    def build_index(self):
+        print("Building reference term index...")
+        start_time = time.time()
+
+        term_ids = {}
+        ref_terms = array("i")
+        ref_starts = array("q", [0])
+        for title in self.reference_titles:
+            for term in self.tokenize(title):
+                ref_terms.append(term_ids.setdefault(term, len(term_ids)))
+            ref_starts.append(len(ref_terms))
+
+        ref_terms = np.frombuffer(ref_terms, dtype=np.int32)
+        ref_starts = np.frombuffer(ref_starts, dtype=np.int64)
+        ref_ids = np.repeat(
+            np.arange(len(self.reference_titles), dtype=np.int32), np.diff(ref_starts)
+        )
+        num_refs = len(self.reference_titles)
+        max_df = max(self.min_df_cap, int(num_refs * self.max_df_ratio))
+
+        # Terms present in more than max_df_ratio of the corpus carry almost no
+        # signal and dominate scoring time, so they are dropped from the index.
+        # Below min_df_cap / max_df_ratio references the ratio would drop any
+        # term two titles share, so the cap never goes under min_df_cap.
+        df = np.bincount(ref_terms, minlength=len(term_ids))
+        kept = df <= max_df
+        idf = np.log((num_refs + 1) / (df + 1)) + 1
+        self.term_ids = {term: i for term, i in term_ids.items() if kept[i]}
+        self.term_idf = idf.astype(np.float32)
+
+        keep = kept[ref_terms]
+        ref_terms, ref_ids = ref_terms[keep], ref_ids[keep]
+        weights = self.term_idf[ref_terms]
+        norms = np.sqrt(
+            np.bincount(ref_ids, weights=weights * weights, minlength=num_refs)
+        )
+        norms[norms == 0] = 1.0
+
+        # Postings in CSR layout, grouped by term: each entry is a reference
+        # and its term weight already divided by the reference's norm, so a
+        # title's dot product with them is the cosine similarity.
+        order = np.argsort(ref_terms, kind="stable")
+        self.posting_refs = ref_ids[order]
+        self.posting_weights = (weights[order] / norms[self.posting_refs]).astype(
+            np.float32
+        )
+        self.posting_starts = np.zeros(len(term_ids) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(ref_terms, minlength=len(term_ids)),
+            out=self.posting_starts[1:],
+        )
+
+        print(
+            f"Indexed {len(self.term_ids):,} terms "
+            f"({len(term_ids) - len(self.term_ids):,} stop terms dropped) "
+            f"in {time.time() - start_time:.1f}s"
+        )
+
+    def query_rows(self, titles):
+        # The titles' kept terms as (row, term, weight) arrays, weights being
+        # idf over the title's norm.
+        rows, terms = array("i"), array("i")
+        for row, title in enumerate(titles):
+            for term in self.tokenize(title):
+                term_id = self.term_ids.get(term)
+                if term_id is not None:
+                    rows.append(row)
+                    terms.append(term_id)
+        rows = np.frombuffer(rows, dtype=np.int32)
+        terms = np.frombuffer(terms, dtype=np.int32)
+        weights = self.term_idf[terms].astype(np.float64)
+        norms = np.sqrt(
+            np.bincount(rows, weights=weights * weights, minlength=len(titles))
+        )
+        return rows, terms, weights / norms[rows]
+
+    def score_chunk(self, rows, terms, weights):
+        # Sparse product of the query rows with the postings: every (title,
+        # reference) pair sharing a term gets one entry, entries are summed per
+        # pair by sorting on a combined key, then the top_k per title are kept.
+        num_refs = len(self.reference_titles)
+        starts = self.posting_starts[terms]
+        lengths = self.posting_starts[terms + 1] - starts
+        offsets = np.cumsum(lengths) - lengths
+        positions = np.arange(lengths.sum()) - np.repeat(offsets - starts, lengths)
+
+        keys = np.repeat(rows.astype(np.int64) * num_refs, lengths)
+        keys += self.posting_refs[positions]
+        values = np.repeat(weights, lengths) * self.posting_weights[positions]
+        if not len(keys):
+            return keys, keys, values
+
+        order = np.argsort(keys)
+        keys, values = keys[order], values[order]
+        firsts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        scores = np.add.reduceat(values, firsts)
+        keys = keys[firsts]
+
+        matched = scores >= self.min_score
+        keys, scores = keys[matched], scores[matched]
+        pair_rows = keys // num_refs
+        order = np.lexsort((-scores, pair_rows))
+        keys, scores, pair_rows = keys[order], scores[order], pair_rows[order]
+        row_firsts = np.flatnonzero(np.r_[True, pair_rows[1:] != pair_rows[:-1]])
+        row_lengths = np.diff(np.r_[row_firsts, len(keys)])
+        ranks = np.arange(len(keys)) - np.repeat(row_firsts, row_lengths)
+        top = ranks < self.top_k
+        return pair_rows[top], keys[top] % num_refs, scores[top]
+
+    def score_titles(self, titles):
+        # One list of (ref_id, score) per title, best first. Titles are scored
+        # in chunks of at most max_pairs candidate pairs to bound memory.
+        results = [[] for _ in titles]
+        rows, terms, weights = self.query_rows(titles)
+        if not len(rows):
+            return results
+
+        pairs = np.cumsum(self.posting_starts[terms + 1] - self.posting_starts[terms])
+        start = 0
+        while start < len(rows):
+            before = pairs[start - 1] if start else 0
+            end = max(
+                int(np.searchsorted(pairs, before + self.max_pairs, "right")),
+                start + 1,
+            )
+            # A title is never split across chunks.
+            while end < len(rows) and rows[end] == rows[end - 1]:
+                end += 1
+            chunk = slice(start, end)
+            matches = self.score_chunk(rows[chunk], terms[chunk], weights[chunk])
+            for row, ref_id, score in zip(*(column.tolist() for column in matches)):
+                results[row].append((ref_id, score))
+            start = end
+        return results
+
+    def score_title(self, title):
+        return self.score_titles([title])[0]
+
+    def match_batch(self, articles):
+        # Content farms republish the same title many times, so each distinct
+        # normalized title in a batch is scored once.
+        distinct = {}
+        titles = []
+        rows = []
+        for article in articles:
+            key = normalize_title(article.get("title", ""))
+            if key not in distinct:
+                distinct[key] = len(titles)
+                titles.append(article.get("title", ""))
+            rows.append(distinct[key])
+        scores = self.score_titles(titles)
+        for article, row in zip(articles, rows):
+            yield article, scores[row]
+
+    def match_articles(self, articles):
+        batch = []
+        for article in articles:
+            batch.append(article)
+            if len(batch) >= self.batch_size:
+                yield from self.match_batch(batch)
+                batch = []
+        if batch:
+            yield from self.match_batch(batch)
+
+    def write_matches(self, articles, output_dir):
+        print("\nMatching scraped titles against reference corpus...")
+        start_time = time.time()
+
+        output_file = os.path.join(output_dir, "source_matches.csv")
+        matched = 0
+        processed = 0
+
+        with open(output_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(
+                [
+                    "article_url",
+                    "article_title",
+                    "date_parsed",
+                    "rank",
+                    "score",
+                    "source_title",
+                    "source_url",
+                ]
+            )
+
+            for article, matches in self.match_articles(articles):
+                processed += 1
+                if matches:
+                    matched += 1
+                for rank, (ref_id, score) in enumerate(matches, 1):
+                    writer.writerow(
+                        [
+                            article.get("url"),
+                            article.get("title"),
+                            article.get("date_parsed"),
+                            rank,
+                            f"{score:.4f}",
+                            self.reference_titles[ref_id],
+                            self.reference_urls[ref_id],
+                        ]
+                    )
+
+                if processed % 50000 == 0:
+                    print(f"Progress: {processed:,} articles matched")
+
+        print(
+            f"Matched {matched:,} of {processed:,} articles "
+            f"in {time.time() - start_time:.1f}s"
+        )
+        print(f"Saved: {output_file}")
+        return output_file
@@ -0,0 +1,69 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from benchmarks.fake_site import FakeQ2BSite
+from main import build_parser
+from report_history import ReportHistory
+
+
+@pytest.fixture
+def site():
+    site = FakeQ2BSite(pages=12, articles_per_day=40, padding_kb=1)
+    site.start()
+    yield site
+    site.stop()
+
+
+def run(*argv):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+def crawl(site, output_dir, db, *extra):
+    run(
+        "crawl",
+        "--base-url",
+        site.base_url,
+        "--request-interval",
+        "0",
+        "--recheck-every",
+        "0",
+        "--no-visualize",
+        "--output-dir",
+        output_dir,
+        "--history-db",
+        db,
+        *extra,
+    )
+
+
+def test_delta_run_does_not_replace_full_counts(site, tmp_path):
+    db = str(tmp_path / "report_history.db")
+    full = str(tmp_path / "full")
+    delta = str(tmp_path / "delta")
+
+    crawl(site, full, db)
+    history = ReportHistory(db)
+    full_counts = {date: count for date, count, _, _ in history.latest_per_day()}
+    history.close()
+    assert sum(full_counts.values()) == 12 * 9
+
+    # New articles land on page 1; the delta run only collects those.
+    site.pages = 14
+    crawl(site, delta, db, "--since-audit", full)
+    # Re-running the report of the delta audit must not record it either.
+    run("report", delta, "--history-db", db)
+
+    history = ReportHistory(db)
+    try:
+        latest = history.latest_per_day()
+        runs = {audit for _, audit, _, _ in history.counts_by_run(last_per_audit=False)}
+    finally:
+        history.close()
+
+    assert runs == {"full"}
+    assert {date: count for date, count, _, _ in latest} == full_counts
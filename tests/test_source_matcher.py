@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source_matcher import SourceMatcher
+
+
+def test_small_corpus_keeps_shared_terms():
+    matcher = SourceMatcher()
+    matcher.reference_titles = [
+        "Cómo crear una aplicación móvil con inteligencia artificial",
+        "Cómo crear una aplicación web con Python",
+        "Guía completa de ciberseguridad para empresas",
+        "Mejores prácticas de desarrollo de software en la nube",
+    ]
+    matcher.reference_urls = [f"https://example.com/{i}" for i in range(4)]
+    matcher.build_index()
+
+    # "crear" and "aplica" are shared by two references, which a cap of
+    # 2% of four references would drop.
+    assert "crear" in matcher.term_ids
+    assert "aplica" in matcher.term_ids
+
+    matches = matcher.score_title(
+        "Crear una aplicación móvil con inteligencia artificial"
+    )
+    assert matches[0][0] == 0
+    assert matches[0][1] > 0.9
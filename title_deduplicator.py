@@ -0,0 +1,275 @@
+import hashlib
+import os
+import random
+import re
+import unicodedata
+import zlib
+from array import array
+
+FINGERPRINTS_FILE = "title_fingerprints.bin"
+
+
+def normalize_title(title):
+    title = unicodedata.normalize("NFKD", title.lower())
+    title = "".join(c for c in title if not unicodedata.combining(c))
+    return re.sub(r"[\W_]+", " ", title).strip()
+
+
+def url_key(url):
+    digest = hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+def read_fingerprints(path, record_size, limit):
+    # Complete records only: a tail cut short by a crash is ignored.
+    if not os.path.exists(path):
+        return array("q")
+    records = array("q")
+    with open(path, "rb") as f:
+        data = f.read(limit * record_size * records.itemsize)
+    whole = len(data) // (record_size * records.itemsize) * record_size
+    records.frombytes(data[: whole * records.itemsize])
+    return records
+
+
+def append_fingerprints(path, start, records, record_size):
+    # The file holds one record per indexed article, in article order, so a
+    # checkpoint only appends the records added since the previous one.
+    # Records past `start` belong to an index that has since been rebuilt
+    # and are cut off first.
+    offset = start * record_size * records.itemsize
+    with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() < offset:
+            # Records are missing (the file was removed or truncated), so
+            # start over; the next rebuild recomputes them.
+            f.truncate(0)
+            return False
+        f.truncate(offset)
+        f.seek(offset)
+        f.write(records.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    return True
+
+
+class TitleDeduplicator:
+    # MinHash signatures over character shingles, banded into one
+    # direct-mapped table per band (fingerprint + cluster id per slot).
+    #   - the tables double while more than max_load full, up to
+    #     2**max_table_bits slots (about 200 MB for the 8 bands, a million
+    #     titles). Past that a colliding insert evicts the older entry and
+    #     recall drops; measured on 32k titles, near duplicates (one word
+    #     changed) are found 0.85 of the time at half load, 0.77 at full
+    #     load, 0.58 at twice and 0.32 at four times it (exact duplicates
+    #     1.00, 1.00, 0.93, 0.62)
+    #   - every add() logs the article's band fingerprints; saved to
+    #     title_fingerprints.bin they let replay() rebuild the index
+    #     without computing a single MinHash again
+    #   - cluster sizes are exact; the sample records (original title and
+    #     first URLs) are kept for the largest max_clusters clusters only
+    def __init__(
+        self,
+        num_perm=32,
+        bands=8,
+        shingle_size=4,
+        capacity=0,
+        table_bits=16,
+        max_table_bits=21,
+        max_load=0.5,
+        max_cluster_urls=5,
+        max_clusters=10_000,
+        seed=47,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_table_bits = max_table_bits
+        self.max_load = max_load
+        self.max_cluster_urls = max_cluster_urls
+        self.max_clusters = max_clusters
+        self.record_size = bands + 1
+
+        # XOR with a random mask permutes the 32-bit shingle hashes; min() over
+        # map() keeps the per-title cost in C.
+        rng = random.Random(seed)
+        self.masks = [rng.getrandbits(32) for _ in range(num_perm)]
+
+        while table_bits < max_table_bits and capacity > (1 << table_bits) * max_load:
+            table_bits += 1
+        self.allocate(table_bits)
+
+        self.indexed = 0
+        self.titles_seen = 0
+        self.duplicates = 0
+        self.duplicate_clusters = 0
+        self.clusters = {}
+        # Per cluster id: references to the original article's URL and title
+        # (shared with the caller's article dicts) and the cluster size.
+        self.original_urls = []
+        self.original_titles = []
+        self.cluster_sizes = array("i")
+        # Fingerprint records not saved yet, and how many are saved.
+        self.records = array("q")
+        self.saved_records = 0
+
+    def allocate(self, table_bits):
+        self.table_bits = table_bits
+        self.mask = (1 << table_bits) - 1
+        slots = 1 << table_bits
+        self.fingerprints = [array("q", [0]) * slots for _ in range(self.bands)]
+        self.cluster_ids = [array("i", [-1]) * slots for _ in range(self.bands)]
+
+    def grow(self):
+        fingerprints, cluster_ids = self.fingerprints, self.cluster_ids
+        self.allocate(self.table_bits + 1)
+        mask = self.mask
+        for band in range(self.bands):
+            new_fingerprints = self.fingerprints[band]
+            new_cluster_ids = self.cluster_ids[band]
+            for fingerprint, cluster_id in zip(fingerprints[band], cluster_ids[band]):
+                if fingerprint:
+                    new_fingerprints[fingerprint & mask] = fingerprint
+                    new_cluster_ids[fingerprint & mask] = cluster_id
+
+    def shingles(self, title):
+        text = normalize_title(title)
+        if len(text) <= self.shingle_size:
+            return {zlib.crc32(text.encode("utf-8"))} if text else set()
+        return {
+            zlib.crc32(text[i : i + self.shingle_size].encode("utf-8"))
+            for i in range(len(text) - self.shingle_size + 1)
+        }
+
+    def signature(self, title):
+        shingles = self.shingles(title)
+        if not shingles:
+            return None
+        return [min(map(mask.__xor__, shingles)) for mask in self.masks]
+
+    def band_fingerprints(self, signature):
+        fingerprints = []
+        for band in range(self.bands):
+            rows = tuple(signature[band * self.rows : (band + 1) * self.rows])
+            fingerprints.append(hash((band,) + rows) or 1)
+        return fingerprints
+
+    def add(self, url, title):
+        fingerprints = None
+        if title and title != "N/A":
+            signature = self.signature(title)
+            if signature is not None:
+                fingerprints = self.band_fingerprints(signature)
+
+        self.records.append(url_key(url))
+        self.records.extend(fingerprints or [0] * self.bands)
+        return self.insert(url, title, fingerprints)
+
+    def replay(self, path, articles):
+        # Re-inserts the saved fingerprints of the leading articles whose
+        # URLs match their records; returns how many, the rest still need
+        # add().
+        records = read_fingerprints(path, self.record_size, len(articles))
+        count = 0
+        for start in range(0, len(records), self.record_size):
+            article = articles[count]
+            if records[start] != url_key(article["url"]):
+                break
+            fingerprints = records[start + 1 : start + self.record_size]
+            if not fingerprints[0]:
+                fingerprints = None
+            self.insert(article["url"], article["title"], fingerprints)
+            count += 1
+        self.saved_records = count
+        return count
+
+    def take_records(self):
+        # (position, records) for append_fingerprints.
+        start, records = self.saved_records, self.records
+        self.saved_records += len(records) // self.record_size
+        self.records = array("q")
+        return start, records
+
+    def insert(self, url, title, fingerprints):
+        self.indexed += 1
+        if not fingerprints:
+            return None
+
+        self.titles_seen += 1
+        if (
+            self.titles_seen > len(self.fingerprints[0]) * self.max_load
+            and self.table_bits < self.max_table_bits
+        ):
+            self.grow()
+
+        cluster_id = None
+        for band, fingerprint in enumerate(fingerprints):
+            slot = fingerprint & self.mask
+            if self.fingerprints[band][slot] == fingerprint:
+                cluster_id = self.cluster_ids[band][slot]
+                break
+
+        is_duplicate = cluster_id is not None
+        if not is_duplicate:
+            cluster_id = len(self.cluster_sizes)
+            self.original_urls.append(url)
+            self.original_titles.append(title)
+            self.cluster_sizes.append(1)
+
+        for band, fingerprint in enumerate(fingerprints):
+            slot = fingerprint & self.mask
+            self.fingerprints[band][slot] = fingerprint
+            self.cluster_ids[band][slot] = cluster_id
+
+        if not is_duplicate:
+            return None
+
+        self.duplicates += 1
+        self.cluster_sizes[cluster_id] += 1
+        size = self.cluster_sizes[cluster_id]
+        if size == 2:
+            self.duplicate_clusters += 1
+
+        cluster = self.clusters.get(cluster_id)
+        if cluster is None:
+            cluster = self.clusters[cluster_id] = {
+                "title": self.original_titles[cluster_id],
+                "size": size,
+                "urls": [self.original_urls[cluster_id]],
+            }
+            if len(self.clusters) > 2 * self.max_clusters:
+                self.prune_clusters()
+        cluster["size"] = size
+        if len(cluster["urls"]) < self.max_cluster_urls:
+            cluster["urls"].append(url)
+        return cluster_id
+
+    def prune_clusters(self):
+        # A pruned cluster that grows again gets a fresh record with its exact
+        # size; only its sample URLs start over.
+        largest = sorted(self.clusters.items(), key=lambda item: -item[1]["size"])
+        self.clusters = dict(largest[: self.max_clusters])
+
+    def summary(self, top=20):
+        top_clusters = sorted(
+            self.clusters.values(), key=lambda c: c["size"], reverse=True
+        )[:top]
+        return {
+            "method": f"minhash_lsh ({self.num_perm} perms, {self.bands} bands)",
+            "titles_indexed": self.titles_seen,
+            "near_duplicates": self.duplicates,
+            "duplicate_clusters": self.duplicate_clusters,
+            "near_duplicate_rate": (
+                f"{self.duplicates / self.titles_seen * 100:.2f}%"
+                if self.titles_seen
+                else "0.00%"
+            ),
+            # Copies, so the report can be written while the crawl goes on.
+            "top_clusters": [
+                dict(cluster, urls=list(cluster["urls"])) for cluster in top_clusters
+            ],
+        }
@@ -0,0 +1,181 @@
+import os
+import sqlite3
+import threading
+import time
+from audit_merger import iter_audit_columns
+from checkpoint_io import read_checkpoint_header
+from title_deduplicator import normalize_title
+
+INDEX_FILE = "title_index.db"
+
+
+def fts5_available():
+    try:
+        db = sqlite3.connect(":memory:")
+        db.execute("CREATE VIRTUAL TABLE probe USING fts5(text)")
+        db.close()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def url_slug(url):
+    # /es/nuestro-blog/<id>/<slug>: the slug repeats the original title and
+    # survives retitling, so it is indexed next to the title.
+    parts = url.rstrip("/").split("/")
+    if len(parts) > 2 and parts[-2].isdigit():
+        return parts[-1].replace("-", " ")
+    return ""
+
+
+def match_expression(query, match_all=False):
+    # Free text is reduced to quoted terms so punctuation in a pasted title
+    # can never be read as FTS5 syntax. By default any term may match and
+    # bm25 ranks titles sharing more (and rarer) words first.
+    terms = [f'"{term}"' for term in normalize_title(query).split()]
+    return (" AND " if match_all else " OR ").join(terms)
+
+
+class TitleSearchIndex:
+    def __init__(self, audit_dir, batch_size=2000):
+        if not fts5_available():
+            raise RuntimeError("This SQLite build does not include FTS5")
+
+        self.audit_dir = audit_dir
+        self.db_path = os.path.join(audit_dir, INDEX_FILE)
+        self.batch_size = batch_size
+        self.pending = []
+        # Articles are added on the crawl thread and flushed from whichever
+        # thread writes the checkpoint, hence the shared connection and lock.
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                url TEXT UNIQUE NOT NULL,
+                title TEXT NOT NULL,
+                slug TEXT NOT NULL,
+                date_parsed TEXT,
+                page_num INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS articles_date ON articles (date_parsed);
+            CREATE VIRTUAL TABLE IF NOT EXISTS titles USING fts5(
+                title, slug,
+                content='articles', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS articles_insert AFTER INSERT ON articles
+            BEGIN
+                INSERT INTO titles (rowid, title, slug)
+                VALUES (new.id, new.title, new.slug);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_update AFTER UPDATE ON articles
+            BEGIN
+                INSERT INTO titles (titles, rowid, title, slug)
+                VALUES ('delete', old.id, old.title, old.slug);
+                INSERT INTO titles (rowid, title, slug)
+                VALUES (new.id, new.title, new.slug);
+            END;
+            """
+        )
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def add(self, url, title, date_parsed, page_num):
+        with self.lock:
+            self.pending.append((url, title, url_slug(url), date_parsed, page_num))
+            full = len(self.pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        # One transaction per batch; a duplicate URL takes the latest title
+        # and date, like Q2BStudioAuditor.articles does.
+        with self.lock:
+            pending, self.pending = self.pending, []
+            if pending:
+                self.write(pending)
+
+    def write(self, rows):
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO articles (url, title, slug, date_parsed, page_num) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET title = excluded.title, "
+                "slug = excluded.slug, date_parsed = excluded.date_parsed, "
+                "page_num = excluded.page_num "
+                "WHERE title != excluded.title "
+                "OR date_parsed IS NOT excluded.date_parsed "
+                "OR page_num IS NOT excluded.page_num",
+                rows,
+            )
+
+    def add_audit(self):
+        # Bulk (re)indexing of an audit written without the index, e.g. an
+        # older crawl or a merged audit.
+        for url, title, date_parsed, page_num in iter_audit_columns(
+            self.audit_dir, ("url", "title", "date_parsed", "page_num")
+        ):
+            self.add(url, title or "", date_parsed, int(page_num) if page_num else None)
+        self.flush()
+
+    def search(self, query, since=None, until=None, limit=20, match_all=False):
+        expression = match_expression(query, match_all)
+        if not expression:
+            return []
+
+        sql = (
+            "SELECT a.url, a.title, a.date_parsed, a.page_num, "
+            "bm25(titles, 10.0, 3.0) AS score "
+            "FROM titles JOIN articles a ON a.id = titles.rowid "
+            "WHERE titles MATCH ?"
+        )
+        params = [expression]
+        if since or until:
+            sql += " AND a.date_parsed != 'UNKNOWN_DATE'"
+        if since:
+            sql += " AND a.date_parsed >= ?"
+            params.append(since)
+        if until:
+            sql += " AND a.date_parsed <= ?"
+            params.append(until)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+
+        return [
+            {
+                "url": url,
+                "title": title,
+                "date_parsed": date_parsed,
+                "page_num": page_num,
+                "score": round(-score, 3),
+            }
+            for url, title, date_parsed, page_num, score in self.db.execute(
+                sql, params
+            )
+        ]
+
+
+def open_search_index(audit_dir, rebuild=False):
+    # Reuses the index the crawl built when it covers every article in the
+    # checkpoint; otherwise the missing rows are added from articles.csv.
+    if rebuild and os.path.exists(os.path.join(audit_dir, INDEX_FILE)):
+        os.remove(os.path.join(audit_dir, INDEX_FILE))
+    index = TitleSearchIndex(audit_dir)
+    header = read_checkpoint_header(audit_dir) or {}
+    expected = header.get("articles_count")
+    if expected is None or index.count() < expected:
+        print(f"Indexing titles in {audit_dir}...")
+        start_time = time.time()
+        index.add_audit()
+        print(
+            f"Indexed {index.count():,} articles in "
+            f"{time.time() - start_time:.1f} seconds"
+        )
+    return index
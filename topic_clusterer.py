@@ -0,0 +1,280 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import time
+import zlib
+from collections import defaultdict
+from array import array
+from datetime import datetime
+import numpy as np
+from audit_merger import iter_audit_columns
+from checkpoint_io import TOPICS_FILE, atomic_write
+from profiling import profiler
+from title_deduplicator import normalize_title
+
+ASSIGNMENTS_FILE = "article_topics.csv"
+
+# Normalized (lowercase, no accents) Spanish and English function words; the
+# farm's titles are mostly Spanish with English technical terms mixed in.
+STOPWORDS = frozenset(
+    """
+    a al algo algunas algunos ante antes como con contra cual cuando de del
+    desde donde durante e el ella ellos en entre era es esa ese eso esta estas
+    este esto estos fue ha hasta hay la las le les lo los mas me mi mucho muy
+    nada ni no nos o otra otras otro otros para pero poco por porque que quien
+    se ser si sin sobre son su sus tambien te tu tus un una uno unos y ya
+    an and are as at be by can do for from how in is it its of on or that the
+    to what when why with you your
+    """.split()
+)
+
+
+def title_tokens(title):
+    words = [
+        word
+        for word in normalize_title(title).split()
+        if len(word) > 2 and word not in STOPWORDS and not word.isdigit()
+    ]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class TopicClusterer:
+    # Spherical mini-batch k-means over hashed TF-IDF title vectors.
+    #   1. one pass over articles.csv hashes each title's words and bigrams
+    #      into num_features buckets; the bucket lists go to a scratch file
+    #      and only row offsets and document frequencies stay in memory
+    #   2. mini-batches of random rows are read back from the scratch file
+    #      and move the centroids (Sculley's per-centre learning rate)
+    #   3. a final pass assigns every title to its nearest centroid
+    # Memory is two num_topics x num_features float32 arrays (about 20 MB
+    # with the defaults) plus 8 bytes per article, whatever the corpus size.
+    def __init__(
+        self,
+        num_topics=20,
+        num_features=2**18,
+        batch_size=10_000,
+        epochs=2,
+        top_terms=8,
+        seed=47,
+    ):
+        self.num_topics = num_topics
+        self.num_features = num_features
+        self.batch_size = batch_size
+        self.epochs = epochs
+        self.top_terms = top_terms
+        self.seed = seed
+        self.terms = {}
+
+    def bucket(self, token):
+        index = zlib.crc32(token.encode("utf-8")) % self.num_features
+        # The first token seen in a bucket names it in the topic labels.
+        self.terms.setdefault(index, token)
+        return index
+
+    @profiler.profiled("topics_hash")
+    def hash_titles(self, audit_dir, features_file):
+        # Titles are short, so term frequency is binary and a row is just its
+        # sorted, distinct buckets.
+        offsets = array("q", [0])
+        document_frequency = np.zeros(self.num_features, dtype=np.float64)
+        chunk = array("i")
+        with open(features_file, "wb") as f:
+            for (title,) in iter_audit_columns(audit_dir, ("title",)):
+                buckets = (
+                    sorted({self.bucket(token) for token in title_tokens(title)})
+                    if title and title != "N/A"
+                    else []
+                )
+                chunk.extend(buckets)
+                offsets.append(offsets[-1] + len(buckets))
+                if len(chunk) >= 1 << 20:
+                    document_frequency += np.bincount(
+                        np.frombuffer(chunk, dtype=np.int32),
+                        minlength=self.num_features,
+                    )
+                    f.write(chunk.tobytes())
+                    del chunk[:]
+            if chunk:
+                document_frequency += np.bincount(
+                    np.frombuffer(chunk, dtype=np.int32), minlength=self.num_features
+                )
+                f.write(chunk.tobytes())
+
+        self.offsets = np.frombuffer(offsets, dtype=np.int64)
+        rows = len(self.offsets) - 1
+        self.idf = np.log((1 + rows) / (1 + document_frequency)).astype(np.float32)
+        self.idf += 1
+        self.features = (
+            np.memmap(features_file, dtype=np.int32, mode="r")
+            if self.offsets[-1]
+            else np.zeros(0, dtype=np.int32)
+        )
+        return rows
+
+    def gather(self, rows):
+        # The given rows in CSR layout (bucket indices, L2-normalized TF-IDF
+        # weights, row starts and lengths); empty rows must be filtered out.
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        row_starts = np.cumsum(lengths) - lengths
+        positions = np.arange(lengths.sum()) - np.repeat(
+            row_starts - starts, lengths
+        )
+        indices = np.asarray(self.features[positions])
+        weights = self.idf[indices]
+        norms = np.sqrt(np.add.reduceat(weights * weights, row_starts))
+        weights /= np.repeat(norms, lengths)
+        return indices, weights, row_starts, lengths
+
+    def scores(self, centroids, indices, weights, row_starts):
+        # Cosine similarity of every row to every centroid: k x rows.
+        return np.add.reduceat(centroids[:, indices] * weights, row_starts, axis=1)
+
+    def centroid(self, indices, weights):
+        vector = np.zeros(self.num_features, dtype=np.float32)
+        np.add.at(vector, indices, weights)
+        return vector
+
+    def initial_centroids(self, rows, rng):
+        # k-means++ seeding on a random sample: each new centre is drawn with
+        # probability proportional to its distance from the nearest one.
+        indices, weights, row_starts, lengths = self.gather(rows)
+        ends = row_starts + lengths
+        centroids = np.zeros((self.num_topics, self.num_features), dtype=np.float32)
+        best = np.full(len(rows), -1.0, dtype=np.float32)
+        choice = rng.integers(len(rows))
+        for k in range(self.num_topics):
+            span = slice(row_starts[choice], ends[choice])
+            centroids[k] = self.centroid(indices[span], weights[span])
+            similarity = self.scores(centroids[k : k + 1], indices, weights, row_starts)
+            best = np.maximum(best, similarity[0])
+            distance = np.clip(1 - best, 0, None)
+            if not distance.sum():
+                break
+            choice = rng.choice(len(rows), p=distance / distance.sum())
+        return centroids
+
+    @profiler.profiled("topics_fit")
+    def fit(self, nonempty, rng):
+        sample = rng.choice(nonempty, min(len(nonempty), self.batch_size), False)
+        self.centroids = self.initial_centroids(np.sort(sample), rng)
+        self.counts = np.zeros(self.num_topics, dtype=np.float64)
+
+        iterations = max(20, self.epochs * len(nonempty) // self.batch_size)
+        sums = np.zeros_like(self.centroids)
+        for _ in range(iterations):
+            rows = np.sort(
+                rng.choice(nonempty, min(len(nonempty), self.batch_size), False)
+            )
+            indices, weights, row_starts, lengths = self.gather(rows)
+            similarity = self.scores(self.centroids, indices, weights, row_starts)
+            labels = similarity.argmax(axis=0)
+
+            # A centre nobody has chosen yet takes over the worst-fitted row.
+            chosen = self.counts + np.bincount(labels, minlength=self.num_topics)
+            for k in np.flatnonzero(chosen == 0):
+                worst = similarity.max(axis=0).argmin()
+                span = slice(row_starts[worst], row_starts[worst] + lengths[worst])
+                self.centroids[k] = self.centroid(indices[span], weights[span])
+                labels[worst] = k
+                similarity[:, worst] = 0
+                similarity[k, worst] = 1
+
+            batch_counts = np.bincount(labels, minlength=self.num_topics)
+            sums.fill(0)
+            np.add.at(sums, (np.repeat(labels, lengths), indices), weights)
+            self.counts += batch_counts
+            rate = batch_counts / np.maximum(self.counts, 1)
+            means = sums / np.maximum(batch_counts, 1)[:, None]
+            self.centroids *= (1 - rate)[:, None].astype(np.float32)
+            self.centroids += means * rate[:, None].astype(np.float32)
+            norms = np.linalg.norm(self.centroids, axis=1)
+            self.centroids /= np.maximum(norms, 1e-12)[:, None]
+
+    @profiler.profiled("topics_assign")
+    def assign(self, rows):
+        # Labels for rows 0..rows-1 in file order; titles without a usable
+        # word get -1.
+        for start in range(0, rows, self.batch_size):
+            batch = np.arange(start, min(start + self.batch_size, rows))
+            labels = np.full(len(batch), -1, dtype=np.int64)
+            filled = batch[self.offsets[batch + 1] > self.offsets[batch]]
+            if len(filled):
+                indices, weights, row_starts, _ = self.gather(filled)
+                labels[filled - start] = self.scores(
+                    self.centroids, indices, weights, row_starts
+                ).argmax(axis=0)
+            yield from labels.tolist()
+
+    def topic_terms(self, k):
+        top = np.argsort(self.centroids[k])[::-1][: self.top_terms * 2]
+        terms = []
+        for index in top:
+            term = self.terms.get(int(index))
+            if term and not any(term in other or other in term for other in terms):
+                terms.append(term)
+        return terms[: self.top_terms]
+
+    def cluster(self, audit_dir):
+        print(f"\nClustering titles in {audit_dir} into {self.num_topics} topics...")
+        start_time = time.time()
+        work_dir = tempfile.mkdtemp(prefix=".topics_", dir=audit_dir)
+        try:
+            rows = self.hash_titles(audit_dir, os.path.join(work_dir, "features.bin"))
+            nonempty = np.flatnonzero(self.offsets[1:] > self.offsets[:-1])
+            if len(nonempty) < self.num_topics:
+                print("Not enough titles to cluster")
+                return None
+            rng = np.random.default_rng(self.seed)
+            self.fit(nonempty, rng)
+
+            sizes = [0] * self.num_topics
+            per_day = defaultdict(lambda: [0] * self.num_topics)
+            assignments_file = os.path.join(audit_dir, ASSIGNMENTS_FILE)
+            with atomic_write(assignments_file, newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["url", "topic"])
+                for (url, date), topic in zip(
+                    iter_audit_columns(audit_dir, ("url", "date_parsed")),
+                    self.assign(rows),
+                ):
+                    writer.writerow([url, topic])
+                    if topic >= 0:
+                        sizes[topic] += 1
+                        per_day[date or "UNKNOWN_DATE"][topic] += 1
+            del self.features
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        topics = {
+            "generated_at": datetime.now().isoformat(),
+            "method": (
+                f"minibatch_kmeans (hashed tf-idf, {self.num_features} features, "
+                f"batches of {self.batch_size})"
+            ),
+            "num_topics": self.num_topics,
+            "articles_clustered": sum(sizes),
+            "unclustered": rows - sum(sizes),
+            "assignments_file": ASSIGNMENTS_FILE,
+            "clusters": [
+                {"id": k, "size": sizes[k], "terms": self.topic_terms(k)}
+                for k in range(self.num_topics)
+            ],
+            "per_day": dict(sorted(per_day.items())),
+        }
+        topics_file = os.path.join(audit_dir, TOPICS_FILE)
+        with atomic_write(topics_file) as f:
+            json.dump(topics, f, indent=2, ensure_ascii=False)
+
+        print(
+            f"Clustered {sum(sizes):,} titles in {time.time() - start_time:.1f} "
+            f"seconds"
+        )
+        for cluster in sorted(topics["clusters"], key=lambda c: -c["size"])[:10]:
+            print(f"  {cluster['size']:>9,}  {', '.join(cluster['terms'][:5])}")
+        print(f"Saved: {topics_file}")
+        print(f"Saved: {assignments_file}")
+        return topics
+
@@ -1,50 +1,98 @@
-import requests
 import csv
 import json
 import time
 from datetime import datetime
 import os
 import random
+from collections import defaultdict
+from article_ids import extract_article_id
+from checkpoint_io import (
+    COMPACT_SEPARATORS,
+    atomic_output,
+    atomic_write,
+    check_compression,
+    find_output,
+    open_file,
+    write_json_generation,
+)
+from crawl_metrics import CrawlMetrics
+from profiling import profiler
+from q2b_studio_auditor import LAST_PAGE_CACHE
 
 
 class WaybackArchiver:
-    def __init__(self, clean_data_dir):
+    def __init__(
+        self,
+        clean_data_dir,
+        metrics_port=None,
+        compression=None,
+        base_url="https://www.q2bstudio.com",
+    ):
         self.clean_data_dir = clean_data_dir
-        self.session = requests.Session()
-        self.session.headers.update(
-            {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-        )
+        self.base_url = base_url
+        self.compression = check_compression(compression)
+        self._session = None
+
+        self.metrics = CrawlMetrics(filename="archive_metrics.json")
+        if metrics_port:
+            self.metrics.serve(metrics_port)
 
         self.articles = []
         self.archived = 0
         self.failed = 0
         self.skipped = 0
+        self.listing_pages = []
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+            self._session.headers.update(
+                {
+                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+                }
+            )
+        return self._session
 
+    @profiler.profiled("load")
     def load_data(self):
-        csv_file = os.path.join(self.clean_data_dir, "articles.csv")
+        profiler.set_output_dir(self.clean_data_dir)
+        csv_file = find_output(self.clean_data_dir, "articles.csv")
 
-        if not os.path.exists(csv_file):
-            print(f"Clean CSV not found: {csv_file}")
+        if csv_file is None:
+            print(f"Clean CSV not found in: {self.clean_data_dir}")
             return False
 
         print(f"Loading clean data from: {csv_file}")
 
-        with open(csv_file, "r", encoding="utf-8") as f:
+        with open_file(csv_file, "r") as f:
             reader = csv.DictReader(f)
             self.articles = list(reader)
 
         print(f"Loaded {len(self.articles):,} clean articles")
         return True
 
+    @profiler.profiled("archive")
     def archive_to_wayback(self, url, retry=2):
+        import requests
+
         archive_api = "https://web.archive.org/save/"
 
         for attempt in range(retry):
+            if attempt > 0:
+                self.metrics.inc("retries_total", endpoint="wayback_save")
+
             try:
-                response = self.session.get(
-                    archive_api + url, timeout=60, allow_redirects=True
+                with self.metrics.timer("request_seconds", endpoint="wayback_save"):
+                    response = self.session.get(
+                        archive_api + url, timeout=60, allow_redirects=True
+                    )
+                self.metrics.inc(
+                    "requests_total",
+                    endpoint="wayback_save",
+                    status=response.status_code,
                 )
 
                 if response.status_code == 200:
@@ -56,6 +104,7 @@ class WaybackArchiver:
                 return f"https://web.archive.org/web/{timestamp}/{url}"
 
             except requests.exceptions.Timeout:
+                self.metrics.inc("errors_total", stage="wayback_save", type="Timeout")
                 print(f"Timeout (attempt {attempt + 1}/{retry})")
                 if attempt < retry - 1:
                     time.sleep(5)
@@ -63,6 +112,9 @@ class WaybackArchiver:
                 else:
                     return None
             except Exception as e:
+                self.metrics.inc(
+                    "errors_total", stage="wayback_save", type=type(e).__name__
+                )
                 print(f"Error: {e}")
                 if attempt < retry - 1:
                     time.sleep(3)
@@ -75,7 +127,8 @@ class WaybackArchiver:
     def check_existing_archive(self, url):
         try:
             check_url = f"https://archive.org/wayback/available?url={url}"
-            response = self.session.get(check_url, timeout=10)
+            with self.metrics.timer("request_seconds", endpoint="wayback_available"):
+                response = self.session.get(check_url, timeout=10)
             data = response.json()
 
             if data.get("archived_snapshots", {}).get("closest"):
@@ -106,6 +159,7 @@ class WaybackArchiver:
             if article.get("archive_url"):
                 print(f"Already archived: {article['archive_url']}")
                 self.skipped += 1
+                self.metrics.inc("archive_results_total", result="skipped")
                 continue
 
             archive_url = self.archive_to_wayback(url)
@@ -113,11 +167,15 @@ class WaybackArchiver:
             if archive_url:
                 article["archive_url"] = archive_url
                 self.archived += 1
+                self.metrics.inc("archive_results_total", result="archived")
                 print(f"Archived: {archive_url}")
             else:
                 self.failed += 1
+                self.metrics.inc("archive_results_total", result="failed")
                 print(f"Failed to archive")
 
+            self.metrics.maybe_flush(self.clean_data_dir)
+
             time.sleep(3)
 
             if i % 50 == 0:
@@ -131,41 +189,210 @@ class WaybackArchiver:
                 self.save_checkpoint()
 
         elapsed = time.time() - start_time
+        self.metrics.flush(self.clean_data_dir)
         print(f"\nArchiving complete!")
         print(f"Time elapsed: {elapsed / 60:.1f} minutes")
 
-    def save_checkpoint(self):
-        checkpoint_file = os.path.join(self.clean_data_dir, "archiving_checkpoint.json")
+    def target_articles(self, since=None, until=None, ids=None):
+        if ids:
+            wanted = set(ids)
+            targets = [
+                a
+                for a in self.articles
+                if extract_article_id(a.get("url", "")) in wanted
+            ]
+            found = {extract_article_id(a["url"]) for a in targets}
+            if len(found) < len(wanted):
+                print(f"{len(wanted) - len(found):,} article IDs are not in this audit")
+            return targets
+
+        targets = []
+        for article in self.articles:
+            date = article.get("date_parsed") or "UNKNOWN_DATE"
+            if (since or until) and date == "UNKNOWN_DATE":
+                continue
+            if since and date < since or until and date > until:
+                continue
+            targets.append(article)
+        return targets
+
+    def select_listing_pages(self, targets, max_pages=None):
+        # Greedy cover over the crawl's page -> article mapping. Every target
+        # day first gets the page holding most of its targets; the remaining
+        # budget goes to the pages covering the most targets. A page belongs
+        # to exactly one page_num, so no target is ever covered twice.
+        pages = defaultdict(list)
+        for article in targets:
+            if str(article.get("page_num") or "").isdigit():
+                pages[int(article["page_num"])].append(article)
+
+        ranked = sorted(pages, key=lambda page: (-len(pages[page]), page))
+        uncovered = {a.get("date_parsed") or "UNKNOWN_DATE" for a in targets}
+        budget = max_pages or len(ranked)
+        selected = []
+        for page in ranked:
+            if len(selected) >= budget or not uncovered:
+                break
+            dates = {a.get("date_parsed") or "UNKNOWN_DATE" for a in pages[page]}
+            if dates & uncovered:
+                selected.append(page)
+                uncovered -= dates
+
+        chosen = set(selected)
+        for page in ranked:
+            if len(selected) >= budget:
+                break
+            if page not in chosen:
+                selected.append(page)
+
+        return [(page, pages[page]) for page in sorted(selected)]
+
+    def detect_page_shift(self, auditor):
+        # Listing pages run newest first, so every article published since
+        # the crawl pushes older ones towards higher page numbers. The shift
+        # is how far the last page has moved since the crawl saw it, as
+        # recorded in the audit's last_page_cache.json. The highest page_num
+        # is no substitute: a partial or delta audit never reached the end.
+        cache = auditor.read_last_page_cache(self.clean_data_dir)
+        if not cache or not cache.get("last_page"):
+            print(
+                f"No {LAST_PAGE_CACHE} in {self.clean_data_dir}, using crawl "
+                "page numbers (pass --page-shift to correct them)"
+            )
+            return 0
+        crawl_last_page = cache["last_page"]
+        last_page = auditor.find_last_page()
+        if not last_page:
+            print("Could not measure page drift, using crawl page numbers")
+            return 0
+        shift = max(last_page - crawl_last_page, 0)
+        print(
+            f"Last page now {last_page:,}, {crawl_last_page:,} at crawl time "
+            f"(shift {shift:,})"
+        )
+        return shift
+
+    def archive_listing_pages(
+        self, max_pages=None, since=None, until=None, ids=None, page_shift=None
+    ):
+        # One /save/ request per listing page captures the titles, URLs and
+        # dates of every article on it, about 9x the evidence per request of
+        # archive_sample. Page numbers are the crawl's, shifted by the number
+        # of pages published since; which articles each snapshot actually
+        # shows should be checked against the mapping in archive_report.json.
+        from q2b_studio_auditor import Q2BStudioAuditor
+
+        targets = self.target_articles(since, until, ids)
+        if not targets:
+            print("No articles match the archiving targets")
+            return
+
+        auditor = Q2BStudioAuditor(create_output_dir=False, base_url=self.base_url)
+        selected = self.select_listing_pages(targets, max_pages)
+        covered = sum(len(articles) for _, articles in selected)
+        print(
+            f"Selected {len(selected):,} listing pages covering {covered:,} of "
+            f"{len(targets):,} target articles"
+        )
+        print("-" * 60)
+
+        if page_shift is None:
+            page_shift = self.detect_page_shift(auditor)
+
+        start_time = time.time()
+
+        for i, (page_num, articles) in enumerate(selected, 1):
+            page_url = auditor.page_url(page_num + page_shift)
+            dates = sorted({a.get("date_parsed") or "UNKNOWN_DATE" for a in articles})
+
+            print(f"\n[{i}/{len(selected)}] Page {page_num:,} ({', '.join(dates)})")
+            print(f"  URL: {page_url}")
+
+            archive_url = self.archive_to_wayback(page_url)
 
-        with open(checkpoint_file, "w", encoding="utf-8") as f:
-            json.dump(
+            if archive_url:
+                for article in articles:
+                    article["listing_archive_url"] = archive_url
+                self.archived += 1
+                self.metrics.inc("listing_archive_results_total", result="archived")
+                self.metrics.inc("articles_covered_total", len(articles))
+                print(f"Archived: {archive_url} ({len(articles)} articles)")
+            else:
+                self.failed += 1
+                self.metrics.inc("listing_archive_results_total", result="failed")
+                print(f"Failed to archive")
+
+            self.listing_pages.append(
+                {
+                    "page_num": page_num,
+                    "archived_page": page_num + page_shift,
+                    "page_url": page_url,
+                    "archive_url": archive_url,
+                    "articles": [
+                        {
+                            "url": a["url"],
+                            "title": a.get("title"),
+                            "date": a.get("date_parsed"),
+                        }
+                        for a in articles
+                    ],
+                }
+            )
+
+            self.metrics.maybe_flush(self.clean_data_dir)
+
+            time.sleep(3)
+
+            if i % 50 == 0:
+                print(f"\nProgress: {i}/{len(selected)}")
+                print(f"   Archived: {self.archived}, Failed: {self.failed}")
+
+                self.save_checkpoint()
+
+        elapsed = time.time() - start_time
+        self.metrics.flush(self.clean_data_dir)
+        print(f"\nArchiving complete!")
+        print(f"Time elapsed: {elapsed / 60:.1f} minutes")
+
+    @profiler.profiled("checkpoint")
+    def save_checkpoint(self):
+        with self.metrics.timer("checkpoint_write_seconds"):
+            write_json_generation(
+                self.clean_data_dir,
+                "archiving_checkpoint.json",
                 {
                     "timestamp": datetime.now().isoformat(),
                     "archived": self.archived,
                     "failed": self.failed,
                     "skipped": self.skipped,
+                    "listing_pages": self.listing_pages,
                     "articles": self.articles,
                 },
-                f,
-                indent=2,
+                compression=self.compression,
+                separators=COMPACT_SEPARATORS,
                 ensure_ascii=False,
             )
+        self.metrics.flush(self.clean_data_dir)
 
+    @profiler.profiled("results")
     def save_results(self):
         print("\nSaving archived data...")
 
-        csv_file = os.path.join(self.clean_data_dir, "articles_archived.csv")
-        with open(csv_file, "w", newline="", encoding="utf-8") as f:
+        with atomic_output(
+            self.clean_data_dir, "articles_archived.csv", self.compression, newline=""
+        ) as f:
             if self.articles:
                 fieldnames = list(self.articles[0].keys())
                 if "archive_url" not in fieldnames:
                     fieldnames.append("archive_url")
+                if self.listing_pages and "listing_archive_url" not in fieldnames:
+                    fieldnames.append("listing_archive_url")
 
                 writer = csv.DictWriter(f, fieldnames=fieldnames)
                 writer.writeheader()
                 writer.writerows(self.articles)
 
-        print(f"Saved: {csv_file}")
+        print(f"Saved: {find_output(self.clean_data_dir, 'articles_archived.csv')}")
 
         archived_articles = [a for a in self.articles if a.get("archive_url")]
 
@@ -193,9 +420,16 @@ class WaybackArchiver:
                 for a in archived_articles
             ],
         }
+        if self.listing_pages:
+            archived_pages = [p for p in self.listing_pages if p["archive_url"]]
+            report["listing_pages_archived"] = len(archived_pages)
+            report["articles_covered_by_listing_pages"] = sum(
+                len(p["articles"]) for p in archived_pages
+            )
+            report["listing_pages"] = self.listing_pages
 
         report_file = os.path.join(self.clean_data_dir, "archive_report.json")
-        with open(report_file, "w", encoding="utf-8") as f:
+        with atomic_write(report_file) as f:
             json.dump(report, f, indent=2, ensure_ascii=False)
 
         print(f"Saved: {report_file}")
@@ -208,5 +442,8 @@ class WaybackArchiver:
 
             for article in archived_articles:
                 f.write(f"{article.get('archive_url')}\n")
+            for page in self.listing_pages:
+                if page["archive_url"]:
+                    f.write(f"{page['archive_url']}\n")
 
         print(f"Saved: {urls_file}")